@@ -12,6 +12,7 @@ from app.core.config import settings
 from app.models.author import Author
 from app.models.book import Book
 from app.models.genre import Genre
+from app.models.search_outbox import SearchOutbox, SearchOutboxDeadLetter
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,26 @@
+"""Index books by (updated_at, id) for streaming sync
+
+Revision ID: 5f2a9c1e7b3d
+Revises: 83b887301cca
+Create Date: 2026-10-17 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '5f2a9c1e7b3d'
+down_revision: Union[str, None] = '83b887301cca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_updated_at_id', 'books', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_updated_at_id', table_name='books')
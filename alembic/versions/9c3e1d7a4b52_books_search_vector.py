@@ -0,0 +1,120 @@
+"""Weighted full-text search vector on books
+
+Revision ID: 9c3e1d7a4b52
+Revises: 5f2a9c1e7b3d
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '9c3e1d7a4b52'
+down_revision: Union[str, None] = '5f2a9c1e7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# search_vector spans authors and genres, which a generated column cannot reference,
+# so triggers keep it current: on the book's own columns, on its association rows
+# and on author/genre renames. Weights: title A, authors B, genres C, summary D.
+# Association triggers are statement-level with transition tables, so a bulk insert of
+# a chunk's links recomputes each distinct book once instead of once per row.
+FUNCTIONS = """
+CREATE OR REPLACE FUNCTION books_search_vector(p_book_id uuid, p_title text, p_summary text)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT
+        setweight(to_tsvector('english', coalesce(p_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(a.name, ' ') FROM book_authors ba JOIN authors a ON a.id = ba.author_id
+            WHERE ba.book_id = p_book_id), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(g.name, ' ') FROM book_genres bg JOIN genres g ON g.id = bg.genre_id
+            WHERE bg.book_id = p_book_id), '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(p_summary, '')), 'D')
+$$;
+
+CREATE OR REPLACE FUNCTION books_search_vector_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := books_search_vector(NEW.id, NEW.title, NEW.summary);
+    RETURN NEW;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION books_search_vector_refresh_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE books SET search_vector = books_search_vector(id, title, summary)
+        WHERE id IN (SELECT DISTINCT book_id FROM old_rows);
+    ELSE
+        UPDATE books SET search_vector = books_search_vector(id, title, summary)
+        WHERE id IN (SELECT DISTINCT book_id FROM new_rows);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION books_search_vector_rename_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'authors' THEN
+        UPDATE books SET search_vector = books_search_vector(id, title, summary)
+        WHERE id IN (SELECT book_id FROM book_authors WHERE author_id = NEW.id);
+    ELSE
+        UPDATE books SET search_vector = books_search_vector(id, title, summary)
+        WHERE id IN (SELECT book_id FROM book_genres WHERE genre_id = NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+TRIGGERS = """
+CREATE TRIGGER books_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, summary ON books
+    FOR EACH ROW EXECUTE FUNCTION books_search_vector_trigger();
+CREATE TRIGGER book_authors_search_vector_refresh_insert
+    AFTER INSERT ON book_authors REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_search_vector_refresh_trigger();
+CREATE TRIGGER book_authors_search_vector_refresh_delete
+    AFTER DELETE ON book_authors REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_search_vector_refresh_trigger();
+CREATE TRIGGER book_genres_search_vector_refresh_insert
+    AFTER INSERT ON book_genres REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_search_vector_refresh_trigger();
+CREATE TRIGGER book_genres_search_vector_refresh_delete
+    AFTER DELETE ON book_genres REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_search_vector_refresh_trigger();
+CREATE TRIGGER authors_search_vector_rename
+    AFTER UPDATE OF name ON authors
+    FOR EACH ROW EXECUTE FUNCTION books_search_vector_rename_trigger();
+CREATE TRIGGER genres_search_vector_rename
+    AFTER UPDATE OF name ON genres
+    FOR EACH ROW EXECUTE FUNCTION books_search_vector_rename_trigger();
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(FUNCTIONS)
+    op.execute(TRIGGERS)
+    op.execute("UPDATE books SET search_vector = books_search_vector(id, title, summary)")
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_search_vector', table_name='books', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS genres_search_vector_rename ON genres")
+    op.execute("DROP TRIGGER IF EXISTS authors_search_vector_rename ON authors")
+    op.execute("DROP TRIGGER IF EXISTS book_genres_search_vector_refresh_delete ON book_genres")
+    op.execute("DROP TRIGGER IF EXISTS book_genres_search_vector_refresh_insert ON book_genres")
+    op.execute("DROP TRIGGER IF EXISTS book_authors_search_vector_refresh_delete ON book_authors")
+    op.execute("DROP TRIGGER IF EXISTS book_authors_search_vector_refresh_insert ON book_authors")
+    op.execute("DROP TRIGGER IF EXISTS books_search_vector_update ON books")
+    op.execute("DROP FUNCTION IF EXISTS books_search_vector_rename_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS books_search_vector_refresh_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS books_search_vector_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS books_search_vector(uuid, text, text)")
+    op.drop_column('books', 'search_vector')
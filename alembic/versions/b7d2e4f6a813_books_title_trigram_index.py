@@ -0,0 +1,40 @@
+"""Trigram index on normalized book titles for fuzzy duplicate detection
+
+Revision ID: b7d2e4f6a813
+Revises: 9c3e1d7a4b52
+Create Date: 2026-10-18 00:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b7d2e4f6a813'
+down_revision: Union[str, None] = '9c3e1d7a4b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Lowercases, turns punctuation into spaces, drops a leading article and collapses
+# whitespace. Declared IMMUTABLE so it can back an expression index.
+NORMALIZE_TITLE = r"""
+CREATE OR REPLACE FUNCTION normalize_title(title text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE RETURNS NULL ON NULL INPUT AS $$
+    SELECT btrim(regexp_replace(
+        regexp_replace(regexp_replace(lower(title), '[^[:alnum:]]+', ' ', 'g'), '^\s*(the|a|an)\s+', ''),
+        '\s+', ' ', 'g'))
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(NORMALIZE_TITLE)
+    op.execute("CREATE INDEX ix_books_title_trgm ON books USING gin (normalize_title(title) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_books_title_trgm")
+    op.execute("DROP FUNCTION IF EXISTS normalize_title(text)")
@@ -0,0 +1,165 @@
+"""Transactional outbox for Elasticsearch synchronization
+
+Revision ID: e3a91c5f0d27
+Revises: b7d2e4f6a813
+Create Date: 2026-10-18 01:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'e3a91c5f0d27'
+down_revision: Union[str, None] = 'b7d2e4f6a813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every change that affects a book's search document enqueues an outbox row inside the
+# writing transaction, so bulk Core statements are covered as well as ORM flushes.
+# Book and association triggers are statement-level with transition tables to write
+# one row per touched book per statement; renames fan out to the books that use them.
+# A scrape tags its transactions with SET LOCAL app.scrape_task_id, which the rows carry
+# so the relay can tell the task once its books are indexed. Book updates that only
+# touch search_vector (the refresh after association and rename changes) are skipped,
+# since those changes already enqueue their books.
+FUNCTIONS = """
+CREATE OR REPLACE FUNCTION search_outbox_task_id() RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT nullif(current_setting('app.scrape_task_id', true), '')
+$$;
+
+CREATE OR REPLACE FUNCTION search_outbox_books_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO search_outbox (book_id, op, task_id) SELECT id, 'delete', search_outbox_task_id() FROM old_rows;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO search_outbox (book_id, op, task_id)
+        SELECT n.id, 'index', search_outbox_task_id() FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE to_jsonb(n) - 'search_vector' IS DISTINCT FROM to_jsonb(o) - 'search_vector';
+    ELSE
+        INSERT INTO search_outbox (book_id, op, task_id) SELECT id, 'index', search_outbox_task_id() FROM new_rows;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION search_outbox_association_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO search_outbox (book_id, op, task_id)
+        SELECT DISTINCT r.book_id, 'index', search_outbox_task_id() FROM old_rows r JOIN books b ON b.id = r.book_id;
+    ELSE
+        INSERT INTO search_outbox (book_id, op, task_id)
+        SELECT DISTINCT book_id, 'index', search_outbox_task_id() FROM new_rows;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION search_outbox_rename_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.name IS DISTINCT FROM OLD.name THEN
+        IF TG_TABLE_NAME = 'authors' THEN
+            INSERT INTO search_outbox (book_id, op, task_id)
+            SELECT book_id, 'index', search_outbox_task_id() FROM book_authors WHERE author_id = NEW.id;
+        ELSE
+            INSERT INTO search_outbox (book_id, op, task_id)
+            SELECT book_id, 'index', search_outbox_task_id() FROM book_genres WHERE genre_id = NEW.id;
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+TRIGGERS = """
+CREATE TRIGGER books_search_outbox_insert
+    AFTER INSERT ON books REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_books_trigger();
+CREATE TRIGGER books_search_outbox_update
+    AFTER UPDATE ON books REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_books_trigger();
+CREATE TRIGGER books_search_outbox_delete
+    AFTER DELETE ON books REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_books_trigger();
+CREATE TRIGGER book_authors_search_outbox_insert
+    AFTER INSERT ON book_authors REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_association_trigger();
+CREATE TRIGGER book_authors_search_outbox_delete
+    AFTER DELETE ON book_authors REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_association_trigger();
+CREATE TRIGGER book_genres_search_outbox_insert
+    AFTER INSERT ON book_genres REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_association_trigger();
+CREATE TRIGGER book_genres_search_outbox_delete
+    AFTER DELETE ON book_genres REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION search_outbox_association_trigger();
+CREATE TRIGGER authors_search_outbox_rename
+    AFTER UPDATE OF name ON authors
+    FOR EACH ROW EXECUTE FUNCTION search_outbox_rename_trigger();
+CREATE TRIGGER genres_search_outbox_rename
+    AFTER UPDATE OF name ON genres
+    FOR EACH ROW EXECUTE FUNCTION search_outbox_rename_trigger();
+"""
+
+DROP_TRIGGERS = [
+    ("genres_search_outbox_rename", "genres"),
+    ("authors_search_outbox_rename", "authors"),
+    ("book_genres_search_outbox_delete", "book_genres"),
+    ("book_genres_search_outbox_insert", "book_genres"),
+    ("book_authors_search_outbox_delete", "book_authors"),
+    ("book_authors_search_outbox_insert", "book_authors"),
+    ("books_search_outbox_delete", "books"),
+    ("books_search_outbox_update", "books"),
+    ("books_search_outbox_insert", "books"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'search_outbox',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('task_id', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_search_outbox_book_id'), 'search_outbox', ['book_id'], unique=False)
+    op.create_index(
+        'ix_search_outbox_task_id', 'search_outbox', ['task_id'], unique=False,
+        postgresql_where=sa.text('task_id IS NOT NULL')
+    )
+    op.create_table(
+        'search_outbox_dead_letter',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_search_outbox_dead_letter_book_id'), 'search_outbox_dead_letter', ['book_id'], unique=False)
+    op.execute(FUNCTIONS)
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger, table in DROP_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS search_outbox_rename_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS search_outbox_association_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS search_outbox_books_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS search_outbox_task_id()")
+    op.drop_index(op.f('ix_search_outbox_dead_letter_book_id'), table_name='search_outbox_dead_letter')
+    op.drop_table('search_outbox_dead_letter')
+    op.drop_index('ix_search_outbox_task_id', table_name='search_outbox')
+    op.drop_index(op.f('ix_search_outbox_book_id'), table_name='search_outbox')
+    op.drop_table('search_outbox')
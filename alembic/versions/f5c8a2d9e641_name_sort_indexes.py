@@ -0,0 +1,31 @@
+"""Case-insensitive name sort indexes on authors and genres
+
+Revision ID: f5c8a2d9e641
+Revises: e3a91c5f0d27
+Create Date: 2026-10-18 02:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'f5c8a2d9e641'
+down_revision: Union[str, None] = 'e3a91c5f0d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The "C" collation makes the btree usable for both the keyset ORDER BY and
+# prefix LIKE 'abc%' scans, as a text_pattern_ops index would for LIKE alone.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_authors_name_sort', 'authors', [sa.text('lower(name) COLLATE "C"'), 'id'], unique=False)
+    op.create_index('ix_genres_name_sort', 'genres', [sa.text('lower(name) COLLATE "C"'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_genres_name_sort', table_name='genres')
+    op.drop_index('ix_authors_name_sort', table_name='authors')
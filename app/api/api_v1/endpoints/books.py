@@ -1,34 +1,45 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, status, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.genre import GenrePublic
-from app.schemas.author import AuthorPublic
 from app.core.db import get_db
-from app.schemas.book import BookPublic, PaginatedResponse
-from app.services.search_service import search_books_in_es
+from app.schemas.book import BookPublic, BookSearchPage
+from app.services.search_service import (
+    search_books_in_es,
+    search_books_with_facets,
+    search_books_by_cursor,
+    InvalidCursorError,
+    CURSOR_START,
+)
+from app.services.search_serializer import to_public_books
 from typing import List, Optional
 import uuid
 
-from app.tasks.scrape import process_search_query
+from app.services.scrape_dispatch import dispatch_scrape
 
 router = APIRouter()
 
-@router.get("/", response_model=PaginatedResponse[BookPublic])
+@router.get("/", response_model=BookSearchPage)
 async def get_books_from_search(
     q: Optional[str] = Query(None, description="Search query string (searches title, authors, summary, etc.)"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     sort_by: Optional[str] = Query("relevance", description="Sort criteria (e.g., relevance, rating_desc, year_asc, title_asc)"),
-    author: Optional[str] = Query(None, description="Filter by author name"),
-    genre: Optional[str] = Query(None, description="Filter by genre name"),
+    author: Optional[List[str]] = Query(None, description="Filter by author name; repeat to match any of several"),
+    genre: Optional[List[str]] = Query(None, description="Filter by genre name; repeat to match any of several"),
     min_year: Optional[int] = Query(None, description="Filter by minimum publication year"),
     max_year: Optional[int] = Query(None, description="Filter by maximum publication year"),
     min_rating: Optional[float] = Query(None, description="Filter by minimum average rating"),
-    language: Optional[str] = Query(None, description="Filter by language"),
+    language: Optional[List[str]] = Query(None, description="Filter by language; repeat to match any of several"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response; '*' starts cursor pagination and replaces 'page'"),
+    exact_total: bool = Query(True, description="Count all matching books exactly; disable for infinite scroll"),
+    facets: bool = Query(False, description="Also return genre, author, language, age rating, year and rating facets (page mode only)"),
 ):
     """
     Retrieves a list of books based on search query, filters, and sorting
     using the Elasticsearch index.
+    Pages either by 'page' number or, for deep and infinite-scroll paging, by 'cursor'.
     Also triggers a background Celery task to update results from external sources if a query 'q' is provided.
+    Hits are mapped straight to the response shape and encoded with orjson; response_model documents it.
     """
     filters = {
         "author": author,
@@ -40,36 +51,54 @@ async def get_books_from_search(
     }
     active_filters = {k: v for k, v in filters.items() if v is not None}
 
-    results, total_hits = await search_books_in_es(
-        query=q,
-        filters=active_filters,
-        sort_by=sort_by,
-        page=page,
-        page_size=page_size
-    )
-
-    if q and q.strip():
-        task = process_search_query.delay(q)
-        print(f"Dispatched Celery task {task.id} for query: '{q}' from /books endpoint.")
-    public_results = [
-        BookPublic(
-            **{k: v for k, v in result.items() if k not in ['authors', 'genres']},
-            authors=[AuthorPublic(**a) for a in result.get("authors", []) if isinstance(a, dict)],
-            genres=[GenrePublic(**g) for g in result.get("genres", []) if isinstance(g, dict)]
+    next_cursor = None
+    facet_results = None
+    if cursor:
+        try:
+            results, total_hits, next_cursor = await search_books_by_cursor(
+                query=q,
+                filters=active_filters,
+                sort_by=sort_by,
+                cursor=cursor,
+                page_size=page_size,
+                exact_total=exact_total
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    elif facets:
+        results, total_hits, facet_results = await search_books_with_facets(
+            query=q,
+            filters=active_filters,
+            sort_by=sort_by,
+            page=page,
+            page_size=page_size,
+            exact_total=exact_total
+        )
+    else:
+        results, total_hits = await search_books_in_es(
+            query=q,
+            filters=active_filters,
+            sort_by=sort_by,
+            page=page,
+            page_size=page_size,
+            exact_total=exact_total
         )
-        for result in results
-    ]
-
 
-    return PaginatedResponse[BookPublic](
-        results=public_results,
-        total_hits=total_hits,
-        page=page,
-        page_size=page_size
-    )
+    is_cursor_continuation = bool(cursor) and cursor != CURSOR_START
+    if q and q.strip() and not is_cursor_continuation:
+        task_id, dispatch_status = await dispatch_scrape(q)
+        print(f"Scrape for query '{q}' from /books endpoint: {dispatch_status} (task {task_id}).")
+    return ORJSONResponse({
+        "results": to_public_books(results),
+        "total_hits": total_hits,
+        "page": None if cursor else page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "facets": facet_results,
+    })
 
 
-from app.crud import crud_book
+from app.services.book_cache import get_public_book
 
 @router.get("/{book_id}", response_model=BookPublic)
 async def read_book(
@@ -77,9 +106,11 @@ async def read_book(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get a single book by its ID from the database.
+    Get a single book by its ID.
+    Served through the book cache (process-local LRU, then Redis), filled from the database
+    or, with BOOK_DETAIL_SOURCE=es, from the Elasticsearch document.
     """
-    db_book = await crud_book.get_book(db=db, book_id=book_id)
-    if db_book is None:
+    book = await get_public_book(db=db, book_id=book_id)
+    if book is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    return db_book
\ No newline at end of file
+    return ORJSONResponse(book)
\ No newline at end of file
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Depends
-from app.schemas.genre import GenrePublic
-from app.schemas.author import AuthorPublic
-from app.schemas.book import SearchRequest, SearchResponse, BookPublic
+from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Depends, Header
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Optional
+from app.schemas.book import SearchRequest, SearchResponse
 from app.schemas.common import PaginatedResponse
-from app.tasks.scrape import process_search_query
-from app.services.search_service import search_books_in_es
+from app.services.scrape_dispatch import dispatch_scrape, IN_FLIGHT, FRESH
+from app.services.search_service import (
+    search_books_in_es,
+    search_books_by_cursor,
+    InvalidCursorError,
+    CURSOR_START,
+)
+from app.services.search_serializer import to_public_books
+from app.services.task_events import stream_task_events
 from app.core.es import get_es_client
 from elasticsearch import AsyncElasticsearch
 
@@ -23,34 +30,69 @@ async def initiate_search(
     """
     print(f"Received explicit search request via POST: {search_request.query}")
 
-    initial_results, total_hits = await search_books_in_es(
-        query=search_request.query,
-        page=search_request.page,
-        page_size=search_request.page_size,
-    )
+    next_cursor = None
+    if search_request.cursor:
+        try:
+            initial_results, total_hits, next_cursor = await search_books_by_cursor(
+                query=search_request.query,
+                cursor=search_request.cursor,
+                page_size=search_request.page_size,
+                exact_total=search_request.exact_total,
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        initial_results, total_hits = await search_books_in_es(
+            query=search_request.query,
+            page=search_request.page,
+            page_size=search_request.page_size,
+            exact_total=search_request.exact_total,
+        )
 
-    if search_request.query and search_request.query.strip():
-        task = process_search_query.delay(search_request.query)
-        print(f"Dispatched background task {task.id} for query: {search_request.query}")
-        message = "Search task accepted. Returning initial results from existing data. Index will be updated in the background from multiple sources."
-        task_id = task.id
+    is_cursor_continuation = bool(search_request.cursor) and search_request.cursor != CURSOR_START
+    if is_cursor_continuation:
+        message = "Returning the next page of results for an ongoing cursor. No background task dispatched."
+        task_id = None
+    elif search_request.query and search_request.query.strip():
+        task_id, dispatch_status = await dispatch_scrape(search_request.query)
+        print(f"Scrape for query '{search_request.query}': {dispatch_status} (task {task_id})")
+        if dispatch_status == IN_FLIGHT:
+            message = "An update for this query is already running. Returning initial results from existing data; follow the returned task."
+        elif dispatch_status == FRESH:
+            message = "This query was refreshed from external sources recently. Returning results from existing data; no new task dispatched."
+        else:
+            message = "Search task accepted. Returning initial results from existing data. Index will be updated in the background from multiple sources."
     else:
         print("No query provided in search request, background task not dispatched.")
         message = "No query provided. Returning initial results based on filters/defaults only. No background task dispatched."
         task_id = None
 
-    public_results = [
-        BookPublic(
-            **{k: v for k, v in result.items() if k not in ['authors', 'genres']},
-            authors=[AuthorPublic(**a) for a in result.get("authors", [])],
-            genres=[GenrePublic(**g) for g in result.get("genres", [])]
-        )
-        for result in initial_results
-    ]
+    return ORJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "task_id": task_id,
+            "message": message,
+            "initial_results": to_public_books(initial_results),
+            "total_hits": total_hits,
+            "next_cursor": next_cursor,
+        }
+    )
 
-    return SearchResponse(
-        task_id=task_id,
-        message=message,
-        initial_results=public_results,
-        total_hits=total_hits
-    )
\ No newline at end of file
+
+@router.get("/{task_id}/events")
+async def stream_search_task_events(
+    task_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-sent events for a scrape task returned by POST /search: 'progress' events with
+    API call and ingest counters, 'books' events with the ids of newly indexed books (fetch
+    them via /books/{id} instead of re-running the search) and a final 'done' event, sent
+    once the task's books are indexed or TASK_EVENTS_INDEX_WAIT_SECONDS have passed.
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    return StreamingResponse(
+        stream_task_events(task_id, last_event_id=last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Query
+from app.schemas.suggest import SuggestResponse
+from app.services.search_service import suggest_books
+
+router = APIRouter()
+
+@router.get("/", response_model=SuggestResponse)
+async def get_suggestions(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix typed into the search box"),
+    size: int = Query(5, ge=1, le=20, description="Maximum number of suggestions per group"),
+):
+    """
+    Typeahead suggestions for book titles and author names matching the typed prefix.
+    """
+    return await suggest_books(q, size=size)
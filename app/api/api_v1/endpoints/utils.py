@@ -1,34 +1,142 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import get_db
-from app.schemas.genre import GenrePublic
-from app.schemas.author import AuthorPublic
+from app.schemas.genre import GenreListItem
+from app.schemas.author import AuthorListItem
 from app.crud import crud_genre, crud_author
-from typing import List
+from app.crud.name_listing import InvalidNameCursorError
+from app.services.genre_catalog import get_genre_snapshot
+from app.services.search_cache import get_search_cache_stats
+from app.services.scrape_dispatch import get_scrape_dispatch_stats
+from app.services.circuit_breaker import get_circuit_breaker_stats
+from app.tasks.scrape import SEARCH_SOURCES
+from app.core.queues import get_queue_stats
+from app.services.search_backend import search_backend
+from app.services.outbox_relay import get_outbox_stats
+from app.services.book_cache import get_book_cache_stats
+from typing import List, Dict, Any, Optional
+import uuid
 
 router = APIRouter()
 
-@router.get("/genres", response_model=List[GenrePublic])
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _page_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+
+@router.get("/genres", response_model=List[GenreListItem])
 async def get_all_genres(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    prefix: Optional[str] = Query(None, min_length=1, description="Only genres whose name starts with this (case-insensitive)"),
+    include_book_count: bool = Query(False, description="Also count the books of each genre"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve a list of all unique genres.
+    Retrieve genres ordered by name, a page at a time.
+    Served from an in-memory snapshot whose version is the ETag, so unchanged pages
+    revalidate with 304. Book counts are read live and disable the ETag.
     """
-    genres = await crud_genre.get_genres(db, skip=skip, limit=limit)
-    return genres
+    snapshot = await get_genre_snapshot(db)
+    try:
+        genres, next_cursor = snapshot.page(limit, cursor=cursor, prefix=prefix)
+    except InvalidNameCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = _page_headers(next_cursor)
+    if include_book_count:
+        counts = await crud_genre.count_genre_books(db, [uuid.UUID(genre["id"]) for genre in genres])
+        genres = [{**genre, "book_count": counts[uuid.UUID(genre["id"])]} for genre in genres]
+        return ORJSONResponse(genres, headers=headers)
 
+    etag = f'"{snapshot.version}"'
+    headers["ETag"] = etag
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(genres, headers=headers)
 
-@router.get("/authors", response_model=List[AuthorPublic])
+
+@router.get("/authors", response_model=List[AuthorListItem])
 async def get_all_authors(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    prefix: Optional[str] = Query(None, min_length=1, description="Only authors whose name starts with this (case-insensitive)"),
+    include_book_count: bool = Query(False, description="Also count the books of each author"),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve a list of all unique authors.
+    Retrieve authors ordered by name, a page at a time.
+    Pages are keyset-paginated; follow the X-Next-Cursor header until it is absent.
+    """
+    try:
+        authors, next_cursor = await crud_author.get_authors(db, limit=limit, cursor=cursor, prefix=prefix)
+    except InvalidNameCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    counts = await crud_author.count_author_books(db, [author.id for author in authors]) if include_book_count else {}
+    results = [
+        {"id": str(author.id), "name": author.name, "book_count": counts.get(author.id)}
+        for author in authors
+    ]
+    return ORJSONResponse(results, headers=_page_headers(next_cursor))
+
+
+@router.get("/search-cache/stats", response_model=Dict[str, Any])
+async def get_search_cache_statistics():
+    """
+    Hit/miss counters of the search result cache, used to size its TTLs.
+    """
+    return await get_search_cache_stats()
+
+
+
+@router.get("/scrape-dispatch/stats", response_model=Dict[str, Any])
+async def get_scrape_dispatch_statistics():
+    """
+    How many scrape dispatches ran and how many were suppressed as duplicates.
+    """
+    return await get_scrape_dispatch_stats()
+
+
+@router.get("/circuits/stats", response_model=Dict[str, Any])
+async def get_circuit_statistics():
+    """
+    State, latency percentiles and current timeout of each external source's circuit breaker.
+    """
+    return await get_circuit_breaker_stats(SEARCH_SOURCES)
+
+
+@router.get("/queues/stats", response_model=Dict[str, Any])
+async def get_queue_statistics():
+    """
+    Depth and recent wait times of the interactive, refresh and backfill task queues.
+    """
+    return await get_queue_stats()
+
+
+@router.get("/search-backend/stats", response_model=Dict[str, Any])
+async def get_search_backend_statistics():
+    """
+    Which search backend this process is serving from and its recent Elasticsearch health window.
+    """
+    return search_backend.stats()
+
+
+@router.get("/outbox/stats", response_model=Dict[str, Any])
+async def get_outbox_statistics():
+    """
+    Search outbox backlog and lag (pending rows, age of the oldest one) plus relay counters.
+    """
+    return await get_outbox_stats()
+
+
+@router.get("/book-cache/stats", response_model=Dict[str, Any])
+async def get_book_cache_statistics():
+    """
+    Book detail cache counters: this process's LRU and the shared Redis layer.
     """
-    authors = await crud_author.get_authors(db, skip=skip, limit=limit)
-    return authors
\ No newline at end of file
+    return await get_book_cache_stats()
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from .endpoints import search, books, utils
+from .endpoints import search, books, utils, suggest
 
 api_router = APIRouter()
 
 api_router.include_router(search.router, prefix="/search", tags=["Search"])
 api_router.include_router(books.router, prefix="/books", tags=["Books"])
-api_router.include_router(utils.router, prefix="/utils", tags=["Utilities"])
\ No newline at end of file
+api_router.include_router(utils.router, prefix="/utils", tags=["Utilities"])
+api_router.include_router(suggest.router, prefix="/suggest", tags=["Suggest"])
\ No newline at end of file
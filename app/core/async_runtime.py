@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+from .db import engine
+from .es import close_es_client, get_es_client
+from .http import close_http_client, get_http_client
+from .redis import close_redis_client, get_redis_client
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def start_runtime() -> asyncio.AbstractEventLoop:
+    """
+    Starts this process's long-lived event loop in a background thread, once.
+    The shared httpx, Elasticsearch, Redis and asyncpg clients bind to this loop on first
+    use and are reused by every task. A forked child never inherits the parent's loop.
+    """
+    global _loop, _thread, _pid
+    with _lock:
+        if _loop is not None and _pid == os.getpid() and _loop.is_running():
+            return _loop
+
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="async-runtime", daemon=True)
+        thread.start()
+        started.wait()
+        _loop, _thread, _pid = loop, thread, os.getpid()
+        print(f"Async runtime started in process {_pid}.")
+        return loop
+
+
+def run_coroutine(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """
+    Runs a coroutine on the process's shared loop and blocks the calling thread for its result.
+    Called from several pool threads at once, the coroutines run concurrently on that loop.
+    """
+    loop = start_runtime()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def _close_clients():
+    # Only clients that were actually created are closed; lru_cache tells us which.
+    closers = [
+        (get_http_client, close_http_client),
+        (get_es_client, close_es_client),
+        (get_redis_client, close_redis_client),
+    ]
+    for getter, close in closers:
+        if getter.cache_info().currsize:
+            try:
+                await close()
+            except Exception as e:
+                print(f"Error closing {getter.__name__} client: {e}")
+            getter.cache_clear()
+    await engine.dispose()
+
+
+def shutdown_runtime(timeout: float = 30.0):
+    """Closes the shared clients on the loop, then stops the loop and joins its thread."""
+    global _loop, _thread, _pid
+    with _lock:
+        if _loop is None or _pid != os.getpid():
+            return
+        loop, thread = _loop, _thread
+        _loop, _thread, _pid = None, None, None
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(timeout)
+    except Exception as e:
+        print(f"Error during async runtime shutdown: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    loop.close()
+    print("Async runtime stopped.")
@@ -1,11 +1,23 @@
 from celery import Celery
+from celery.signals import task_prerun, worker_process_init, worker_process_shutdown, worker_shutdown
+from kombu import Queue
 from .config import settings
+from .queues import (
+    BACKFILL_QUEUE,
+    ENQUEUED_AT_HEADER,
+    INTERACTIVE_QUEUE,
+    PRIORITY_SEP,
+    PRIORITY_STEPS,
+    QUEUES,
+    REFRESH_QUEUE,
+    record_queue_wait,
+)
 
 celery_app = Celery(
     "book_search_tasks",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.tasks.scrape"],
+    include=["app.tasks.scrape", "app.tasks.refresh"],
 )
 
 celery_app.conf.update(
@@ -21,4 +33,49 @@ celery_app.conf.update(
     task_track_started=True,
     worker_proc_alive_timeout=300,
     broker_connection_retry_on_startup=True,
-)
\ No newline at end of file
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue=INTERACTIVE_QUEUE,
+    task_routes={
+        "app.tasks.scrape.process_search_query": {"queue": INTERACTIVE_QUEUE},
+        "app.tasks.scrape.process_search_queries": {"queue": BACKFILL_QUEUE},
+        "app.tasks.refresh.schedule_refresh_batch": {"queue": REFRESH_QUEUE},
+    },
+    beat_schedule={
+        "schedule-refreshes": {
+            "task": "app.tasks.refresh.schedule_refresh_batch",
+            "schedule": settings.REFRESH_INTERVAL_SECONDS,
+            "options": {"queue": REFRESH_QUEUE, "expires": settings.REFRESH_INTERVAL_SECONDS},
+        },
+    },
+    # A worker consuming several queues (the interactive worker also takes refresh)
+    # drains them in -Q order, and higher-priority messages first within each queue.
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+    },
+    # Workers take one task at a time so a long backfill batch never sits prefetched
+    # behind an idle slot; backfill workers raise this on the command line.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+)
+
+
+@worker_process_init.connect
+def _start_async_runtime(**kwargs):
+    from .async_runtime import start_runtime
+    start_runtime()
+
+
+@task_prerun.connect
+def _record_queue_wait(task=None, **kwargs):
+    request = task.request
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None) or (request.headers or {}).get(ENQUEUED_AT_HEADER)
+    record_queue_wait((request.delivery_info or {}).get("routing_key"), enqueued_at)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_async_runtime(**kwargs):
+    from .async_runtime import shutdown_runtime
+    shutdown_runtime()
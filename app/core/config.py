@@ -23,6 +23,70 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
     EXTERNAL_SEARCH_API_BASE_URL: str | None = os.getenv("EXTERNAL_SEARCH_API_BASE_URL")
+    # Per-source request quotas as "source=requests_per_second,..."; sources not listed use the default rate.
+    EXTERNAL_API_RATE_LIMITS: str = os.getenv("EXTERNAL_API_RATE_LIMITS", "openlib=1.0,google=1.0")
+    EXTERNAL_API_DEFAULT_RATE: float = float(os.getenv("EXTERNAL_API_DEFAULT_RATE", "1.0"))
+    EXTERNAL_API_BURST: int = int(os.getenv("EXTERNAL_API_BURST", "2"))
+
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    EXTERNAL_API_MIN_TIMEOUT: float = float(os.getenv("EXTERNAL_API_MIN_TIMEOUT", "5"))
+    EXTERNAL_API_MAX_TIMEOUT: float = float(os.getenv("EXTERNAL_API_MAX_TIMEOUT", "60"))
+    EXTERNAL_API_MAX_RETRIES: int = int(os.getenv("EXTERNAL_API_MAX_RETRIES", "2"))
+    EXTERNAL_API_RETRY_BACKOFF: float = float(os.getenv("EXTERNAL_API_RETRY_BACKOFF", "1.0"))
+    # Retries allowed per minute and source, as a share of requests made (with a small floor).
+    EXTERNAL_API_RETRY_BUDGET_RATIO: float = float(os.getenv("EXTERNAL_API_RETRY_BUDGET_RATIO", "0.2"))
+    EXTERNAL_API_RETRY_BUDGET_MIN: int = int(os.getenv("EXTERNAL_API_RETRY_BUDGET_MIN", "3"))
+
+    EXTERNAL_CACHE_ENABLED: bool = os.getenv("EXTERNAL_CACHE_ENABLED", "true").lower() == "true"
+    EXTERNAL_CACHE_TTL_SECONDS: int = int(os.getenv("EXTERNAL_CACHE_TTL_SECONDS", "3600"))
+    EXTERNAL_CACHE_NEGATIVE_TTL_SECONDS: int = int(os.getenv("EXTERNAL_CACHE_NEGATIVE_TTL_SECONDS", "300"))
+    # How long entries are kept past freshness so they can be revalidated with ETag/Last-Modified.
+    EXTERNAL_CACHE_RETENTION_SECONDS: int = int(os.getenv("EXTERNAL_CACHE_RETENTION_SECONDS", "86400"))
+
+    BOOK_DEDUP_SIMILARITY: float = float(os.getenv("BOOK_DEDUP_SIMILARITY", "0.6"))
+    NAME_ID_CACHE_SIZE: int = int(os.getenv("NAME_ID_CACHE_SIZE", "10000"))
+
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/2")
+
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+    SEARCH_CACHE_STALE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_STALE_TTL_SECONDS", "300"))
+
+    # "auto" fails over from Elasticsearch to Postgres full-text search; "elasticsearch" or "postgres" pin one.
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "auto")
+    SEARCH_ES_TIMEOUT_SECONDS: float = float(os.getenv("SEARCH_ES_TIMEOUT_SECONDS", "3"))
+    SEARCH_FAILOVER_ERROR_RATE: float = float(os.getenv("SEARCH_FAILOVER_ERROR_RATE", "0.5"))
+    SEARCH_FAILOVER_P95_SECONDS: float = float(os.getenv("SEARCH_FAILOVER_P95_SECONDS", "1.5"))
+    SEARCH_FAILOVER_COOLDOWN_SECONDS: float = float(os.getenv("SEARCH_FAILOVER_COOLDOWN_SECONDS", "30"))
+
+    SCRAPE_INFLIGHT_TTL_SECONDS: int = int(os.getenv("SCRAPE_INFLIGHT_TTL_SECONDS", "600"))
+    SCRAPE_FRESHNESS_TTL_SECONDS: int = int(os.getenv("SCRAPE_FRESHNESS_TTL_SECONDS", "900"))
+
+    REFRESH_INTERVAL_SECONDS: int = int(os.getenv("REFRESH_INTERVAL_SECONDS", "300"))
+    REFRESH_CALL_BUDGET_PER_HOUR: int = int(os.getenv("REFRESH_CALL_BUDGET_PER_HOUR", "240"))
+    REFRESH_MIN_AGE_HOURS: float = float(os.getenv("REFRESH_MIN_AGE_HOURS", "24"))
+    REFRESH_POPULAR_SHARE: float = float(os.getenv("REFRESH_POPULAR_SHARE", "0.5"))
+
+    TASK_EVENTS_TTL_SECONDS: int = int(os.getenv("TASK_EVENTS_TTL_SECONDS", "3600"))
+    TASK_EVENTS_REPLAY_SIZE: int = int(os.getenv("TASK_EVENTS_REPLAY_SIZE", "200"))
+    TASK_EVENTS_STREAM_TIMEOUT_SECONDS: int = int(os.getenv("TASK_EVENTS_STREAM_TIMEOUT_SECONDS", "900"))
+    TASK_EVENTS_INDEX_WAIT_SECONDS: float = float(os.getenv("TASK_EVENTS_INDEX_WAIT_SECONDS", "30"))
+
+    OUTBOX_RELAY_BATCH_SIZE: int = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", "500"))
+    OUTBOX_RELAY_POLL_SECONDS: float = float(os.getenv("OUTBOX_RELAY_POLL_SECONDS", "1.0"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+    BOOK_CACHE_ENABLED: bool = os.getenv("BOOK_CACHE_ENABLED", "true").lower() == "true"
+    BOOK_CACHE_TTL_SECONDS: int = int(os.getenv("BOOK_CACHE_TTL_SECONDS", "3600"))
+    BOOK_CACHE_LOCAL_SIZE: int = int(os.getenv("BOOK_CACHE_LOCAL_SIZE", "5000"))
+    BOOK_CACHE_LOCAL_TTL_SECONDS: float = float(os.getenv("BOOK_CACHE_LOCAL_TTL_SECONDS", "60"))
+    # "db" or "es"; only switch to "es" once the index has been rebuilt with the detail fields.
+    BOOK_DETAIL_SOURCE: str = os.getenv("BOOK_DETAIL_SOURCE", "db")
+
+    GENRE_SNAPSHOT_TTL_SECONDS: float = float(os.getenv("GENRE_SNAPSHOT_TTL_SECONDS", "300"))
 
     class Config:
         case_sensitive = True
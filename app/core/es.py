@@ -1,6 +1,77 @@
 from elasticsearch import AsyncElasticsearch
 from .config import settings
 from functools import lru_cache
+from typing import List, Optional, Tuple
+import re
+import time
+
+# Bump whenever BOOKS_INDEX_MAPPING or BOOKS_INDEX_SETTINGS change in a way that
+# needs a rebuild, then run scripts/reindex_es.py to swap the alias to the new index.
+BOOKS_INDEX_VERSION = 2
+# The books index from before versioning (a concrete index named like the alias).
+LEGACY_INDEX_VERSION = 1
+# How long a process trusts the version it last saw behind the alias.
+LIVE_VERSION_TTL_SECONDS = 60
+
+BOOKS_INDEX_SETTINGS: dict = {
+    "analysis": {
+        "normalizer": {
+            "lowercase_ascii": {"type": "custom", "filter": ["lowercase", "asciifolding"]}
+        }
+    }
+}
+
+NORMALIZED_KEYWORD = {"type": "keyword", "normalizer": "lowercase_ascii", "ignore_above": 256}
+# Stored only so the book detail view can be served from _source.
+STORED_ONLY_KEYWORD = {"type": "keyword", "index": False, "doc_values": False}
+
+BOOKS_INDEX_MAPPING = {
+    "properties": {
+        "id": {"type": "keyword"},
+        "title": {"type": "text", "analyzer": "standard"},
+        "title_sort": {"type": "keyword"},
+        "year_published": {"type": "integer"},
+        "summary": {"type": "text", "analyzer": "standard"},
+        "age_rating": {"type": "keyword", "fields": {"normalized": NORMALIZED_KEYWORD}},
+        "language": {"type": "keyword", "fields": {"normalized": NORMALIZED_KEYWORD}},
+        "book_size_pages": {"type": "integer"},
+        "average_rating": {"type": "float"},
+        "isbn_13": {"type": "keyword"},
+        "isbn_10": {"type": "keyword"},
+        "book_size_description": STORED_ONLY_KEYWORD,
+        "source_url": STORED_ONLY_KEYWORD,
+        "rating_details": {"type": "object", "enabled": False},
+        "authors": {
+            "type": "nested",
+            "properties": {
+                "id": {"type": "keyword"},
+                "name": {
+                    "type": "text",
+                    "fields": {
+                        "keyword": {"type": "keyword", "ignore_above": 256},
+                        "normalized": NORMALIZED_KEYWORD
+                    }
+                }
+            }
+        },
+        "genres": {
+            "type": "nested",
+            "properties": {
+                "id": {"type": "keyword"},
+                "name": {
+                    "type": "text",
+                    "fields": {
+                        "keyword": {"type": "keyword", "ignore_above": 256},
+                        "normalized": NORMALIZED_KEYWORD
+                    }
+                }
+            }
+        },
+        "search_text": {"type": "text", "analyzer": "standard"},
+        "title_suggest": {"type": "completion"},
+        "author_suggest": {"type": "completion"}
+    }
+}
 
 @lru_cache()
 def get_es_client() -> AsyncElasticsearch:
@@ -16,6 +87,74 @@ async def close_es_client():
     client = get_es_client()
     await client.close()
 
+def versioned_index_name(version: int) -> str:
+    return f"{settings.ELASTICSEARCH_INDEX_NAME}_v{version}"
+
+def parse_index_version(index_name: str) -> Optional[int]:
+    match = re.fullmatch(re.escape(settings.ELASTICSEARCH_INDEX_NAME) + r"_v(\d+)", index_name)
+    return int(match.group(1)) if match else None
+
+async def get_alias_targets(client: AsyncElasticsearch) -> List[str]:
+    """Returns the physical indices currently behind the books alias."""
+    alias = settings.ELASTICSEARCH_INDEX_NAME
+    if not await client.indices.exists_alias(name=alias):
+        return []
+    response = await client.indices.get_alias(name=alias)
+    return list(response.keys())
+
+_live_version: Optional[Tuple[int, float]] = None
+
+async def get_live_index_version(client: AsyncElasticsearch) -> int:
+    """
+    Version of the index currently serving the books alias, cached for
+    LIVE_VERSION_TTL_SECONDS so a reindex is picked up without a restart. A concrete
+    legacy index or an unversioned target counts as LEGACY_INDEX_VERSION.
+    """
+    global _live_version
+    if _live_version is not None and time.monotonic() - _live_version[1] < LIVE_VERSION_TTL_SECONDS:
+        return _live_version[0]
+    try:
+        targets = await get_alias_targets(client)
+        if targets:
+            versions = [parse_index_version(t) for t in targets]
+            version = min(v if v is not None else LEGACY_INDEX_VERSION for v in versions)
+        elif await client.indices.exists(index=settings.ELASTICSEARCH_INDEX_NAME):
+            version = LEGACY_INDEX_VERSION
+        else:
+            version = BOOKS_INDEX_VERSION
+    except Exception as e:
+        print(f"Error reading the live index version, assuming {BOOKS_INDEX_VERSION}: {e}")
+        return _live_version[0] if _live_version is not None else BOOKS_INDEX_VERSION
+    _live_version = (version, time.monotonic())
+    return version
+
+async def create_versioned_index(client: AsyncElasticsearch, index_name: str, bulk_load: bool = False, alias: bool = False):
+    """
+    Creates a physical books index. With bulk_load, replicas and refresh are disabled
+    until the caller restores them; with alias, the books alias points at it right away.
+    """
+    index_settings = dict(BOOKS_INDEX_SETTINGS)
+    if bulk_load:
+        index_settings.update({"number_of_replicas": 0, "refresh_interval": "-1"})
+    await client.indices.create(
+        index=index_name,
+        mappings=BOOKS_INDEX_MAPPING,
+        settings=index_settings or None,
+        aliases={settings.ELASTICSEARCH_INDEX_NAME: {}} if alias else None
+    )
+
+async def swap_alias(client: AsyncElasticsearch, new_index: str, old_indices: List[str], remove_legacy_index: bool = False):
+    """
+    Atomically points the books alias at new_index. With remove_legacy_index, a concrete
+    index that still owns the alias name is dropped in the same request.
+    """
+    alias = settings.ELASTICSEARCH_INDEX_NAME
+    actions = [{"remove": {"index": old, "alias": alias}} for old in old_indices]
+    if remove_legacy_index:
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias}})
+    await client.indices.update_aliases(actions=actions)
+
 async def check_and_create_es_index():
     client = get_es_client()
     index_name = settings.ELASTICSEARCH_INDEX_NAME
@@ -23,41 +162,26 @@ async def check_and_create_es_index():
         if not await client.ping():
             raise ConnectionError("Elasticsearch connection failed")
 
-        if not await client.indices.exists(index=index_name):
-            print(f"Creating Elasticsearch index: {index_name}")
-            mapping = {
-                "properties": {
-                    "id": {"type": "keyword"},
-                    "title": {"type": "text", "analyzer": "standard"},
-                    "title_sort": {"type": "keyword"},
-                    "year_published": {"type": "integer"},
-                    "summary": {"type": "text", "analyzer": "standard"},
-                    "age_rating": {"type": "keyword"},
-                    "language": {"type": "keyword"},
-                    "book_size_pages": {"type": "integer"},
-                    "average_rating": {"type": "float"},
-                    "isbn_13": {"type": "keyword"},
-                    "authors": {
-                        "type": "nested",
-                        "properties": {
-                            "id": {"type": "keyword"},
-                            "name": {"type": "text"}
-                        }
-                    },
-                    "genres": {
-                        "type": "nested", 
-                        "properties": {
-                            "id": {"type": "keyword"},
-                            "name": {"type": "text"}
-                        }
-                    },
-                    "search_text": {"type": "text", "analyzer": "standard"}
-                }
-            }
-            await client.indices.create(index=index_name, mappings=mapping)
-            print(f"Index {index_name} created.")
+        if await client.indices.exists_alias(name=index_name):
+            targets = await get_alias_targets(client)
+            print(f"Elasticsearch alias {index_name} points to {targets}.")
+            versions = [v for v in (parse_index_version(t) for t in targets) if v is not None]
+            if versions and max(versions) < BOOKS_INDEX_VERSION:
+                print(f"WARNING: index version {max(versions)} is older than {BOOKS_INDEX_VERSION}; "
+                      f"run scripts/reindex_es.py to rebuild it. Filters use the legacy fields until then.")
+            else:
+                # Additive mapping changes (new fields and sub-fields) can be applied in place;
+                # documents indexed before the change pick them up when they are re-indexed.
+                await client.indices.put_mapping(index=index_name, properties=BOOKS_INDEX_MAPPING["properties"])
+        elif await client.indices.exists(index=index_name):
+            print(f"WARNING: {index_name} is a concrete index, not an alias; "
+                  f"run scripts/reindex_es.py to move it behind a versioned index. "
+                  f"Filters use the legacy fields until then.")
         else:
-             print(f"Elasticsearch index {index_name} already exists.")
+            physical_name = versioned_index_name(BOOKS_INDEX_VERSION)
+            print(f"Creating Elasticsearch index {physical_name} behind alias {index_name}")
+            await create_versioned_index(client, physical_name, alias=True)
+            print(f"Index {physical_name} created.")
 
     except Exception as e:
-        print(f"Error connecting to or setting up Elasticsearch: {e}")
\ No newline at end of file
+        print(f"Error connecting to or setting up Elasticsearch: {e}")
@@ -0,0 +1,17 @@
+import httpx
+from .config import settings
+from functools import lru_cache
+
+@lru_cache()
+def get_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.EXTERNAL_API_MAX_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS
+        )
+    )
+
+async def close_http_client():
+    client = get_http_client()
+    await client.aclose()
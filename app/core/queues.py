@@ -0,0 +1,88 @@
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from .config import settings
+from .redis import get_redis_client, get_sync_redis_client
+
+INTERACTIVE_QUEUE = "interactive"
+REFRESH_QUEUE = "refresh"
+BACKFILL_QUEUE = "backfill"
+QUEUES = [INTERACTIVE_QUEUE, REFRESH_QUEUE, BACKFILL_QUEUE]
+
+# The Redis transport treats 0 as the highest priority.
+QUEUE_PRIORITIES = {INTERACTIVE_QUEUE: 0, REFRESH_QUEUE: 5, BACKFILL_QUEUE: 9}
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+
+ENQUEUED_AT_HEADER = "enqueued_at"
+METRICS_KEY_PREFIX = "queue_metrics:"
+WAIT_SAMPLES = 500
+
+
+def queue_options(queue: str, countdown: Optional[float] = None) -> Dict[str, Any]:
+    """
+    send_task/apply_async options routing a task to queue, stamped with its enqueue time.
+    Delayed tasks are stamped with the time they become due, so the countdown is not counted as waiting.
+    """
+    return {
+        "queue": queue,
+        "priority": QUEUE_PRIORITIES[queue],
+        "countdown": countdown,
+        "headers": {ENQUEUED_AT_HEADER: time.time() + (countdown or 0)},
+    }
+
+
+def record_queue_wait(queue: Optional[str], enqueued_at: Optional[float]):
+    """Stores how long a task waited in its queue. Runs in worker threads, so it uses the blocking client."""
+    if not queue or not enqueued_at:
+        return
+    prefix = f"{METRICS_KEY_PREFIX}{queue}"
+    try:
+        pipe = get_sync_redis_client().pipeline(transaction=False)
+        pipe.lpush(f"{prefix}:wait", round(max(0.0, time.time() - float(enqueued_at)), 3))
+        pipe.ltrim(f"{prefix}:wait", 0, WAIT_SAMPLES - 1)
+        pipe.incr(f"{prefix}:started")
+        pipe.execute()
+    except Exception as e:
+        print(f"Error recording wait time for queue {queue}: {e}")
+
+
+@lru_cache()
+def _get_broker_client() -> redis.Redis:
+    return redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def get_queue_stats() -> Dict[str, Any]:
+    """Depth of each queue (all priority sub-lists) and the wait time of recently started tasks."""
+    broker = _get_broker_client()
+    app_redis = get_redis_client()
+    stats = {}
+    for queue in QUEUES:
+        lists = [queue] + [f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS if step]
+        async with broker.pipeline(transaction=False) as pipe:
+            for name in lists:
+                pipe.llen(name)
+            depths = await pipe.execute()
+
+        prefix = f"{METRICS_KEY_PREFIX}{queue}"
+        samples = [float(s) for s in await app_redis.lrange(f"{prefix}:wait", 0, -1)]
+        started = int(await app_redis.get(f"{prefix}:started") or 0)
+        stats[queue] = {
+            "depth": sum(depths),
+            "started": started,
+            "wait_samples": len(samples),
+            "wait_p50_seconds": _percentile(samples, 0.5),
+            "wait_p95_seconds": _percentile(samples, 0.95),
+            "wait_max_seconds": max(samples) if samples else None,
+        }
+    return stats
@@ -0,0 +1,18 @@
+import redis.asyncio as redis
+import redis as sync_redis
+from .config import settings
+from functools import lru_cache
+
+@lru_cache()
+def get_redis_client() -> redis.Redis:
+    return redis.from_url(settings.REDIS_URL)
+
+async def close_redis_client():
+    client = get_redis_client()
+    await client.aclose()
+
+
+@lru_cache()
+def get_sync_redis_client() -> sync_redis.Redis:
+    """Blocking client for code that runs outside an event loop, such as Celery signal handlers."""
+    return sync_redis.from_url(settings.REDIS_URL)
@@ -2,9 +2,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from app.models.author import Author
+from app.models.association import book_authors_association
 from app.schemas.author import AuthorCreate
+from app.core.config import settings
+from app.core.lru import LRUCache
+from .name_ids import get_or_create_name_ids
+from .name_listing import count_books, list_by_name
 import uuid
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+author_id_cache = LRUCache(maxsize=settings.NAME_ID_CACHE_SIZE)
 
 async def get_author(db: AsyncSession, author_id: uuid.UUID) -> Optional[Author]:
     result = await db.execute(select(Author).where(Author.id == author_id))
@@ -15,17 +22,22 @@ async def get_author_by_name(db: AsyncSession, name: str) -> Optional[Author]:
     return result.scalars().first()
 
 async def get_or_create_author(db: AsyncSession, name: str) -> Author:
-    author = await get_author_by_name(db, name)
-    if not author:
-        author = Author(name=name)
-        db.add(author)
-        await db.flush()
-        await db.refresh(author)
-    return author
-
-async def get_authors(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Author]:
-    result = await db.execute(select(Author).offset(skip).limit(limit))
-    return result.scalars().all()
+    ids = await get_or_create_author_ids(db, [name])
+    return await get_author(db, ids[name])
+
+async def get_or_create_author_ids(db: AsyncSession, names: Iterable[str]) -> Dict[str, uuid.UUID]:
+    return await get_or_create_name_ids(db, Author, names, author_id_cache)
+
+async def get_authors(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None
+) -> Tuple[List[Author], Optional[str]]:
+    return await list_by_name(db, Author, limit, cursor=cursor, prefix=prefix)
+
+async def count_author_books(db: AsyncSession, author_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, int]:
+    return await count_books(db, book_authors_association.c.author_id, author_ids)
 
 async def create_author(db: AsyncSession, author: AuthorCreate) -> Author:
     db_author = Author(name=author.name)
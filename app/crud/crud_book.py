@@ -1,14 +1,37 @@
+import re
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
-from app.models.book import Book
+from app.models.book import Book, book_authors_association, book_genres_association
 from app.models.author import Author
 from app.models.genre import Genre
 from app.schemas.book import BookCreate, BookUpdate
-from .crud_author import get_author, get_or_create_author
-from .crud_genre import get_genre, get_or_create_genre
+from app.core.config import settings
+from app.utils.isbn import normalize_isbns
+from .crud_author import get_author, get_or_create_author_ids
+from .crud_genre import get_genre, get_or_create_genre_ids
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+BOOK_RELATION_FIELDS = {'author_ids', 'genre_ids', 'author_names', 'genre_names'}
+# Nearest titles considered per incoming book before the author and year checks.
+SIMILAR_TITLE_CANDIDATES = 5
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+SIMILAR_TITLES_SQL = text("""
+    SELECT v.idx, b.id, b.year_published, b.isbn_13, similarity(normalize_title(b.title), normalize_title(v.title)) AS score
+    FROM unnest(CAST(:idxs AS integer[]), CAST(:titles AS text[])) AS v(idx, title)
+    CROSS JOIN LATERAL (
+        SELECT id, title, year_published, isbn_13 FROM books
+        WHERE normalize_title(books.title) % normalize_title(v.title)
+        ORDER BY normalize_title(books.title) <-> normalize_title(v.title)
+        LIMIT :per_title
+    ) b
+""")
 
 def _get_book_query_with_relationships():
     return select(Book).options(
@@ -30,29 +53,273 @@ async def get_book_by_isbn13(db: AsyncSession, isbn13: str) -> Optional[Book]:
     return result.scalars().first()
 
 async def find_existing_book(db: AsyncSession, book_data: BookCreate) -> Optional[Book]:
-    if book_data.isbn_13:
-        existing = await get_book_by_isbn13(db, book_data.isbn_13)
-        if existing:
-            return existing
-
-    if book_data.title and book_data.author_names:
-         first_author_name = book_data.author_names[0]
-         stmt = _get_book_query_with_relationships().join(Book.authors).where(
-             Book.title == book_data.title,
-             Author.name == first_author_name
-         )
-         if book_data.year_published:
-             stmt = stmt.where(Book.year_published.between(
-                 book_data.year_published - 1, book_data.year_published + 1)
-             )
-         result = await db.execute(stmt)
-         return result.scalars().first()
-
-    return None
+    match = (await _match_existing_books(db, [normalize_book_isbns(book_data)]))[0]
+    return await get_book(db, match) if match else None
+
+
+def normalize_book_isbns(book: BookCreate) -> BookCreate:
+    """Returns the book with hyphen-free ISBNs, each derived from the other when missing."""
+    isbn_10, isbn_13 = normalize_isbns(book.isbn_10, book.isbn_13)
+    if (isbn_10, isbn_13) == (book.isbn_10, book.isbn_13):
+        return book
+    return book.model_copy(update={"isbn_10": isbn_10, "isbn_13": isbn_13})
+
+
+def normalize_person_name(name: str) -> str:
+    return " ".join(_NON_ALNUM.sub(" ", name.lower()).split())
+
+
+def _years_compatible(a: Optional[int], b: Optional[int]) -> bool:
+    return a is None or b is None or abs(a - b) <= 1
+
+
+def _isbn13s_compatible(incoming: Optional[str], stored: Optional[str]) -> bool:
+    """A title-only match is rejected when both sides carry different ISBN-13s: they are different editions."""
+    if not incoming or not stored:
+        return True
+    return incoming == (normalize_isbns(None, stored)[1] or stored)
+
+
+async def _match_similar_books(db: AsyncSession, books: List[BookCreate]) -> List[Optional[uuid.UUID]]:
+    """
+    Fuzzy fallback for books without an exact match: candidates come from the trigram
+    index on normalize_title(title) above BOOK_DEDUP_SIMILARITY, and are accepted only
+    when they share at least one author, their years are within one of each other and
+    they do not carry different ISBN-13s.
+    """
+    indexed = [(i, b) for i, b in enumerate(books) if b.author_names]
+    matches: List[Optional[uuid.UUID]] = [None] * len(books)
+    if not indexed:
+        return matches
+
+    await db.execute(
+        select(func.set_config("pg_trgm.similarity_threshold", str(settings.BOOK_DEDUP_SIMILARITY), True))
+    )
+    rows = (await db.execute(SIMILAR_TITLES_SQL, {
+        "idxs": [i for i, _ in indexed],
+        "titles": [b.title for _, b in indexed],
+        "per_title": SIMILAR_TITLE_CANDIDATES,
+    })).all()
+    if not rows:
+        return matches
+
+    candidate_authors: Dict[uuid.UUID, Set[str]] = {}
+    author_rows = await db.execute(
+        select(book_authors_association.c.book_id, Author.name)
+        .join(Author, Author.id == book_authors_association.c.author_id)
+        .where(book_authors_association.c.book_id.in_({row.id for row in rows}))
+    )
+    for book_id, name in author_rows.all():
+        candidate_authors.setdefault(book_id, set()).add(normalize_person_name(name))
+
+    for row in sorted(rows, key=lambda r: r.score, reverse=True):
+        book = books[row.idx]
+        if matches[row.idx] is not None or not _years_compatible(book.year_published, row.year_published):
+            continue
+        if not _isbn13s_compatible(book.isbn_13, row.isbn_13):
+            continue
+        incoming_authors = {normalize_person_name(n) for n in book.author_names}
+        if incoming_authors & candidate_authors.get(row.id, set()):
+            matches[row.idx] = row.id
+    return matches
+
+
+def book_identity_key(book: BookCreate) -> Tuple:
+    """Key under which two incoming books are considered the same book."""
+    if book.isbn_13:
+        return ("isbn", book.isbn_13)
+    first_author = book.author_names[0] if book.author_names else None
+    return ("title", book.title, first_author, book.year_published)
+
+
+async def _match_existing_books(db: AsyncSession, books: List[BookCreate]) -> List[Optional[uuid.UUID]]:
+    """
+    Resolves which books of a batch (with normalized ISBNs) already exist: an isbn_13 or
+    isbn_10 match first, then the exact title plus the first author with the year within
+    one, then a similar title sharing an author. Title matches never pair two different
+    ISBN-13s. One query fetches every exact candidate; the year window is checked here.
+    Books still unmatched go through one trigram query.
+    """
+    isbn13s = {b.isbn_13 for b in books if b.isbn_13}
+    isbn10s = {b.isbn_10 for b in books if b.isbn_10}
+    titles = {b.title for b in books if b.author_names}
+    first_authors = {b.author_names[0] for b in books if b.author_names}
+
+    conditions = []
+    if isbn13s:
+        conditions.append(Book.isbn_13.in_(isbn13s))
+    if isbn10s:
+        conditions.append(Book.isbn_10.in_(isbn10s))
+    if titles:
+        conditions.append(and_(Book.title.in_(titles), Author.name.in_(first_authors)))
+    if not conditions:
+        return [None] * len(books)
+
+    rows = (await db.execute(
+        select(Book.id, Book.isbn_13, Book.isbn_10, Book.title, Book.year_published, Author.name)
+        .outerjoin(Book.authors)
+        .where(or_(*conditions))
+    )).all()
+
+    by_isbn13: Dict[str, uuid.UUID] = {}
+    by_isbn10: Dict[str, uuid.UUID] = {}
+    by_title_author: Dict[Tuple[str, str], List[Tuple[uuid.UUID, Optional[int], Optional[str]]]] = {}
+    for book_id, isbn_13, isbn_10, title, year, author_name in rows:
+        if isbn_13:
+            by_isbn13[isbn_13] = book_id
+        if isbn_10:
+            by_isbn10[isbn_10] = book_id
+        if author_name is not None:
+            by_title_author.setdefault((title, author_name), []).append((book_id, year, isbn_13))
+
+    matches: List[Optional[uuid.UUID]] = []
+    for book in books:
+        match = by_isbn13.get(book.isbn_13) if book.isbn_13 else None
+        if match is None and book.isbn_10:
+            match = by_isbn10.get(book.isbn_10)
+        if match is None and book.author_names:
+            for book_id, year, isbn_13 in by_title_author.get((book.title, book.author_names[0]), []):
+                if not _isbn13s_compatible(book.isbn_13, isbn_13):
+                    continue
+                if not book.year_published or (year is not None and abs(year - book.year_published) <= 1):
+                    match = book_id
+                    break
+        matches.append(match)
+
+    unmatched = [i for i, match in enumerate(matches) if match is None]
+    if unmatched:
+        similar = await _match_similar_books(db, [books[i] for i in unmatched])
+        for i, match in zip(unmatched, similar):
+            matches[i] = match
+    return matches
+
+
+def _book_upsert(rows: List[Dict], conflict_column):
+    """INSERT ... ON CONFLICT (conflict_column) DO UPDATE keeping stored values for missing fields."""
+    stmt = pg_insert(Book).values(rows)
+    columns = [c for c in rows[0].keys() if c != "id"]
+    return stmt.on_conflict_do_update(
+        index_elements=[conflict_column],
+        set_={
+            **{c: func.coalesce(stmt.excluded[c], Book.__table__.c[c]) for c in columns},
+            "updated_at": func.now(),
+        }
+    ).returning(Book.id, Book.isbn_13)
+
+
+async def _write_book_rows(db: AsyncSession, rows: List[Dict], conflict_column) -> Dict[uuid.UUID, uuid.UUID]:
+    """
+    Upserts rows in one statement inside a savepoint and maps each proposed id to the id
+    actually written. If the statement hits another unique constraint (an isbn_13 taken
+    by a concurrent writer), the rows are retried one by one so only the conflicting
+    book is skipped instead of the whole chunk.
+    """
+    if not rows:
+        return {}
+    written: Dict[uuid.UUID, uuid.UUID] = {}
+    try:
+        async with db.begin_nested():
+            returned = (await db.execute(_book_upsert(rows, conflict_column))).all()
+    except IntegrityError:
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    book_id, _ = (await db.execute(_book_upsert([row], conflict_column))).one()
+                written[row["id"]] = book_id
+            except IntegrityError as e:
+                print(f"Skipping book '{row.get('title')}' ({row.get('isbn_13')}): {e.orig}")
+        return written
+
+    if conflict_column is Book.id:
+        returned_ids = {book_id for book_id, _ in returned}
+        return {row["id"]: row["id"] for row in rows if row["id"] in returned_ids}
+    by_isbn = {isbn_13: book_id for book_id, isbn_13 in returned}
+    return {row["id"]: by_isbn[row["isbn_13"]] for row in rows if row["isbn_13"] in by_isbn}
+
+
+async def bulk_upsert_books(db: AsyncSession, books: List[BookCreate]) -> Tuple[List[Book], Set[uuid.UUID]]:
+    """
+    Creates or updates a batch of books in a handful of statements instead of several
+    round trips per book. Existing books are matched for the whole batch in one query
+    and written through INSERT ... ON CONFLICT (id) DO UPDATE; new books with an ISBN-13
+    use ON CONFLICT (isbn_13) so a concurrent insert of the same edition becomes an update.
+    Fields missing from the incoming data keep their stored values. Rows, names and links
+    are written in key order so concurrent chunks take their locks in the same order.
+    Authors and genres are linked for new books only, as update_book leaves them
+    untouched for names. Returns the written books with relationships loaded and the
+    ids that were created.
+    """
+    unique: Dict[Tuple, BookCreate] = {}
+    for book in books:
+        book = normalize_book_isbns(book)
+        unique.setdefault(book_identity_key(book), book)
+    candidates = list(unique.values())
+    if not candidates:
+        return [], set()
+
+    matches = await _match_existing_books(db, candidates)
+
+    rows: Dict[uuid.UUID, Dict] = {}
+    new_books: Dict[uuid.UUID, BookCreate] = {}
+    for book, existing_id in zip(candidates, matches):
+        book_id = existing_id or uuid.uuid4()
+        if book_id in rows:
+            continue
+        rows[book_id] = {"id": book_id, **book.model_dump(exclude=BOOK_RELATION_FIELDS)}
+        if existing_id is None:
+            new_books[book_id] = book
+
+    by_id_rows = sorted(
+        (row for book_id, row in rows.items() if book_id not in new_books or not row["isbn_13"]),
+        key=lambda row: row["id"]
+    )
+    by_isbn_rows = sorted(
+        (row for book_id, row in rows.items() if book_id in new_books and row["isbn_13"]),
+        key=lambda row: row["isbn_13"]
+    )
+    written = await _write_book_rows(db, by_id_rows, Book.id)
+    written.update(await _write_book_rows(db, by_isbn_rows, Book.isbn_13))
+
+    # A new book whose isbn_13 was inserted concurrently was written onto that row;
+    # its creator links the authors and genres.
+    new_books = {book_id: book for book_id, book in new_books.items() if written.get(book_id) == book_id}
+
+    author_ids = await get_or_create_author_ids(
+        db, {n for b in new_books.values() if not b.author_ids for n in b.author_names or []}
+    )
+    genre_ids = await get_or_create_genre_ids(
+        db, {n for b in new_books.values() if not b.genre_ids for n in b.genre_names or []}
+    )
+
+    book_author_rows = set()
+    book_genre_rows = set()
+    for book_id, book in new_books.items():
+        for author_id in book.author_ids or [author_ids[n] for n in book.author_names or [] if n]:
+            book_author_rows.add((book_id, author_id))
+        for genre_id in book.genre_ids or [genre_ids[n] for n in book.genre_names or [] if n]:
+            book_genre_rows.add((book_id, genre_id))
+    if book_author_rows:
+        await db.execute(pg_insert(book_authors_association).values([
+            {"book_id": book_id, "author_id": author_id} for book_id, author_id in sorted(book_author_rows)
+        ]).on_conflict_do_nothing())
+    if book_genre_rows:
+        await db.execute(pg_insert(book_genres_association).values([
+            {"book_id": book_id, "genre_id": genre_id} for book_id, genre_id in sorted(book_genre_rows)
+        ]).on_conflict_do_nothing())
+
+    written_ids = set(written.values())
+    if not written_ids:
+        return [], set()
+    result = await db.execute(
+        _get_book_query_with_relationships()
+        .where(Book.id.in_(written_ids))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all(), set(new_books.keys())
 
 
 async def create_book(db: AsyncSession, book: BookCreate) -> Book:
-    db_book = Book(**book.model_dump(exclude={'author_ids', 'genre_ids', 'author_names', 'genre_names'}))
+    db_book = Book(**book.model_dump(exclude=BOOK_RELATION_FIELDS))
 
     db_book.authors = []
     if book.author_ids:
@@ -61,9 +328,10 @@ async def create_book(db: AsyncSession, book: BookCreate) -> Book:
             if author:
                 db_book.authors.append(author)
     elif book.author_names:
-        for name in book.author_names:
-            author = await get_or_create_author(db, name)
-            db_book.authors.append(author)
+        author_ids = await get_or_create_author_ids(db, book.author_names)
+        authors = (await db.execute(select(Author).where(Author.id.in_(author_ids.values())))).scalars().all()
+        authors_by_id = {author.id: author for author in authors}
+        db_book.authors = [authors_by_id[author_ids[name]] for name in dict.fromkeys(book.author_names) if name]
 
     db_book.genres = []
     if book.genre_ids:
@@ -72,9 +340,10 @@ async def create_book(db: AsyncSession, book: BookCreate) -> Book:
             if genre:
                 db_book.genres.append(genre)
     elif book.genre_names:
-        for name in book.genre_names:
-            genre = await get_or_create_genre(db, name)
-            db_book.genres.append(genre)
+        genre_ids = await get_or_create_genre_ids(db, book.genre_names)
+        genres = (await db.execute(select(Genre).where(Genre.id.in_(genre_ids.values())))).scalars().all()
+        genres_by_id = {genre.id: genre for genre in genres}
+        db_book.genres = [genres_by_id[genre_ids[name]] for name in dict.fromkeys(book.genre_names) if name]
 
     db.add(db_book)
     await db.flush()
@@ -1,9 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.genre import Genre
+from app.models.association import book_genres_association
 from app.schemas.genre import GenreCreate
+from app.core.config import settings
+from app.core.lru import LRUCache
+from .name_ids import get_or_create_name_ids
+from .name_listing import count_books, list_all_by_name
 import uuid
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+genre_id_cache = LRUCache(maxsize=settings.NAME_ID_CACHE_SIZE)
 
 async def get_genre(db: AsyncSession, genre_id: uuid.UUID) -> Optional[Genre]:
     result = await db.execute(select(Genre).where(Genre.id == genre_id))
@@ -14,17 +21,17 @@ async def get_genre_by_name(db: AsyncSession, name: str) -> Optional[Genre]:
     return result.scalars().first()
 
 async def get_or_create_genre(db: AsyncSession, name: str) -> Genre:
-    genre = await get_genre_by_name(db, name)
-    if not genre:
-        genre = Genre(name=name)
-        db.add(genre)
-        await db.flush()
-        await db.refresh(genre)
-    return genre
-
-async def get_genres(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Genre]:
-    result = await db.execute(select(Genre).offset(skip).limit(limit))
-    return result.scalars().all()
+    ids = await get_or_create_genre_ids(db, [name])
+    return await get_genre(db, ids[name])
+
+async def get_or_create_genre_ids(db: AsyncSession, names: Iterable[str]) -> Dict[str, uuid.UUID]:
+    return await get_or_create_name_ids(db, Genre, names, genre_id_cache)
+
+async def get_all_genres(db: AsyncSession) -> List[Tuple[Genre, str]]:
+    return await list_all_by_name(db, Genre)
+
+async def count_genre_books(db: AsyncSession, genre_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, int]:
+    return await count_books(db, book_genres_association.c.genre_id, genre_ids)
 
 async def create_genre(db: AsyncSession, genre: GenreCreate) -> Genre:
     db_genre = Genre(name=genre.name)
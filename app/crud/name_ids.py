@@ -0,0 +1,61 @@
+import uuid
+from typing import Dict, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from app.core.lru import LRUCache
+
+PENDING_CACHE_ENTRIES_KEY = "pending_name_id_cache_entries"
+
+
+async def get_or_create_name_ids(
+    db: AsyncSession,
+    model,
+    names: Iterable[str],
+    cache: LRUCache
+) -> Dict[str, uuid.UUID]:
+    """
+    Maps names of a unique-name model (Author, Genre) to ids, creating the missing rows.
+    Cached names cost nothing; the rest are resolved with one INSERT ... ON CONFLICT DO
+    NOTHING RETURNING, in name order so concurrent batches lock rows in the same order,
+    and one SELECT for names that already existed or were inserted concurrently. New
+    mappings only reach the cache once the session commits, so a rolled back insert
+    never leaves a dangling id behind.
+    """
+    names = {name for name in names if name}
+    ids: Dict[str, uuid.UUID] = cache.get_many(names)
+    missing = names - ids.keys()
+    if not missing:
+        return ids
+
+    inserted = await db.execute(
+        pg_insert(model)
+        .values([{"id": uuid.uuid4(), "name": name} for name in sorted(missing)])
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(model.id, model.name)
+    )
+    resolved = {name: id_ for id_, name in inserted.all()}
+    remaining = missing - resolved.keys()
+    if remaining:
+        existing = await db.execute(select(model.id, model.name).where(model.name.in_(remaining)))
+        resolved.update({name: id_ for id_, name in existing.all()})
+
+    pending = db.info.setdefault(PENDING_CACHE_ENTRIES_KEY, [])
+    pending.append((cache, resolved))
+    ids.update(resolved)
+    return ids
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_pending_cache_entries(session: Session):
+    for cache, entries in session.info.pop(PENDING_CACHE_ENTRIES_KEY, []):
+        cache.set_many(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_cache_entries(session: Session):
+    session.info.pop(PENDING_CACHE_ENTRIES_KEY, None)
@@ -0,0 +1,84 @@
+import base64
+import json
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, func, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+# Case-insensitive byte order, matching the (lower(name) COLLATE "C", id) indexes on
+# authors and genres so both keyset pages and prefix LIKE scans stay on the index.
+NAME_SORT_COLLATION = "C"
+
+
+class InvalidNameCursorError(ValueError):
+    """Raised when a name listing cursor cannot be decoded."""
+
+
+def name_sort_key(model):
+    return func.lower(model.name).collate(NAME_SORT_COLLATION)
+
+
+def encode_name_cursor(sort_name: str, item_id: uuid.UUID) -> str:
+    raw = json.dumps({"name": sort_name, "id": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_name_cursor(cursor: str) -> Tuple[str, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return data["name"], uuid.UUID(data["id"])
+    except Exception:
+        raise InvalidNameCursorError("Malformed pagination cursor")
+
+
+async def list_by_name(
+    db: AsyncSession,
+    model,
+    limit: int,
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset page of a unique-name model (Author, Genre) ordered by lower(name), then id,
+    optionally restricted to names starting with prefix (case-insensitive). Returns the
+    rows and the cursor of the next page, or None on the last page.
+    """
+    sort_key = name_sort_key(model)
+    stmt = select(model, sort_key.label("sort_name")).order_by(sort_key, model.id).limit(limit + 1)
+    if prefix:
+        stmt = stmt.where(sort_key.startswith(prefix.lower(), autoescape=True))
+    if cursor:
+        after_name, after_id = decode_name_cursor(cursor)
+        stmt = stmt.where(tuple_(sort_key, model.id) > tuple_(literal(after_name), literal(after_id)))
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_name_cursor(rows[-1].sort_name, rows[-1][0].id)
+    return [row[0] for row in rows], next_cursor
+
+
+async def list_all_by_name(db: AsyncSession, model) -> List[Tuple[Any, str]]:
+    """Every row of a small unique-name model with its sort key, in listing order."""
+    sort_key = name_sort_key(model)
+    rows = (await db.execute(select(model, sort_key.label("sort_name")).order_by(sort_key, model.id))).all()
+    return [(row[0], row.sort_name) for row in rows]
+
+
+async def count_books(db: AsyncSession, association_column: Column, ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, int]:
+    """Number of books linked to each of the given author or genre ids."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(association_column, func.count())
+        .where(association_column.in_(ids))
+        .group_by(association_column)
+    )
+    counts = {item_id: 0 for item_id in ids}
+    counts.update({item_id: count for item_id, count in result.all()})
+    return counts
@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.api.api_v1.router import api_router
 from app.core.config import settings
 from app.core.db import engine, Base
 from app.core.es import check_and_create_es_index, close_es_client
+from app.core.redis import close_redis_client
+from app.services.book_cache import listen_for_book_invalidations
 
 async def init_db():
     pass
@@ -14,9 +17,17 @@ async def lifespan(app: FastAPI):
     print("Starting up...")
     print("Checking Elasticsearch connection and index...")
     await check_and_create_es_index()
+    book_invalidations = asyncio.create_task(listen_for_book_invalidations())
     yield
     print("Shutting down...")
+    book_invalidations.cancel()
+    try:
+        await book_invalidations
+    except asyncio.CancelledError:
+        pass
     await close_es_client()
+    await close_redis_client()
+    await engine.dispose()
     print("Shutdown complete.")
 
 
@@ -42,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, Index, text
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 from app.models.association import book_authors_association
 
 class Author(Base):
     __tablename__ = "authors"
+    __table_args__ = (
+        Index("ix_authors_name_sort", text('lower(name) COLLATE "C"'), "id"),
+    )
     name = Column(String, unique=True, index=True, nullable=False)
 
     books = relationship(
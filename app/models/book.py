@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Table, ForeignKey, String, Integer, Text, Float
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy import Column, Table, ForeignKey, String, Integer, Text, Float, Index, FetchedValue, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as PG_UUID
 from app.core.db import Base
 from app.models.association import (
     book_authors_association,
@@ -24,6 +24,11 @@ book_genres_association = Table(
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_books_title_trgm", text("normalize_title(title) gin_trgm_ops"), postgresql_using="gin"),
+    )
 
     title = Column(String, index=True, nullable=False)
     year_published = Column(Integer, index=True, nullable=True)
@@ -37,6 +42,9 @@ class Book(Base):
     source_url = Column(String, nullable=True)
     isbn_10 = Column(String(10), index=True, nullable=True)
     isbn_13 = Column(String(13), unique=True, index=True, nullable=True)
+    # Maintained by database triggers (title A, authors B, genres C, summary D); only
+    # read by the Postgres search fallback, so it is never loaded with the book.
+    search_vector = deferred(Column(TSVECTOR, nullable=True, server_default=FetchedValue(), server_onupdate=FetchedValue()))
 
     authors = relationship(
         "Author",
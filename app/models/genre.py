@@ -1,11 +1,14 @@
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, Index, text
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 from app.models.association import book_genres_association
 
 class Genre(Base):
     __tablename__ = "genres"
+    __table_args__ = (
+        Index("ix_genres_name_sort", text('lower(name) COLLATE "C"'), "id"),
+    )
     name = Column(String, unique=True, index=True, nullable=False)
 
     books = relationship(
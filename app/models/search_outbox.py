@@ -0,0 +1,42 @@
+from sqlalchemy import BigInteger, Column, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.core.db import Base
+
+OUTBOX_INDEX = "index"
+OUTBOX_DELETE = "delete"
+
+
+class SearchOutbox(Base):
+    """
+    Pending Elasticsearch work for one book, written by database triggers in the same
+    transaction as the change. The increasing id orders the changes of a book and is
+    used as the external document version when the relay applies them. task_id is the
+    scrape task whose transaction wrote the row, if any.
+    """
+    __tablename__ = "search_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    book_id = Column(PG_UUID(as_uuid=True), index=True, nullable=False)
+    op = Column(String(10), nullable=False)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    task_id = Column(String(64), nullable=True)
+
+    def __repr__(self):
+        return f"<SearchOutbox(id={self.id}, book_id={self.book_id}, op='{self.op}')>"
+
+
+class SearchOutboxDeadLetter(Base):
+    """
+    Outbox rows the relay gave up on after OUTBOX_MAX_ATTEMPTS. Kept until they are
+    re-enqueued (scripts/outbox_relay.py --requeue-dead-letters) or covered by a reindex.
+    """
+    __tablename__ = "search_outbox_dead_letter"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    book_id = Column(PG_UUID(as_uuid=True), index=True, nullable=False)
+    op = Column(String(10), nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<SearchOutboxDeadLetter(id={self.id}, book_id={self.book_id}, op='{self.op}')>"
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 from .common import BaseSchema, UUIDSchema
 
 class AuthorBase(BaseSchema):
@@ -11,4 +12,7 @@ class Author(AuthorBase, UUIDSchema):
     pass
 
 class AuthorPublic(AuthorBase, UUIDSchema):
-    pass
\ No newline at end of file
+    pass
+
+class AuthorListItem(AuthorPublic):
+    book_count: Optional[int] = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Union
 import uuid
 from .common import BaseSchema, UUIDSchema, PaginatedResponse
 from .author import AuthorPublic
@@ -41,13 +41,23 @@ class BookPublic(BookBase, UUIDSchema):
     authors: List[AuthorPublic] = []
     genres: List[GenrePublic] = []
 
+class FacetBucket(BaseModel):
+    key: Union[int, float, str]
+    count: int
+
+class BookSearchPage(PaginatedResponse[BookPublic]):
+    facets: Optional[Dict[str, List[FacetBucket]]] = None
+
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query string (e.g., author, title, description)")
     page: int = Field(1, ge=1)
     page_size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = Field(None, description="Opaque cursor from a previous response; '*' starts cursor pagination and replaces 'page'")
+    exact_total: bool = Field(True, description="Count all matching books exactly; disable for infinite scroll")
 
 class SearchResponse(BaseModel):
     task_id: Optional[str] = None
     message: str
     initial_results: Optional[List[BookPublic]] = None
-    total_hits: Optional[int] = None
\ No newline at end of file
+    total_hits: Optional[int] = None
+    next_cursor: Optional[str] = None
\ No newline at end of file
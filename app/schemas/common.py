@@ -1,14 +1,15 @@
 from pydantic import BaseModel, Field
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Optional
 import uuid
 
 T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
     results: List[T]
-    total_hits: int
-    page: int
+    total_hits: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
+    next_cursor: Optional[str] = None
 
 class BaseSchema(BaseModel):
     class Config:
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 from .common import BaseSchema, UUIDSchema
 
 class GenreBase(BaseSchema):
@@ -11,4 +12,7 @@ class Genre(GenreBase, UUIDSchema):
     pass
 
 class GenrePublic(GenreBase, UUIDSchema):
-    pass
\ No newline at end of file
+    pass
+
+class GenreListItem(GenrePublic):
+    book_count: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List
+
+class Suggestion(BaseModel):
+    id: str
+    text: str
+
+class SuggestResponse(BaseModel):
+    titles: List[Suggestion] = []
+    authors: List[Suggestion] = []
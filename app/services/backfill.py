@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Set
+
+from app.core.celery_app import celery_app
+from app.core.queues import BACKFILL_QUEUE, queue_options
+from app.core.redis import get_redis_client
+from app.services.scrape_dispatch import normalize_query
+
+BATCH_TASK_NAME = "app.tasks.scrape.process_search_queries"
+
+BACKFILL_KEY_PREFIX = "backfill:"
+# Checkpoints outlive any reasonable crash-and-resume cycle, then clean themselves up.
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _keys(run_id: str) -> tuple[str, str]:
+    return f"{BACKFILL_KEY_PREFIX}{run_id}:done", f"{BACKFILL_KEY_PREFIX}{run_id}:stats"
+
+
+async def load_completed_queries(run_id: str) -> Set[str]:
+    """Normalized queries of the run that were already ingested."""
+    done_key, _ = _keys(run_id)
+    return {q.decode() for q in await get_redis_client().smembers(done_key)}
+
+
+async def mark_queries_completed(run_id: str, queries: List[str], ingested: Dict[str, int]):
+    """Checkpoints queries whose books were written, together with the run's running totals."""
+    done_key, stats_key = _keys(run_id)
+    try:
+        async with get_redis_client().pipeline(transaction=True) as pipe:
+            if queries:
+                pipe.sadd(done_key, *(normalize_query(q) for q in queries))
+            for field, value in ingested.items():
+                pipe.hincrby(stats_key, field, value)
+            pipe.expire(done_key, CHECKPOINT_TTL_SECONDS)
+            pipe.expire(stats_key, CHECKPOINT_TTL_SECONDS)
+            await pipe.execute()
+    except Exception as e:
+        print(f"Error checkpointing backfill run {run_id}: {e}")
+
+
+async def get_backfill_progress(run_id: str) -> Dict[str, Any]:
+    done_key, stats_key = _keys(run_id)
+    redis = get_redis_client()
+    completed = await redis.scard(done_key)
+    stats = await redis.hgetall(stats_key)
+    return {"run_id": run_id, "queries_completed": completed, **{k.decode(): int(v) for k, v in stats.items()}}
+
+
+def enqueue_backfill(queries: List[str], run_id: str, batch_size: int = 100, concurrency: int = 4) -> List[str]:
+    """Splits the queries into batch tasks on the backfill queue and returns their task ids."""
+    task_ids = []
+    for start in range(0, len(queries), batch_size):
+        result = celery_app.send_task(
+            BATCH_TASK_NAME,
+            args=[queries[start:start + batch_size], run_id, concurrency],
+            **queue_options(BACKFILL_QUEUE)
+        )
+        task_ids.append(result.id)
+    return task_ids
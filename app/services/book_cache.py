@@ -0,0 +1,203 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+from elasticsearch import NotFoundError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.es import get_es_client
+from app.core.lru import LRUCache
+from app.core.redis import get_redis_client
+from app.crud import crud_book
+from app.schemas.book import BookPublic
+from app.services.search_backend import search_backend
+from app.services.search_serializer import PUBLIC_SOURCE_FIELDS, to_public_book
+
+ENTRY_KEY_PREFIX = "book_cache:entry:"
+GENERATION_KEY_PREFIX = "book_cache:gen:"
+INVALIDATION_CHANNEL = "book_cache:invalidate"
+HITS_KEY = "book_cache:stats:hits"
+MISSES_KEY = "book_cache:stats:misses"
+
+GENERATION_TTL_SECONDS = 86400
+
+# Stores a filled entry only if the book's generation is still the one read before
+# loading it; an invalidation in between means the loaded value may be stale.
+FILL_ENTRY_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# Bumps each book's generation and drops its entry, so in-flight fills are refused.
+INVALIDATE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if i % 2 == 1 then
+        redis.call('INCR', key)
+        redis.call('EXPIRE', key, ARGV[1])
+    else
+        redis.call('DEL', key)
+    end
+end
+return #KEYS / 2
+"""
+
+# Serialized BookPublic dicts by book id. Entries are dropped on invalidation messages;
+# the short TTL bounds staleness if a message is missed while resubscribing.
+_local_books = LRUCache(maxsize=settings.BOOK_CACHE_LOCAL_SIZE, ttl=settings.BOOK_CACHE_LOCAL_TTL_SECONDS)
+# Invalidation messages received by this process; a lookup only fills the LRU if none
+# arrived while it was reading, so an eviction cannot be overwritten by an older value.
+_local_invalidations = 0
+
+
+async def _load_from_es(book_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    async def fetch() -> Optional[Dict[str, Any]]:
+        try:
+            response = await get_es_client().get(
+                index=settings.ELASTICSEARCH_INDEX_NAME, id=str(book_id), source_includes=PUBLIC_SOURCE_FIELDS
+            )
+        except NotFoundError:
+            return None
+        return to_public_book(response["_source"])
+
+    return await search_backend.timed(fetch)
+
+
+async def _load_book(db: AsyncSession, book_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Loads the public book from the configured source. The ES document is only written by
+    the outbox relay, so a book it has not relayed yet (or an unhealthy cluster) falls
+    back to Postgres.
+    """
+    if settings.BOOK_DETAIL_SOURCE == "es" and search_backend.use_elasticsearch():
+        try:
+            book = await _load_from_es(book_id)
+        except Exception as e:
+            print(f"Error loading book {book_id} from Elasticsearch, reading Postgres: {type(e).__name__} - {e}")
+            book = None
+        if book is not None:
+            return book
+
+    db_book = await crud_book.get_book(db=db, book_id=book_id)
+    if db_book is None:
+        return None
+    return BookPublic.model_validate(db_book).model_dump(mode="json")
+
+
+async def _incr(key: str):
+    try:
+        await get_redis_client().incr(key)
+    except Exception as e:
+        print(f"Error updating book cache counter {key}: {e}")
+
+
+async def get_public_book(db: AsyncSession, book_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Read-through lookup of a book's BookPublic dict: the in-process LRU, then Redis, then
+    the detail source. Missing books are not cached. Redis errors degrade to a direct load.
+    A loaded value is only stored if the book was not invalidated while it was loading.
+    """
+    if not settings.BOOK_CACHE_ENABLED:
+        return await _load_book(db, book_id)
+
+    book = _local_books.get(book_id)
+    if book is not None:
+        return book
+
+    local_seen = _local_invalidations
+    key = f"{ENTRY_KEY_PREFIX}{book_id}"
+    generation_key = f"{GENERATION_KEY_PREFIX}{book_id}"
+    redis = get_redis_client()
+    try:
+        raw, generation = await redis.mget(key, generation_key)
+    except Exception as e:
+        print(f"Book cache unavailable, bypassing it: {e}")
+        return await _load_book(db, book_id)
+
+    if raw:
+        book = json.loads(raw)
+        await _incr(HITS_KEY)
+    else:
+        await _incr(MISSES_KEY)
+        book = await _load_book(db, book_id)
+        if book is None:
+            return None
+        try:
+            await redis.eval(
+                FILL_ENTRY_SCRIPT, 2, key, generation_key,
+                (generation or b"0").decode(), json.dumps(book), settings.BOOK_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            print(f"Error storing book cache entry {key}: {e}")
+
+    if _local_invalidations == local_seen:
+        _local_books.set(book_id, book)
+    return book
+
+
+async def invalidate_books(book_ids: Iterable[Any]):
+    """
+    Bumps the books' generations, drops their Redis entries and tells every API process
+    to drop its local copy.
+    """
+    ids = sorted({str(book_id) for book_id in book_ids})
+    if not ids:
+        return
+    keys = []
+    for book_id in ids:
+        keys.extend([f"{GENERATION_KEY_PREFIX}{book_id}", f"{ENTRY_KEY_PREFIX}{book_id}"])
+    redis = get_redis_client()
+    try:
+        await redis.eval(INVALIDATE_SCRIPT, len(keys), *keys, GENERATION_TTL_SECONDS)
+        await redis.publish(INVALIDATION_CHANNEL, json.dumps(ids))
+    except Exception as e:
+        print(f"Error invalidating {len(ids)} cached books: {e}")
+
+
+async def listen_for_book_invalidations():
+    """
+    Evicts books from this process's LRU as invalidation messages arrive. Runs for the
+    lifetime of the API process; the local cache is cleared whenever the subscription is
+    (re)established, since messages may have been missed in between.
+    """
+    global _local_invalidations
+    while True:
+        pubsub = get_redis_client().pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            _local_invalidations += 1
+            _local_books.clear()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                _local_invalidations += 1
+                for book_id in json.loads(message["data"]):
+                    _local_books.pop(uuid.UUID(book_id))
+        except Exception as e:
+            print(f"Book cache invalidation listener failed, resubscribing: {e}")
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+async def get_book_cache_stats() -> Dict[str, Any]:
+    """Returns this process's LRU counters and the shared Redis hit/miss counters."""
+    hits, misses = (int(v or 0) for v in await get_redis_client().mget(HITS_KEY, MISSES_KEY))
+    lookups = hits + misses
+    return {
+        "enabled": settings.BOOK_CACHE_ENABLED,
+        "detail_source": settings.BOOK_DETAIL_SOURCE,
+        "local": _local_books.stats(),
+        "shared_hits": hits,
+        "shared_misses": misses,
+        "shared_hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "ttl_seconds": settings.BOOK_CACHE_TTL_SECONDS,
+        "local_ttl_seconds": settings.BOOK_CACHE_LOCAL_TTL_SECONDS,
+    }
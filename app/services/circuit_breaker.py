@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+CIRCUIT_KEY_PREFIX = "circuit:"
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 20
+LATENCY_PERCENTILE = 0.95
+TIMEOUT_MULTIPLIER = 3.0
+RETRY_WINDOW_SECONDS = 60
+
+# Counts a failure and opens the circuit once the threshold is reached, or right
+# away when the failed call was the half-open probe.
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state ~= 'closed' or failures >= tonumber(ARGV[1]) then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', ARGV[2])
+    redis.call('DEL', KEYS[2])
+    return 1
+end
+return 0
+"""
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream source, with its state shared by every worker through Redis.
+
+    After `CIRCUIT_FAILURE_THRESHOLD` consecutive failures the circuit opens and calls fail fast
+    for `CIRCUIT_OPEN_SECONDS`. Then a single caller, elected with SET NX, probes the upstream:
+    success closes the circuit, failure re-opens it. The request timeout follows the observed
+    latency percentile instead of a fixed 60s, and retries are capped by a per-minute budget.
+    If Redis is unreachable the breaker lets calls through with the maximum timeout.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.state_key = f"{CIRCUIT_KEY_PREFIX}{source}:state"
+        self.probe_key = f"{CIRCUIT_KEY_PREFIX}{source}:probe"
+        self.latency_key = f"{CIRCUIT_KEY_PREFIX}{source}:latency"
+
+    def _window_keys(self) -> tuple[str, str]:
+        window = int(time.time() // RETRY_WINDOW_SECONDS)
+        prefix = f"{CIRCUIT_KEY_PREFIX}{self.source}:{window}"
+        return f"{prefix}:requests", f"{prefix}:retries"
+
+    def _timeout_from(self, samples: List[bytes]) -> float:
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return settings.EXTERNAL_API_MAX_TIMEOUT
+        latency = _percentile([float(s) for s in samples], LATENCY_PERCENTILE)
+        return min(settings.EXTERNAL_API_MAX_TIMEOUT, max(settings.EXTERNAL_API_MIN_TIMEOUT, latency * TIMEOUT_MULTIPLIER))
+
+    async def acquire(self) -> float:
+        """
+        Admits a call and returns the timeout to use for it.
+        Raises CircuitOpenError while the circuit is open or another caller is probing.
+        """
+        redis = get_redis_client()
+        requests_key, _ = self._window_keys()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(self.state_key, "state", "opened_at")
+                pipe.lrange(self.latency_key, 0, -1)
+                pipe.incr(requests_key)
+                pipe.expire(requests_key, RETRY_WINDOW_SECONDS * 2)
+                (state, opened_at), samples, _, _ = await pipe.execute()
+        except Exception as e:
+            print(f"Circuit breaker for {self.source} unavailable, allowing call: {e}")
+            return settings.EXTERNAL_API_MAX_TIMEOUT
+
+        state = state.decode() if state else CLOSED
+        timeout = self._timeout_from(samples)
+        if state == CLOSED:
+            return timeout
+        if state == OPEN and time.time() - float(opened_at or 0) < settings.CIRCUIT_OPEN_SECONDS:
+            raise CircuitOpenError(f"Circuit for {self.source} is open")
+
+        probe_ttl = int(settings.EXTERNAL_API_MAX_TIMEOUT) + 5
+        if not await redis.set(self.probe_key, 1, nx=True, ex=probe_ttl):
+            raise CircuitOpenError(f"Circuit for {self.source} is half-open, probe in progress")
+        await redis.hset(self.state_key, "state", HALF_OPEN)
+        print(f"Circuit for {self.source} half-open, probing upstream.")
+        return timeout
+
+    async def record_success(self, latency: float):
+        try:
+            async with get_redis_client().pipeline(transaction=False) as pipe:
+                pipe.lpush(self.latency_key, round(latency, 3))
+                pipe.ltrim(self.latency_key, 0, LATENCY_SAMPLES - 1)
+                pipe.hget(self.state_key, "state")
+                pipe.hset(self.state_key, mapping={"state": CLOSED, "failures": 0})
+                pipe.delete(self.probe_key)
+                _, _, previous, _, _ = await pipe.execute()
+            if previous and previous.decode() != CLOSED:
+                print(f"Circuit for {self.source} closed after a successful probe.")
+        except Exception as e:
+            print(f"Error recording success for circuit {self.source}: {e}")
+
+    async def record_failure(self):
+        try:
+            opened = await get_redis_client().eval(
+                RECORD_FAILURE_SCRIPT, 2, self.state_key, self.probe_key,
+                settings.CIRCUIT_FAILURE_THRESHOLD, time.time()
+            )
+            if opened:
+                print(f"Circuit for {self.source} opened for {settings.CIRCUIT_OPEN_SECONDS}s.")
+        except Exception as e:
+            print(f"Error recording failure for circuit {self.source}: {e}")
+
+    async def retry_after_failure(self, attempt: int) -> bool:
+        """
+        Decides whether a failed call may be retried and sleeps a jittered backoff if so.
+        Retries stop at EXTERNAL_API_MAX_RETRIES, when the circuit is open, or when the
+        source has spent its retry budget for the current minute.
+        """
+        if attempt >= settings.EXTERNAL_API_MAX_RETRIES:
+            return False
+        requests_key, retries_key = self._window_keys()
+        try:
+            async with get_redis_client().pipeline(transaction=False) as pipe:
+                pipe.hget(self.state_key, "state")
+                pipe.get(requests_key)
+                pipe.incr(retries_key)
+                pipe.expire(retries_key, RETRY_WINDOW_SECONDS * 2)
+                state, requests, retries, _ = await pipe.execute()
+        except Exception as e:
+            print(f"Retry budget for {self.source} unavailable, not retrying: {e}")
+            return False
+
+        if state and state.decode() != CLOSED:
+            return False
+        budget = max(settings.EXTERNAL_API_RETRY_BUDGET_MIN, int(int(requests or 0) * settings.EXTERNAL_API_RETRY_BUDGET_RATIO))
+        if retries > budget:
+            print(f"Retry budget for {self.source} exhausted ({budget} per {RETRY_WINDOW_SECONDS}s).")
+            return False
+
+        backoff = settings.EXTERNAL_API_RETRY_BACKOFF * (2 ** attempt)
+        await asyncio.sleep(random.uniform(0, backoff))
+        return True
+
+    async def stats(self) -> Dict[str, Any]:
+        redis = get_redis_client()
+        state, failures, opened_at = await redis.hmget(self.state_key, "state", "failures", "opened_at")
+        samples = await redis.lrange(self.latency_key, 0, -1)
+        latencies = [float(s) for s in samples]
+        return {
+            "state": state.decode() if state else CLOSED,
+            "consecutive_failures": int(failures or 0),
+            "opened_at": float(opened_at) if opened_at else None,
+            "latency_samples": len(latencies),
+            "latency_p50": _percentile(latencies, 0.5) if latencies else None,
+            "latency_p95": _percentile(latencies, LATENCY_PERCENTILE) if latencies else None,
+            "timeout": self._timeout_from(samples),
+        }
+
+
+@lru_cache()
+def get_circuit_breaker(source: str) -> CircuitBreaker:
+    return CircuitBreaker(source)
+
+
+async def get_circuit_breaker_stats(sources: List[str]) -> Dict[str, Any]:
+    return {source: await get_circuit_breaker(source).stats() for source in sources}
@@ -0,0 +1,224 @@
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models.book import Book as BookModel
+from app.services.search_serializer import PUBLIC_BOOK_FIELDS
+from app.utils.isbn import normalize_isbns
+
+MERGEABLE_FIELDS = [f for f in PUBLIC_BOOK_FIELDS if f != "id"]
+SIMILAR_TITLE_CANDIDATES = 5
+
+# Pairs of books in the given id set with similar normalized titles, compatible years
+# and at least one author name in common. Their ISBNs are compared after normalization.
+SIMILAR_PAIRS_SQL = text("""
+    SELECT a.id AS a_id, b.id AS b_id, a.isbn_10 AS a_isbn_10, a.isbn_13 AS a_isbn_13,
+           b.isbn_10 AS b_isbn_10, b.isbn_13 AS b_isbn_13
+    FROM books a
+    CROSS JOIN LATERAL (
+        SELECT id, year_published, isbn_10, isbn_13 FROM books b
+        WHERE normalize_title(b.title) % normalize_title(a.title) AND b.id <> a.id
+        ORDER BY normalize_title(b.title) <-> normalize_title(a.title)
+        LIMIT :per_title
+    ) b
+    WHERE a.id = ANY(CAST(:ids AS uuid[]))
+      AND (a.year_published IS NULL OR b.year_published IS NULL OR abs(a.year_published - b.year_published) <= 1)
+      AND EXISTS (
+          SELECT 1
+          FROM book_authors x JOIN authors ax ON ax.id = x.author_id,
+               book_authors y JOIN authors ay ON ay.id = y.author_id
+          WHERE x.book_id = a.id AND y.book_id = b.id AND lower(ax.name) = lower(ay.name)
+      )
+""")
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent: Dict[uuid.UUID, uuid.UUID] = {}
+
+    def find(self, item: uuid.UUID) -> uuid.UUID:
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: uuid.UUID, b: uuid.UUID):
+        self.parent[self.find(a)] = self.find(b)
+
+    def groups(self) -> List[Set[uuid.UUID]]:
+        grouped: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+        for item in self.parent:
+            grouped.setdefault(self.find(item), set()).add(item)
+        return [group for group in grouped.values() if len(group) > 1]
+
+
+async def _isbn_duplicates(db: AsyncSession, chunk_size: int, pairs: _DisjointSet) -> List[Dict[str, Any]]:
+    """
+    Groups books whose ISBNs normalize to the same ISBN-13 and returns the ISBN rewrites
+    for books that have no such duplicate.
+    """
+    by_isbn13: Dict[str, List[uuid.UUID]] = {}
+    rewrites: Dict[uuid.UUID, Dict[str, Any]] = {}
+    last_id: Optional[uuid.UUID] = None
+    while True:
+        stmt = select(BookModel.id, BookModel.isbn_10, BookModel.isbn_13).where(
+            (BookModel.isbn_10.isnot(None)) | (BookModel.isbn_13.isnot(None))
+        ).order_by(BookModel.id).limit(chunk_size)
+        if last_id is not None:
+            stmt = stmt.where(BookModel.id > last_id)
+        rows = (await db.execute(stmt)).all()
+        if not rows:
+            break
+        for book_id, isbn_10, isbn_13 in rows:
+            norm_10, norm_13 = normalize_isbns(isbn_10, isbn_13)
+            if norm_13:
+                by_isbn13.setdefault(norm_13, []).append(book_id)
+            if (norm_10, norm_13) != (isbn_10, isbn_13) and len(norm_10 or "") <= 10 and len(norm_13 or "") <= 13:
+                rewrites[book_id] = {"id": book_id, "isbn_10": norm_10, "isbn_13": norm_13}
+        last_id = rows[-1][0]
+
+    for ids in by_isbn13.values():
+        for other in ids[1:]:
+            pairs.union(ids[0], other)
+            rewrites.pop(other, None)
+        if len(ids) > 1:
+            rewrites.pop(ids[0], None)
+    return list(rewrites.values())
+
+
+def _isbn13s_differ(a_isbn_10: Optional[str], a_isbn_13: Optional[str], b_isbn_10: Optional[str], b_isbn_13: Optional[str]) -> bool:
+    a_13 = normalize_isbns(a_isbn_10, a_isbn_13)[1]
+    b_13 = normalize_isbns(b_isbn_10, b_isbn_13)[1]
+    return bool(a_13 and b_13 and a_13 != b_13)
+
+
+async def _similar_title_duplicates(db: AsyncSession, chunk_size: int) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+    """
+    Pairs of books with similar titles sharing an author. Pairs carrying different
+    ISBN-13s are different editions or volumes ("Saga, Vol. 1" / "Saga, Vol. 2") and are skipped.
+    """
+    found: List[Tuple[uuid.UUID, uuid.UUID]] = []
+    last_id: Optional[uuid.UUID] = None
+    while True:
+        stmt = select(BookModel.id).order_by(BookModel.id).limit(chunk_size)
+        if last_id is not None:
+            stmt = stmt.where(BookModel.id > last_id)
+        ids = (await db.execute(stmt)).scalars().all()
+        if not ids:
+            break
+        await db.execute(select(func.set_config("pg_trgm.similarity_threshold", str(settings.BOOK_DEDUP_SIMILARITY), True)))
+        rows = (await db.execute(SIMILAR_PAIRS_SQL, {"ids": list(ids), "per_title": SIMILAR_TITLE_CANDIDATES})).all()
+        for row in rows:
+            if not _isbn13s_differ(row.a_isbn_10, row.a_isbn_13, row.b_isbn_10, row.b_isbn_13):
+                found.append((row.a_id, row.b_id))
+        last_id = ids[-1]
+    return found
+
+
+def _union_similar_pairs(pairs: _DisjointSet, similar: List[Tuple[uuid.UUID, uuid.UUID]]) -> int:
+    """
+    Joins similar-title pairs without chaining them: a group takes part in at most one
+    title-based union, so A~B and B~C never pull A and C into the same merge.
+    Returns the number of pairs joined.
+    """
+    title_linked: Set[uuid.UUID] = set()
+    joined = 0
+    for a_id, b_id in similar:
+        root_a, root_b = pairs.find(a_id), pairs.find(b_id)
+        if root_a == root_b or root_a in title_linked or root_b in title_linked:
+            continue
+        pairs.union(a_id, b_id)
+        title_linked.add(pairs.find(a_id))
+        joined += 1
+    return joined
+
+
+def _completeness(book: BookModel) -> tuple:
+    filled = sum(1 for field in MERGEABLE_FIELDS if getattr(book, field) is not None)
+    return (book.isbn_13 is not None, filled, len(book.authors) + len(book.genres), -book.created_at.timestamp())
+
+
+async def _merge_group(db: AsyncSession, ids: Iterable[uuid.UUID]) -> tuple[BookModel, List[uuid.UUID]]:
+    """
+    Keeps the most complete book of the group, fills its empty fields from the others,
+    gives it the union of their authors and genres and deletes the rest.
+    """
+    books = (await db.execute(
+        select(BookModel).options(selectinload(BookModel.authors), selectinload(BookModel.genres))
+        .where(BookModel.id.in_(list(ids)))
+    )).scalars().all()
+    survivor = max(books, key=_completeness)
+    losers = [b for b in books if b.id != survivor.id]
+
+    merged = {field: getattr(survivor, field) for field in MERGEABLE_FIELDS}
+    authors = list(survivor.authors)
+    genres = list(survivor.genres)
+    for book in sorted(losers, key=_completeness, reverse=True):
+        for field in MERGEABLE_FIELDS:
+            if merged[field] is None:
+                merged[field] = getattr(book, field)
+        authors.extend(a for a in book.authors if a not in authors)
+        genres.extend(g for g in book.genres if g not in genres)
+    merged["isbn_10"], merged["isbn_13"] = normalize_isbns(merged["isbn_10"], merged["isbn_13"])
+
+    loser_ids = [b.id for b in losers]
+    for book in losers:
+        await db.delete(book)
+    # Losers must be gone before the survivor can take over their unique isbn_13.
+    await db.flush()
+
+    for field, value in merged.items():
+        setattr(survivor, field, value)
+    survivor.authors = authors
+    survivor.genres = genres
+    await db.flush()
+    return survivor, loser_ids
+
+
+async def dedupe_books(chunk_size: int = 1000, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Finds books that are the same edition under different rows, by normalized ISBN
+    or by a similar title sharing an author, and merges each group into one book.
+    The search outbox carries the merged and deleted books to Elasticsearch.
+    With dry_run the groups are only reported.
+    """
+    pairs = _DisjointSet()
+    async with AsyncSessionLocal() as db:
+        isbn_rewrites = await _isbn_duplicates(db, chunk_size, pairs)
+        similar_pairs = _union_similar_pairs(pairs, await _similar_title_duplicates(db, chunk_size))
+    groups = pairs.groups()
+    print(f"Found {len(groups)} duplicate groups ({similar_pairs} similar-title pairs), "
+          f"{len(isbn_rewrites)} books with unnormalized ISBNs.")
+
+    if dry_run:
+        for group in groups[:50]:
+            print(f"  would merge: {sorted(str(i) for i in group)}")
+        return {"groups": len(groups), "isbn_rewrites": len(isbn_rewrites), "merged": 0, "deleted": 0, "dry_run": True}
+
+    merged = 0
+    deleted = 0
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(isbn_rewrites), chunk_size):
+            await db.execute(update(BookModel), isbn_rewrites[start:start + chunk_size])
+        await db.commit()
+
+        for group in groups:
+            try:
+                survivor, loser_ids = await _merge_group(db, group)
+                await db.commit()
+            except Exception as e:
+                print(f"Error merging books {sorted(str(i) for i in group)}: {type(e).__name__} - {e}")
+                await db.rollback()
+                continue
+            merged += 1
+            deleted += len(loser_ids)
+
+    print(f"Dedupe finished: merged {merged} groups, deleted {deleted} duplicate books.")
+    return {"groups": len(groups), "isbn_rewrites": len(isbn_rewrites), "merged": merged, "deleted": deleted, "dry_run": False}
@@ -0,0 +1,44 @@
+from app.models.book import Book as BookModel
+from typing import Dict, Any
+
+def prepare_book_for_es(book: BookModel) -> Dict[str, Any]:
+    """Converts a SQLAlchemy Book model to an Elasticsearch document dict."""
+    authors = [{"id": str(a.id), "name": a.name} for a in book.authors]
+    genres = [{"id": str(g.id), "name": g.name} for g in book.genres]
+
+    search_text_parts = [book.title or ""]
+    search_text_parts.extend(a["name"] for a in authors)
+    search_text_parts.extend(g["name"] for g in genres)
+    search_text_parts.append(book.summary or "")
+    search_text = " ".join(filter(None, search_text_parts))
+
+    title_sort = book.title.lower()
+    for article in ["the ", "a ", "an "]:
+        if title_sort.startswith(article):
+            title_sort = title_sort[len(article):]
+            break
+
+    title_inputs = [book.title] if book.title.lower() == title_sort else [book.title, title_sort]
+
+    doc = {
+        "id": str(book.id),
+        "title": book.title,
+        "title_sort": title_sort,
+        "authors": authors,
+        "year_published": book.year_published,
+        "genres": genres,
+        "summary": book.summary,
+        "age_rating": book.age_rating,
+        "language": book.language,
+        "book_size_pages": book.book_size_pages,
+        "book_size_description": book.book_size_description,
+        "average_rating": book.average_rating,
+        "rating_details": book.rating_details,
+        "source_url": book.source_url,
+        "isbn_10": book.isbn_10,
+        "isbn_13": book.isbn_13,
+        "search_text": search_text,
+        "title_suggest": {"input": title_inputs},
+        "author_suggest": {"input": [a["name"] for a in authors]} if authors else None
+    }
+    return {k: v for k, v in doc.items() if v is not None}
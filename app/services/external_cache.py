@@ -0,0 +1,90 @@
+import hashlib
+import json
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+ENTRY_KEY_PREFIX = "extcache:"
+
+
+def _cache_key(source: str, params: Dict[str, Any]) -> str:
+    normalized = {k: v for k, v in sorted(params.items()) if v is not None}
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{ENTRY_KEY_PREFIX}{source}:{digest}"
+
+
+def _is_empty(data: Optional[Dict[str, Any]]) -> bool:
+    return not data or not data.get("books")
+
+
+async def get_cached_response(source: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the cached entry for a (source, params) call, or None.
+    The entry holds the API 'data' (None for a cached empty result), its freshness
+    TTL and any ETag/Last-Modified validators sent by the upstream.
+    """
+    if not settings.EXTERNAL_CACHE_ENABLED:
+        return None
+    try:
+        raw = await get_redis_client().get(_cache_key(source, params))
+        return json.loads(zlib.decompress(raw)) if raw else None
+    except Exception as e:
+        print(f"Error reading external API cache for source={source}: {e}")
+        return None
+
+
+def cached_data(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """The entry's API 'data'; a cached empty result reads back as an empty payload, not as an error."""
+    return entry.get("data") or {}
+
+
+def is_fresh(entry: Dict[str, Any]) -> bool:
+    return time.time() - entry["stored_at"] <= entry["ttl"]
+
+
+def revalidation_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Conditional request headers for a stale entry, if the upstream gave validators."""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+async def store_response(
+    source: str,
+    params: Dict[str, Any],
+    data: Optional[Dict[str, Any]],
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+):
+    """
+    Caches a well-formed upstream response compressed; empty results get the shorter
+    negative TTL. Callers must not pass responses that failed to parse.
+    """
+    if not settings.EXTERNAL_CACHE_ENABLED:
+        return
+    empty = _is_empty(data)
+    entry = {
+        "data": None if empty else data,
+        "stored_at": time.time(),
+        "ttl": settings.EXTERNAL_CACHE_NEGATIVE_TTL_SECONDS if empty else settings.EXTERNAL_CACHE_TTL_SECONDS,
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+    # Negative entries are simply refetched once stale; positive ones are kept for revalidation.
+    expire = entry["ttl"] if empty else entry["ttl"] + settings.EXTERNAL_CACHE_RETENTION_SECONDS
+    try:
+        payload = zlib.compress(json.dumps(entry, default=str).encode())
+        await get_redis_client().set(_cache_key(source, params), payload, ex=expire)
+    except Exception as e:
+        print(f"Error writing external API cache for source={source}: {e}")
+
+
+async def mark_revalidated(source: str, params: Dict[str, Any], entry: Dict[str, Any]):
+    """Restarts the freshness window of an entry the upstream confirmed with 304 Not Modified."""
+    await store_response(source, params, entry["data"], entry.get("etag"), entry.get("last_modified"))
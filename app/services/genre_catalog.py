@@ -0,0 +1,67 @@
+import asyncio
+import bisect
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import crud_genre
+from app.crud.name_listing import decode_name_cursor, encode_name_cursor
+
+
+class GenreSnapshot:
+    """All genres in listing order, with a content hash used as the catalog version."""
+
+    def __init__(self, rows: List[Tuple[Any, str]]):
+        self.genres: List[Dict[str, Any]] = [{"id": str(genre.id), "name": genre.name} for genre, _ in rows]
+        self.keys: List[Tuple[str, str]] = [(sort_name, str(genre.id)) for genre, sort_name in rows]
+        digest = hashlib.sha1()
+        for genre in self.genres:
+            digest.update(f"{genre['id']}\x00{genre['name']}\x00".encode())
+        self.version = digest.hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        prefix: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Same ordering and cursors as the database listing, served from memory."""
+        start = 0
+        prefix = prefix.lower() if prefix else None
+        if prefix:
+            start = bisect.bisect_left(self.keys, (prefix, ""))
+        if cursor:
+            after_name, after_id = decode_name_cursor(cursor)
+            start = max(start, bisect.bisect_right(self.keys, (after_name, str(after_id))))
+
+        end = start
+        while end < len(self.keys) and end - start <= limit and (not prefix or self.keys[end][0].startswith(prefix)):
+            end += 1
+
+        if end - start > limit:
+            last = start + limit - 1
+            return self.genres[start:last + 1], encode_name_cursor(self.keys[last][0], uuid.UUID(self.keys[last][1]))
+        return self.genres[start:end], None
+
+
+_snapshot: Optional[GenreSnapshot] = None
+_snapshot_lock = asyncio.Lock()
+
+
+async def get_genre_snapshot(db: AsyncSession) -> GenreSnapshot:
+    """
+    Returns this process's genre snapshot, reloading it from Postgres once it is older
+    than GENRE_SNAPSHOT_TTL_SECONDS. Concurrent requests share a single reload.
+    """
+    global _snapshot
+    if _snapshot is not None and time.monotonic() - _snapshot.loaded_at < settings.GENRE_SNAPSHOT_TTL_SECONDS:
+        return _snapshot
+    async with _snapshot_lock:
+        if _snapshot is None or time.monotonic() - _snapshot.loaded_at >= settings.GENRE_SNAPSHOT_TTL_SECONDS:
+            _snapshot = GenreSnapshot(await crud_genre.get_all_genres(db))
+    return _snapshot
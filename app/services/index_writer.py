@@ -0,0 +1,183 @@
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+from elasticsearch import ApiError, ConnectionError as ESConnectionError, ConnectionTimeout
+
+from app.core.config import settings
+from app.core.es import get_es_client
+from app.models.book import Book as BookModel
+from app.services.es_documents import prepare_book_for_es
+from app.services.search_cache import invalidate_search_cache
+
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+RETRYABLE_ERROR_TYPES = {"es_rejected_execution_exception", "circuit_breaking_exception"}
+
+
+class BulkIndexWriter:
+    """
+    Coalesces index and delete operations and flushes them through the bulk API
+    once `max_batch_size` operations are pending or every `flush_interval` seconds.
+
+    Operations on the same document id replace each other while pending. Items that
+    Elasticsearch rejects with 429 (or the whole request, when the cluster is
+    unavailable) are retried with jittered exponential backoff. Use it as an async
+    context manager so the remaining operations are flushed on exit.
+
+    Operations given a `version` are sent with external_gte versioning, so an older
+    change never overwrites a newer one; a version conflict counts as written.
+    """
+
+    def __init__(
+        self,
+        index_name: Optional[str] = None,
+        max_batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_retries: int = 5,
+        initial_backoff: float = 0.5
+    ):
+        self.index_name = index_name or settings.ELASTICSEARCH_INDEX_NAME
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+
+        self.indexed = 0
+        self.deleted = 0
+        self.failed = 0
+        self.retried = 0
+        # Last error per document id that was given up on, for callers that track failures.
+        self.errors: Dict[str, str] = {}
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "BulkIndexWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        if self._flusher is None and self.flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        """Stops the periodic flusher and flushes everything still pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def index_book(self, book: BookModel, version: Optional[int] = None):
+        await self._add(str(book.id), {"op": "index", "document": prepare_book_for_es(book), "version": version})
+
+    async def delete_book(self, book_id: str, version: Optional[int] = None):
+        await self._add(str(book_id), {"op": "delete", "version": version})
+
+    async def _add(self, doc_id: str, operation: Dict[str, Any]):
+        self._pending.pop(doc_id, None)
+        self._pending[doc_id] = operation
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error during periodic index flush: {e}")
+
+    async def flush(self) -> List[str]:
+        """Sends all pending operations, retrying rejected items with backoff. Returns the written ids."""
+        async with self._lock:
+            if not self._pending:
+                return []
+            batch = self._pending
+            self._pending = {}
+
+            written = await self._send(batch)
+            if written:
+                await invalidate_search_cache()
+            return written
+
+    async def _send(self, batch: Dict[str, Dict[str, Any]]) -> List[str]:
+        client = get_es_client()
+        written: List[str] = []
+        attempt = 0
+
+        while batch:
+            operations: List[Dict[str, Any]] = []
+            for doc_id, operation in batch.items():
+                meta = {"_index": self.index_name, "_id": doc_id}
+                if operation.get("version") is not None:
+                    meta.update(version=operation["version"], version_type="external_gte")
+                operations.append({operation["op"]: meta})
+                if operation["op"] == "index":
+                    operations.append(operation["document"])
+
+            retry: Dict[str, Dict[str, Any]] = {}
+            try:
+                response = await client.bulk(operations=operations)
+            except (ESConnectionError, ConnectionTimeout) as e:
+                print(f"Bulk request failed ({type(e).__name__}), retrying {len(batch)} operations: {e}")
+                retry = batch
+            except ApiError as e:
+                if e.meta.status not in RETRYABLE_STATUSES:
+                    print(f"Bulk request rejected with status {e.meta.status}, dropping {len(batch)} operations: {e}")
+                    self.failed += len(batch)
+                    self.errors.update({doc_id: f"bulk request rejected with status {e.meta.status}" for doc_id in batch})
+                    return written
+                retry = batch
+            else:
+                for item in response["items"]:
+                    op_type, result = next(iter(item.items()))
+                    doc_id = result["_id"]
+                    status = result.get("status", 500)
+                    error = result.get("error")
+
+                    if not error or (op_type == "delete" and status == 404) or status == 409:
+                        written.append(doc_id)
+                        if op_type == "delete":
+                            self.deleted += 1
+                        else:
+                            self.indexed += 1
+                    elif status in RETRYABLE_STATUSES or error.get("type") in RETRYABLE_ERROR_TYPES:
+                        retry[doc_id] = batch[doc_id]
+                    else:
+                        self.failed += 1
+                        self.errors[doc_id] = f"{error.get('type')}: {error.get('reason')}"
+                        print(f"Failed to {op_type} book {doc_id}: {error.get('type')} - {error.get('reason')}")
+
+            if not retry:
+                break
+            if attempt >= self.max_retries:
+                self.failed += len(retry)
+                self.errors.update({doc_id: f"gave up after {attempt} retries" for doc_id in retry})
+                print(f"Giving up on {len(retry)} operations after {attempt} retries.")
+                break
+
+            backoff = self.initial_backoff * (2 ** attempt)
+            await asyncio.sleep(random.uniform(backoff / 2, backoff))
+            attempt += 1
+            self.retried += len(retry)
+            batch = retry
+
+        if written:
+            print(f"Bulk flushed {len(written)} operations to {self.index_name}.")
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "indexed": self.indexed,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
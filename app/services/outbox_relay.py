@@ -0,0 +1,301 @@
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.redis import get_redis_client
+from app.models.book import Book as BookModel
+from app.models.search_outbox import OUTBOX_DELETE, OUTBOX_INDEX, SearchOutbox, SearchOutboxDeadLetter
+from app.services.book_cache import invalidate_books
+from app.services.index_writer import BulkIndexWriter
+from app.services.task_events import BOOKS, publish_task_event
+
+RELAYED_KEY = "search_outbox:stats:relayed"
+FAILED_KEY = "search_outbox:stats:failed"
+DROPPED_KEY = "search_outbox:stats:dropped"
+LAST_LAG_KEY = "search_outbox:stats:last_lag_seconds"
+TASK_WAIT_POLL_SECONDS = 0.5
+# While a reindex runs, the relay records every book it handles so the rebuild can
+# re-copy them, including association changes and renames that leave updated_at alone.
+REINDEX_TRACKING_KEY = "search_outbox:reindex:tracking"
+REINDEX_TOUCHED_KEY = "search_outbox:reindex:touched"
+REINDEX_TRACKING_TTL_SECONDS = 6 * 3600
+TRACK_TOUCHED_CHUNK = 1000
+
+TRACK_TOUCHED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('SADD', KEYS[2], unpack(ARGV))
+    redis.call('EXPIRE', KEYS[2], redis.call('TTL', KEYS[1]))
+end
+return 0
+"""
+TAKE_TOUCHED_SCRIPT = """
+local members = redis.call('SMEMBERS', KEYS[1])
+redis.call('DEL', KEYS[1])
+return members
+"""
+
+
+async def _record_relay_stats(relayed: int, failed: int, dropped: int, lag_seconds: float):
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        if relayed:
+            pipe.incrby(RELAYED_KEY, relayed)
+        if failed:
+            pipe.incrby(FAILED_KEY, failed)
+        if dropped:
+            pipe.incrby(DROPPED_KEY, dropped)
+        pipe.set(LAST_LAG_KEY, round(lag_seconds, 3))
+        await pipe.execute()
+    except Exception as e:
+        print(f"Error recording outbox relay stats: {e}")
+
+
+async def _track_touched_books(book_ids: List[str]):
+    """Adds the books to the reindex touched set, if a reindex is running."""
+    redis = get_redis_client()
+    for start in range(0, len(book_ids), TRACK_TOUCHED_CHUNK):
+        await redis.eval(
+            TRACK_TOUCHED_SCRIPT, 2, REINDEX_TRACKING_KEY, REINDEX_TOUCHED_KEY,
+            *book_ids[start:start + TRACK_TOUCHED_CHUNK]
+        )
+
+
+async def start_reindex_tracking():
+    """Starts recording the books the relay handles, for a reindex that is about to begin."""
+    async with get_redis_client().pipeline(transaction=True) as pipe:
+        pipe.delete(REINDEX_TOUCHED_KEY)
+        pipe.set(REINDEX_TRACKING_KEY, 1, ex=REINDEX_TRACKING_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def stop_reindex_tracking():
+    await get_redis_client().delete(REINDEX_TRACKING_KEY, REINDEX_TOUCHED_KEY)
+
+
+async def take_reindex_touched_books() -> List[uuid.UUID]:
+    """
+    Returns and forgets every book changed since the last call: books the relay has
+    handled plus those still queued in the outbox. The outbox is read first, so a row the
+    relay commits in between is still found in the touched set.
+    """
+    async with AsyncSessionLocal() as db:
+        pending = set((await db.execute(select(SearchOutbox.book_id).distinct())).scalars().all())
+    touched = await get_redis_client().eval(TAKE_TOUCHED_SCRIPT, 1, REINDEX_TOUCHED_KEY)
+    pending.update(uuid.UUID(book_id.decode()) for book_id in touched)
+    return sorted(pending)
+
+
+async def relay_outbox_batch(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Claims up to batch_size outbox rows with FOR UPDATE SKIP LOCKED, so several relays
+    can run side by side, and applies them to Elasticsearch in one bulk request.
+
+    Rows are collapsed to the latest operation per book. Each document is written with
+    that row's id as its external_gte version, so a relay holding older rows for the same
+    book can never overwrite a newer change. Every claimed book is evicted from the book
+    detail cache once committed, whatever ES did with it. Rows are deleted only once their
+    book was written (at-least-once delivery); failed rows stay queued with an attempt
+    count and move to the dead-letter table after OUTBOX_MAX_ATTEMPTS.
+
+    Scrape tasks whose rows were claimed get a books event with their written books
+    before the rows are deleted, so a task waiting on its rows sees the event first.
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(
+                SearchOutbox.id,
+                SearchOutbox.book_id,
+                SearchOutbox.op,
+                SearchOutbox.task_id,
+                (func.now() - SearchOutbox.created_at).label("age")
+            ).order_by(SearchOutbox.id).limit(batch_size).with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            return {"rows": 0, "books": 0, "written": 0}
+
+        latest: Dict[uuid.UUID, Any] = {}
+        row_ids: Dict[uuid.UUID, List[int]] = defaultdict(list)
+        task_books: Dict[str, Set[uuid.UUID]] = defaultdict(set)
+        for row in rows:
+            row_ids[row.book_id].append(row.id)
+            latest[row.book_id] = row
+            if row.task_id:
+                task_books[row.task_id].add(row.book_id)
+
+        index_ids = [book_id for book_id, row in latest.items() if row.op != OUTBOX_DELETE]
+        books: Dict[uuid.UUID, BookModel] = {}
+        if index_ids:
+            result = await db.execute(
+                select(BookModel).options(
+                    selectinload(BookModel.authors),
+                    selectinload(BookModel.genres)
+                ).where(BookModel.id.in_(index_ids))
+            )
+            books = {book.id: book for book in result.scalars().all()}
+
+        # A book that no longer exists is removed, whatever its latest row says.
+        index_writer = BulkIndexWriter(max_batch_size=len(latest) + 1, flush_interval=0)
+        for book_id, row in latest.items():
+            book = books.get(book_id)
+            if book is not None:
+                await index_writer.index_book(book, version=row.id)
+            else:
+                await index_writer.delete_book(str(book_id), version=row.id)
+        written = set(await index_writer.flush())
+        await _track_touched_books([str(book_id) for book_id in latest])
+
+        for task_id, book_ids in task_books.items():
+            indexed = sorted(str(book_id) for book_id in book_ids if book_id in books and str(book_id) in written)
+            if indexed:
+                await publish_task_event(task_id, BOOKS, {"ids": indexed})
+
+        done_ids: List[int] = []
+        failed_ids: List[int] = []
+        for book_id, ids in row_ids.items():
+            (done_ids if str(book_id) in written else failed_ids).extend(ids)
+
+        dropped = 0
+        if done_ids:
+            await db.execute(delete(SearchOutbox).where(SearchOutbox.id.in_(done_ids)))
+        if failed_ids:
+            await db.execute(
+                update(SearchOutbox).where(SearchOutbox.id.in_(failed_ids)).values(attempts=SearchOutbox.attempts + 1)
+            )
+            dropped_rows = (await db.execute(
+                delete(SearchOutbox).where(
+                    SearchOutbox.id.in_(failed_ids),
+                    SearchOutbox.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+                ).returning(SearchOutbox.book_id, SearchOutbox.op, SearchOutbox.attempts)
+            )).all()
+            dropped = len(dropped_rows)
+            if dropped:
+                await db.execute(insert(SearchOutboxDeadLetter), [
+                    {
+                        "book_id": book_id,
+                        "op": op,
+                        "attempts": attempts,
+                        "last_error": index_writer.errors.get(str(book_id)),
+                    }
+                    for book_id, op, attempts in dropped_rows
+                ])
+                print(f"Moved {dropped} outbox rows to the dead-letter table after "
+                      f"{settings.OUTBOX_MAX_ATTEMPTS} attempts: {sorted({str(r.book_id) for r in dropped_rows})[:10]}")
+        await db.commit()
+
+    await invalidate_books(latest.keys())
+    lag_seconds = max(row.age.total_seconds() for row in rows)
+    await _record_relay_stats(len(done_ids), len(failed_ids) - dropped, dropped, lag_seconds)
+    return {"rows": len(rows), "books": len(latest), "written": len(written)}
+
+
+async def run_outbox_relay(
+    batch_size: Optional[int] = None,
+    poll_interval: Optional[float] = None,
+    once: bool = False
+):
+    """
+    Drains the outbox continuously, sleeping poll_interval whenever a batch comes back
+    short or fails. With once, returns as soon as the outbox is empty.
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    poll_interval = poll_interval if poll_interval is not None else settings.OUTBOX_RELAY_POLL_SECONDS
+    print(f"Outbox relay started (batch size {batch_size}, poll interval {poll_interval}s).")
+
+    while True:
+        try:
+            result = await relay_outbox_batch(batch_size)
+        except Exception as e:
+            print(f"Error relaying outbox batch: {type(e).__name__} - {e}")
+            await asyncio.sleep(poll_interval)
+            continue
+
+        if result["rows"]:
+            print(f"Relayed {result['written']}/{result['books']} books from {result['rows']} outbox rows.")
+        elif once:
+            return
+        if result["rows"] < batch_size or not result["written"]:
+            await asyncio.sleep(poll_interval)
+
+
+async def tag_outbox_task(db: AsyncSession, task_id: Optional[str]):
+    """Makes the outbox rows written by the current transaction carry task_id."""
+    if task_id:
+        await db.execute(text("SELECT set_config('app.scrape_task_id', :task_id, true)"), {"task_id": task_id})
+
+
+async def wait_for_task_rows(task_id: str, timeout: Optional[float] = None) -> bool:
+    """
+    Waits until the relay has handled every outbox row of the task, for at most timeout
+    seconds (TASK_EVENTS_INDEX_WAIT_SECONDS by default). Returns whether it got there.
+    """
+    timeout = timeout if timeout is not None else settings.TASK_EVENTS_INDEX_WAIT_SECONDS
+    deadline = time.monotonic() + timeout
+    while True:
+        async with AsyncSessionLocal() as db:
+            pending = (await db.execute(
+                select(func.count(SearchOutbox.id)).where(SearchOutbox.task_id == task_id)
+            )).scalar_one()
+        if not pending:
+            return True
+        if time.monotonic() >= deadline:
+            print(f"{pending} outbox rows of task {task_id} still pending after {timeout}s.")
+            return False
+        await asyncio.sleep(TASK_WAIT_POLL_SECONDS)
+
+
+async def requeue_dead_letters() -> int:
+    """
+    Moves every dead-lettered book back into the outbox as an index operation (the relay
+    turns it into a delete if the book is gone) and returns how many books were requeued.
+    """
+    async with AsyncSessionLocal() as db:
+        book_ids = (await db.execute(
+            delete(SearchOutboxDeadLetter).returning(SearchOutboxDeadLetter.book_id)
+        )).scalars().all()
+        unique_ids = sorted(set(book_ids))
+        if unique_ids:
+            await db.execute(insert(SearchOutbox), [{"book_id": book_id, "op": OUTBOX_INDEX} for book_id in unique_ids])
+        await db.commit()
+    print(f"Requeued {len(unique_ids)} dead-lettered books into the search outbox.")
+    return len(unique_ids)
+
+
+async def clear_dead_letters_before(cutoff) -> int:
+    """Drops dead letters created before cutoff, once a full reindex has covered them."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(SearchOutboxDeadLetter).where(SearchOutboxDeadLetter.created_at < cutoff))
+        await db.commit()
+    return result.rowcount
+
+
+async def get_outbox_stats() -> Dict[str, Any]:
+    """Returns the outbox backlog, the age of its oldest row, the dead letters and the relay counters."""
+    async with AsyncSessionLocal() as db:
+        pending, oldest_age = (await db.execute(
+            select(func.count(SearchOutbox.id), func.now() - func.min(SearchOutbox.created_at))
+        )).one()
+        dead_letters = (await db.execute(select(func.count(SearchOutboxDeadLetter.id)))).scalar_one()
+    values = await get_redis_client().mget(RELAYED_KEY, FAILED_KEY, DROPPED_KEY, LAST_LAG_KEY)
+    relayed, failed, dropped = (int(v or 0) for v in values[:3])
+    return {
+        "pending": pending,
+        "oldest_pending_age_seconds": round(oldest_age.total_seconds(), 3) if oldest_age else 0.0,
+        "last_relay_lag_seconds": float(values[3] or 0),
+        "relayed": relayed,
+        "failed": failed,
+        "dropped": dropped,
+        "dead_letters": dead_letters,
+        "batch_size": settings.OUTBOX_RELAY_BATCH_SIZE,
+        "max_attempts": settings.OUTBOX_MAX_ATTEMPTS,
+    }
@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from app.core.db import AsyncSessionLocal
+from app.models.author import Author
+from app.models.book import Book as BookModel
+from app.models.genre import Genre
+from app.services.search_serializer import PUBLIC_BOOK_FIELDS
+
+# Must match the configuration the search_vector triggers were created with.
+TS_CONFIG = "english"
+
+
+def _filter_values(value: Any) -> List[str]:
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return sorted({str(v).strip().lower() for v in values if v is not None and str(v).strip()})
+
+
+def _apply_filters(stmt, filters: Dict[str, Any] | None):
+    """Applies the filters search_books_in_es supports; names and codes match case-insensitively."""
+    for field, value in (filters or {}).items():
+        if value is None:
+            continue
+        if field == "min_year" and isinstance(value, int):
+            stmt = stmt.where(BookModel.year_published >= value)
+        elif field == "max_year" and isinstance(value, int):
+            stmt = stmt.where(BookModel.year_published <= value)
+        elif field == "min_rating" and isinstance(value, (int, float)):
+            stmt = stmt.where(BookModel.average_rating >= value)
+        elif field == "author" and _filter_values(value):
+            stmt = stmt.where(BookModel.authors.any(func.lower(Author.name).in_(_filter_values(value))))
+        elif field == "genre" and _filter_values(value):
+            stmt = stmt.where(BookModel.genres.any(func.lower(Genre.name).in_(_filter_values(value))))
+        elif field == "language" and _filter_values(value):
+            stmt = stmt.where(func.lower(BookModel.language).in_(_filter_values(value)))
+        elif field == "age_rating" and _filter_values(value):
+            stmt = stmt.where(func.lower(BookModel.age_rating).in_(_filter_values(value)))
+    return stmt
+
+
+def _order_by(sort_by: str | None, rank) -> List[Any]:
+    """Mirrors _build_sort in search_service: optional field sort, then relevance, then id."""
+    field_map = {
+        "rating": BookModel.average_rating,
+        "year": BookModel.year_published,
+        "size": BookModel.book_size_pages,
+        "title": func.regexp_replace(func.lower(BookModel.title), "^(the|a|an) ", ""),
+    }
+    order_by: List[Any] = []
+    if sort_by and sort_by != "relevance":
+        order = "desc"
+        sort_field = sort_by
+        if sort_by.endswith("_asc"):
+            order, sort_field = "asc", sort_by[:-4]
+        elif sort_by.endswith("_desc"):
+            order, sort_field = "desc", sort_by[:-5]
+        column = field_map.get(sort_field)
+        if column is not None:
+            order_by.append(column.asc().nulls_last() if order == "asc" else column.desc().nulls_last())
+
+    if rank is not None:
+        order_by.append(rank.desc())
+    order_by.append(BookModel.id.asc())
+    return order_by
+
+
+def _to_source(book: BookModel) -> Dict[str, Any]:
+    """Shapes a book like the Elasticsearch _source documents the search endpoints serialize."""
+    source = {field: getattr(book, field) for field in PUBLIC_BOOK_FIELDS}
+    source["id"] = str(book.id)
+    source["authors"] = [{"id": str(a.id), "name": a.name} for a in book.authors]
+    source["genres"] = [{"id": str(g.id), "name": g.name} for g in book.genres]
+    return source
+
+
+async def search_books_in_pg(
+    query: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    sort_by: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    exact_total: bool = True
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Searches the books table with the weighted search_vector, supporting the same
+    filters and sort_by values as search_books_in_es. The query is parsed with
+    websearch_to_tsquery, so all terms are required like the ES default operator.
+    """
+    stmt = select(BookModel)
+    rank = None
+    if query and query.strip():
+        ts_query = func.websearch_to_tsquery(TS_CONFIG, query)
+        stmt = stmt.where(BookModel.search_vector.op("@@")(ts_query))
+        rank = func.ts_rank_cd(BookModel.search_vector, ts_query)
+    stmt = _apply_filters(stmt, filters)
+
+    async with AsyncSessionLocal() as db:
+        total_hits = None
+        if exact_total:
+            total_hits = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+
+        result = await db.execute(
+            stmt.options(selectinload(BookModel.authors), selectinload(BookModel.genres))
+            .order_by(*_order_by(sort_by, rank))
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        books = result.scalars().all()
+
+    return [_to_source(book) for book in books], total_hits
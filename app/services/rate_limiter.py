@@ -0,0 +1,77 @@
+import asyncio
+import time
+from functools import lru_cache
+from typing import Dict
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+BUCKET_KEY_PREFIX = "ratelimit:bucket:"
+
+# Reserves one token and returns how long the caller must wait before using it.
+# The balance may go negative: each caller reserves the next free slot, so waiters
+# are paced exactly at `rate` without polling. Redis server time keeps every
+# worker on the same clock.
+RESERVE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+def _parse_rate_limits(raw: str) -> Dict[str, float]:
+    limits = {}
+    for part in raw.split(","):
+        if "=" in part:
+            source, rate = part.split("=", 1)
+            limits[source.strip()] = float(rate)
+    return limits
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket shared by every task and worker through Redis. If Redis is
+    unreachable it degrades to an in-process bucket with the same rate.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _reserve_locally(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - 1
+        self._updated = now
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self):
+        """Waits until this caller's request fits in the bucket's quota."""
+        try:
+            wait = float(await get_redis_client().eval(
+                RESERVE_TOKEN_SCRIPT, 1, BUCKET_KEY_PREFIX + self.name, self.rate, self.capacity
+            ))
+        except Exception as e:
+            print(f"Rate limiter for {self.name} falling back to local bucket: {e}")
+            wait = self._reserve_locally()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@lru_cache()
+def get_rate_limiter(source: str) -> TokenBucketLimiter:
+    rate = _parse_rate_limits(settings.EXTERNAL_API_RATE_LIMITS).get(source, settings.EXTERNAL_API_DEFAULT_RATE)
+    return TokenBucketLimiter(source, rate=rate, capacity=settings.EXTERNAL_API_BURST)
@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.redis import get_redis_client
+from app.models.book import Book as BookModel
+from app.services.scrape_dispatch import (
+    DISPATCHED,
+    LAST_REFRESHED_KEY,
+    POPULARITY_KEY,
+    normalize_query,
+    schedule_refresh_scrape,
+)
+
+BUDGET_KEY_PREFIX = "refresh:budget:"
+# Every refresh query hits each source once per searched field.
+CALLS_PER_QUERY = 4
+# Candidates fetched per slot, since some are skipped as recently refreshed.
+CANDIDATE_FACTOR = 3
+
+
+async def _reserve_budget(wanted_calls: int) -> int:
+    """Takes up to wanted_calls from this hour's upstream call budget and returns how many were granted."""
+    key = f"{BUDGET_KEY_PREFIX}{int(time.time() // 3600)}"
+    redis = get_redis_client()
+    used = await redis.incrby(key, wanted_calls)
+    await redis.expire(key, 7200)
+    granted = max(0, min(wanted_calls, settings.REFRESH_CALL_BUDGET_PER_HOUR - (used - wanted_calls)))
+    if granted < wanted_calls:
+        await redis.decrby(key, wanted_calls - granted)
+    return granted
+
+
+async def refund_budget(calls: int):
+    """Returns calls to the current hour's upstream call budget."""
+    if calls > 0:
+        await get_redis_client().decrby(f"{BUDGET_KEY_PREFIX}{int(time.time() // 3600)}", calls)
+
+
+async def _recently_refreshed(queries: List[str], min_age_seconds: float) -> set[str]:
+    if not queries:
+        return set()
+    scores = await get_redis_client().zmscore(LAST_REFRESHED_KEY, queries)
+    cutoff = time.time() - min_age_seconds
+    return {q for q, score in zip(queries, scores) if score is not None and score > cutoff}
+
+
+async def _popular_queries(limit: int, min_age_seconds: float) -> List[str]:
+    candidates = [q.decode() for q in await get_redis_client().zrevrange(POPULARITY_KEY, 0, limit * CANDIDATE_FACTOR - 1)]
+    skip = await _recently_refreshed(candidates, min_age_seconds)
+    return [q for q in candidates if q not in skip][:limit]
+
+
+async def _stale_book_queries(limit: int, min_age_seconds: float, exclude: set[str]) -> List[str]:
+    """Titles of the least recently updated books, used as their refresh query."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(BookModel.title)
+            .where(BookModel.updated_at < cutoff)
+            .order_by(BookModel.updated_at, BookModel.id)
+            .limit(limit * CANDIDATE_FACTOR)
+        )
+        titles = list(dict.fromkeys(normalize_query(t) for t in result.scalars().all() if t))
+    titles = [t for t in titles if t not in exclude]
+    skip = await _recently_refreshed(titles, min_age_seconds)
+    return [t for t in titles if t not in skip][:limit]
+
+
+async def schedule_refreshes() -> Dict[str, Any]:
+    """
+    Picks popular queries and the stalest books that were not refreshed within
+    REFRESH_MIN_AGE_HOURS and dispatches their scrapes on the refresh queue.
+    Each run spends at most its share of REFRESH_CALL_BUDGET_PER_HOUR (also capped by what
+    is left of the hour's budget) and spaces the tasks evenly over the run interval.
+    The delayed tasks only claim their query once they start, so they never hold up a
+    user search for the same query.
+    """
+    interval = settings.REFRESH_INTERVAL_SECONDS
+    min_age_seconds = settings.REFRESH_MIN_AGE_HOURS * 3600
+    run_share = settings.REFRESH_CALL_BUDGET_PER_HOUR * interval // 3600
+    calls = await _reserve_budget(max(run_share, CALLS_PER_QUERY))
+    slots = calls // CALLS_PER_QUERY
+    if not slots:
+        print("Refresh budget for this hour is spent, nothing scheduled.")
+        return {"scheduled": 0, "budget_calls": calls}
+
+    await get_redis_client().zremrangebyscore(LAST_REFRESHED_KEY, 0, time.time() - min_age_seconds)
+
+    popular = await _popular_queries(int(slots * settings.REFRESH_POPULAR_SHARE), min_age_seconds)
+    stale = await _stale_book_queries(slots - len(popular), min_age_seconds, exclude=set(popular))
+    queries = popular + stale
+
+    scheduled = 0
+    spacing = interval / len(queries) if queries else 0
+    for i, query in enumerate(queries):
+        _, status = await schedule_refresh_scrape(query, countdown=i * spacing)
+        if status == DISPATCHED:
+            scheduled += 1
+
+    await refund_budget((slots - scheduled) * CALLS_PER_QUERY)
+
+    print(f"Scheduled {scheduled} refreshes ({len(popular)} popular, {len(stale)} stale) over {interval}s.")
+    return {
+        "scheduled": scheduled,
+        "popular": len(popular),
+        "stale": len(stale),
+        "budget_calls": calls,
+        "spacing_seconds": round(spacing, 1),
+    }
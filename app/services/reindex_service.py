@@ -0,0 +1,247 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from elasticsearch.helpers import async_bulk
+from sqlalchemy import func
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.es import (
+    BOOKS_INDEX_VERSION,
+    create_versioned_index,
+    get_alias_targets,
+    get_es_client,
+    parse_index_version,
+    swap_alias,
+    versioned_index_name,
+)
+from app.models.book import Book as BookModel
+from app.services.outbox_relay import (
+    clear_dead_letters_before,
+    start_reindex_tracking,
+    stop_reindex_tracking,
+    take_reindex_touched_books,
+)
+from app.services.search_cache import invalidate_search_cache
+from app.services.es_documents import prepare_book_for_es
+
+UUID_SPACE = 2 ** 128
+MAX_CATCH_UP_ROUNDS = 5
+CATCH_UP_SETTLED_THRESHOLD = 100
+
+
+def _slice_bounds(slice_no: int, slices: int) -> tuple[Optional[uuid.UUID], Optional[uuid.UUID]]:
+    """Splits the UUID primary key space into contiguous, index-friendly ranges."""
+    lower = uuid.UUID(int=slice_no * UUID_SPACE // slices) if slice_no > 0 else None
+    upper = uuid.UUID(int=(slice_no + 1) * UUID_SPACE // slices) if slice_no < slices - 1 else None
+    return lower, upper
+
+
+async def _bulk_into(index_name: str, books: List[BookModel]) -> int:
+    actions = [
+        {
+            "_op_type": "index",
+            "_index": index_name,
+            "_id": str(book.id),
+            "_source": prepare_book_for_es(book)
+        }
+        for book in books
+    ]
+    success, failed = await async_bulk(
+        get_es_client(), actions, raise_on_error=False, raise_on_exception=False, max_retries=3
+    )
+    if failed:
+        print(f"Failed to index {len(failed)} books into {index_name}: {failed[:5]}...")
+    return success
+
+
+async def _load_slice(index_name: str, slice_no: int, slices: int, chunk_size: int) -> int:
+    """Copies one primary-key range of the books table into index_name, paging by id."""
+    lower, upper = _slice_bounds(slice_no, slices)
+    indexed = 0
+    last_id = lower
+    first_page = True
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            stmt = select(BookModel).options(
+                selectinload(BookModel.authors),
+                selectinload(BookModel.genres)
+            ).order_by(BookModel.id).limit(chunk_size)
+            if last_id is not None:
+                stmt = stmt.where(BookModel.id >= last_id if first_page else BookModel.id > last_id)
+            if upper is not None:
+                stmt = stmt.where(BookModel.id < upper)
+
+            books = (await db.execute(stmt)).scalars().all()
+            if not books:
+                break
+
+            indexed += await _bulk_into(index_name, books)
+            last_id = books[-1].id
+            first_page = False
+            db.expunge_all()
+
+    print(f"Slice {slice_no + 1}/{slices} indexed {indexed} books into {index_name}.")
+    return indexed
+
+
+async def _db_now() -> datetime:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.now()))).scalar_one()
+
+
+async def _catch_up(index_name: str, chunk_size: int) -> int:
+    """
+    Re-copies every book the search outbox saw change since the previous round into
+    index_name, deleting the documents of books that are gone. Returns how many books
+    were touched.
+    """
+    book_ids = await take_reindex_touched_books()
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(book_ids), chunk_size):
+            chunk = book_ids[start:start + chunk_size]
+            books = (await db.execute(
+                select(BookModel).options(
+                    selectinload(BookModel.authors),
+                    selectinload(BookModel.genres)
+                ).where(BookModel.id.in_(chunk))
+            )).scalars().all()
+            if books:
+                await _bulk_into(index_name, books)
+            missing = set(chunk) - {book.id for book in books}
+            if missing:
+                await async_bulk(
+                    get_es_client(),
+                    [{"_op_type": "delete", "_index": index_name, "_id": str(book_id)} for book_id in missing],
+                    raise_on_error=False, raise_on_exception=False
+                )
+            db.expunge_all()
+    return len(book_ids)
+
+
+async def _prune_deleted(index_name: str, chunk_size: int) -> int:
+    """
+    Deletes the documents of index_name whose book no longer exists, such as books
+    deleted or merged after their slice was copied. Pages through the ids in order.
+    """
+    client = get_es_client()
+    await client.indices.refresh(index=index_name)
+    pruned = 0
+    search_after = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            response = await client.search(
+                index=index_name,
+                query={"match_all": {}},
+                sort=[{"id": "asc"}],
+                search_after=search_after,
+                size=chunk_size,
+                source=False
+            )
+            hits = response["hits"]["hits"]
+            if not hits:
+                break
+            search_after = hits[-1]["sort"]
+
+            ids = [hit["_id"] for hit in hits]
+            result = await db.execute(select(BookModel.id).where(BookModel.id.in_([uuid.UUID(i) for i in ids])))
+            existing = {str(book_id) for book_id in result.scalars().all()}
+            missing = [i for i in ids if i not in existing]
+            if missing:
+                success, _ = await async_bulk(
+                    client,
+                    [{"_op_type": "delete", "_index": index_name, "_id": i} for i in missing],
+                    raise_on_error=False, raise_on_exception=False
+                )
+                pruned += success
+    return pruned
+
+
+async def _next_index_version() -> int:
+    client = get_es_client()
+    existing = await client.indices.get(index=f"{settings.ELASTICSEARCH_INDEX_NAME}_v*", allow_no_indices=True)
+    versions = [v for v in (parse_index_version(name) for name in existing.keys()) if v is not None]
+    return max([BOOKS_INDEX_VERSION] + [v + 1 for v in versions])
+
+
+async def reindex_books(slices: int = 4, chunk_size: int = 500, delete_old: bool = False) -> Dict[str, Any]:
+    """
+    Builds a new versioned books index from Postgres and atomically swaps the alias to it.
+
+    The new index is filled by `slices` concurrent primary-key ranges with replicas and
+    refresh disabled. Every book the search outbox relay handles meanwhile is recorded and
+    caught up (re-copied, or deleted if gone) until few changes remain, which covers
+    association changes and renames as well as book writes; documents of deleted books
+    are also pruned by id. After the alias swap, one last catch-up and prune cover writes
+    that landed on the old index in between. Outbox dead letters from before the
+    rebuild started are covered by it and cleared.
+    """
+    client = get_es_client()
+    alias = settings.ELASTICSEARCH_INDEX_NAME
+    started = time.monotonic()
+
+    old_indices = await get_alias_targets(client)
+    legacy_index = not old_indices and await client.indices.exists(index=alias)
+    replicas = "1"
+    source_index = old_indices[0] if old_indices else (alias if legacy_index else None)
+    if source_index:
+        current = await client.indices.get_settings(index=source_index, name="index.number_of_replicas")
+        replicas = current[source_index]["settings"]["index"]["number_of_replicas"]
+
+    new_index = versioned_index_name(await _next_index_version())
+    print(f"Building {new_index} with {slices} slices (currently serving: {old_indices or source_index})...")
+    await create_versioned_index(client, new_index, bulk_load=True)
+
+    rebuild_started = await _db_now()
+    await start_reindex_tracking()
+    try:
+        loaded = await asyncio.gather(*(_load_slice(new_index, i, slices, chunk_size) for i in range(slices)))
+        total_loaded = sum(loaded)
+
+        await client.indices.put_settings(
+            index=new_index,
+            settings={"number_of_replicas": replicas, "refresh_interval": "1s"}
+        )
+
+        caught_up = 0
+        for round_no in range(MAX_CATCH_UP_ROUNDS):
+            changed = await _catch_up(new_index, chunk_size)
+            caught_up += changed
+            print(f"Catch-up round {round_no + 1}: re-indexed {changed} changed books.")
+            if changed < CATCH_UP_SETTLED_THRESHOLD:
+                break
+
+        pruned = await _prune_deleted(new_index, chunk_size)
+        await client.indices.refresh(index=new_index)
+        await swap_alias(client, new_index, old_indices, remove_legacy_index=legacy_index)
+        print(f"Alias {alias} now points to {new_index}.")
+
+        caught_up += await _catch_up(new_index, chunk_size)
+        pruned += await _prune_deleted(new_index, chunk_size)
+        await invalidate_search_cache()
+        cleared = await clear_dead_letters_before(rebuild_started)
+        if cleared:
+            print(f"Cleared {cleared} outbox dead letters covered by the rebuild.")
+
+        if delete_old and old_indices:
+            await client.indices.delete(index=",".join(old_indices))
+            print(f"Deleted old indices: {old_indices}")
+
+        elapsed = time.monotonic() - started
+        print(f"Reindex complete: {total_loaded} loaded, {caught_up} caught up, {pruned} pruned in {elapsed:.1f}s.")
+        return {
+            "index": new_index,
+            "previous_indices": old_indices or ([alias] if legacy_index else []),
+            "loaded": total_loaded,
+            "caught_up": caught_up,
+            "pruned": pruned,
+            "elapsed_seconds": round(elapsed, 1),
+        }
+    finally:
+        await stop_reindex_tracking()
@@ -0,0 +1,188 @@
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.queues import INTERACTIVE_QUEUE, REFRESH_QUEUE, queue_options
+from app.core.redis import get_redis_client
+
+SCRAPE_TASK_NAME = "app.tasks.scrape.process_search_query"
+
+INFLIGHT_KEY_PREFIX = "scrape:inflight:"
+FRESH_KEY_PREFIX = "scrape:fresh:"
+DISPATCHED_KEY = "scrape:stats:dispatched"
+SUPPRESSED_IN_FLIGHT_KEY = "scrape:stats:suppressed_in_flight"
+SUPPRESSED_FRESH_KEY = "scrape:stats:suppressed_fresh"
+POPULARITY_KEY = "scrape:query_popularity"
+LAST_REFRESHED_KEY = "scrape:last_refreshed"
+# Only the most requested queries are kept in the popularity ranking.
+MAX_TRACKED_QUERIES = 10000
+
+DISPATCHED = "dispatched"
+IN_FLIGHT = "in_flight"
+FRESH = "fresh"
+SKIPPED = "skipped"
+
+# Releases the in-flight claim only if it still belongs to the finishing task.
+RELEASE_CLAIM_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _query_digest(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode()).hexdigest()
+
+
+def _send_scrape_task(
+    query: str,
+    task_id: Optional[str] = None,
+    queue: str = INTERACTIVE_QUEUE,
+    countdown: Optional[float] = None,
+    refresh: bool = False
+) -> str:
+    result = celery_app.send_task(
+        SCRAPE_TASK_NAME, args=[query], kwargs={"refresh": True} if refresh else None,
+        task_id=task_id, **queue_options(queue, countdown=countdown)
+    )
+    return result.id
+
+
+async def _record_popularity(query: str):
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.zincrby(POPULARITY_KEY, 1, normalize_query(query))
+            pipe.zremrangebyrank(POPULARITY_KEY, 0, -MAX_TRACKED_QUERIES - 1)
+            await pipe.execute()
+    except Exception as e:
+        print(f"Error recording popularity for query '{query}': {e}")
+
+
+async def dispatch_scrape(
+    query: str,
+    queue: str = INTERACTIVE_QUEUE,
+    countdown: Optional[float] = None,
+    record_popularity: bool = True
+) -> Tuple[Optional[str], str]:
+    """
+    Dispatches a scrape for the query unless one is already running or finished
+    within the freshness window, keyed on the normalized query.
+    Returns the task id callers can follow and whether it was dispatched, already
+    in flight, or suppressed because the query is fresh.
+    User searches also count towards the query's popularity for the refresh scheduler.
+    """
+    if not normalize_query(query):
+        return None, SKIPPED
+
+    digest = _query_digest(query)
+    redis = get_redis_client()
+    task_id = str(uuid.uuid4())
+    if record_popularity:
+        await _record_popularity(query)
+
+    try:
+        fresh_task_id = await redis.get(FRESH_KEY_PREFIX + digest)
+        if fresh_task_id:
+            await redis.incr(SUPPRESSED_FRESH_KEY)
+            return fresh_task_id.decode(), FRESH
+
+        claimed = await redis.set(
+            INFLIGHT_KEY_PREFIX + digest, task_id, nx=True, ex=settings.SCRAPE_INFLIGHT_TTL_SECONDS
+        )
+        if not claimed:
+            running_task_id = await redis.get(INFLIGHT_KEY_PREFIX + digest)
+            await redis.incr(SUPPRESSED_IN_FLIGHT_KEY)
+            return (running_task_id.decode() if running_task_id else None), IN_FLIGHT
+    except Exception as e:
+        print(f"Scrape dispatch guard unavailable, dispatching without it: {e}")
+        return _send_scrape_task(query, queue=queue, countdown=countdown), DISPATCHED
+
+    _send_scrape_task(query, task_id=task_id, queue=queue, countdown=countdown)
+    await redis.incr(DISPATCHED_KEY)
+    return task_id, DISPATCHED
+
+
+async def schedule_refresh_scrape(query: str, countdown: Optional[float] = None) -> Tuple[Optional[str], str]:
+    """
+    Queues a delayed refresh scrape on the refresh queue without taking the in-flight
+    claim, so user searches in the meantime dispatch their own interactive scrape instead
+    of waiting on a task that has not started. The task claims the query when it runs
+    (see claim_refresh_scrape) and skips itself if the query is fresh or in flight by then.
+    """
+    if not normalize_query(query):
+        return None, SKIPPED
+
+    digest = _query_digest(query)
+    redis = get_redis_client()
+    try:
+        fresh_task_id, running_task_id = await redis.mget(FRESH_KEY_PREFIX + digest, INFLIGHT_KEY_PREFIX + digest)
+    except Exception as e:
+        print(f"Scrape dispatch guard unavailable, not scheduling refresh for query '{query}': {e}")
+        return None, SKIPPED
+    if fresh_task_id:
+        return fresh_task_id.decode(), FRESH
+    if running_task_id:
+        return running_task_id.decode(), IN_FLIGHT
+
+    task_id = _send_scrape_task(query, queue=REFRESH_QUEUE, countdown=countdown, refresh=True)
+    await redis.incr(DISPATCHED_KEY)
+    return task_id, DISPATCHED
+
+
+async def claim_refresh_scrape(query: str, task_id: str) -> bool:
+    """
+    Takes the in-flight claim for a refresh task that is about to run. Returns False when
+    the query became fresh or another scrape holds the claim, in which case the refresh
+    is skipped.
+    """
+    digest = _query_digest(query)
+    redis = get_redis_client()
+    try:
+        if await redis.get(FRESH_KEY_PREFIX + digest):
+            return False
+        return bool(await redis.set(
+            INFLIGHT_KEY_PREFIX + digest, task_id, nx=True, ex=settings.SCRAPE_INFLIGHT_TTL_SECONDS
+        ))
+    except Exception as e:
+        print(f"Scrape dispatch guard unavailable, refreshing query '{query}' without it: {e}")
+        return True
+
+
+async def mark_scrape_finished(query: str, task_id: str, fresh: bool):
+    """
+    Releases the in-flight claim for the query if this task holds it. Successful scrapes
+    leave a freshness record so repeats within SCRAPE_FRESHNESS_TTL_SECONDS are not
+    dispatched again.
+    """
+    digest = _query_digest(query)
+    redis = get_redis_client()
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            if fresh:
+                pipe.set(FRESH_KEY_PREFIX + digest, task_id, ex=settings.SCRAPE_FRESHNESS_TTL_SECONDS)
+                pipe.zadd(LAST_REFRESHED_KEY, {normalize_query(query): time.time()})
+            pipe.eval(RELEASE_CLAIM_SCRIPT, 1, INFLIGHT_KEY_PREFIX + digest, task_id)
+            await pipe.execute()
+    except Exception as e:
+        print(f"Error releasing scrape dispatch guard for query '{query}': {e}")
+
+
+async def get_scrape_dispatch_stats() -> Dict[str, Any]:
+    values = await get_redis_client().mget(DISPATCHED_KEY, SUPPRESSED_IN_FLIGHT_KEY, SUPPRESSED_FRESH_KEY)
+    dispatched, suppressed_in_flight, suppressed_fresh = (int(v or 0) for v in values)
+    return {
+        "dispatched": dispatched,
+        "suppressed": suppressed_in_flight + suppressed_fresh,
+        "suppressed_in_flight": suppressed_in_flight,
+        "suppressed_fresh": suppressed_fresh,
+        "inflight_ttl_seconds": settings.SCRAPE_INFLIGHT_TTL_SECONDS,
+        "freshness_ttl_seconds": settings.SCRAPE_FRESHNESS_TTL_SECONDS,
+    }
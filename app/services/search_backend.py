@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+ELASTICSEARCH = "elasticsearch"
+POSTGRES = "postgres"
+
+WINDOW_SIZE = 50
+MIN_SAMPLES = 10
+
+
+class SearchBackendSelector:
+    """
+    Tracks the latency and errors of recent Elasticsearch searches in this process and
+    decides when to fail over to Postgres. Once the error rate or p95 latency over the
+    last WINDOW_SIZE searches passes its threshold, Elasticsearch is bypassed for
+    SEARCH_FAILOVER_COOLDOWN_SECONDS; after that it gets traffic again with a clean window.
+    """
+
+    def __init__(self):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=WINDOW_SIZE)
+        self._failed_over_until = 0.0
+        self.failovers = 0
+
+    def use_elasticsearch(self) -> bool:
+        if settings.SEARCH_BACKEND == POSTGRES:
+            return False
+        if settings.SEARCH_BACKEND == ELASTICSEARCH:
+            return True
+        return time.monotonic() >= self._failed_over_until
+
+    def allow_fallback(self) -> bool:
+        return settings.SEARCH_BACKEND != ELASTICSEARCH
+
+    def record(self, latency: float, ok: bool):
+        self._samples.append((latency, ok))
+        if len(self._samples) < MIN_SAMPLES:
+            return
+        error_rate = sum(1 for _, sample_ok in self._samples if not sample_ok) / len(self._samples)
+        latencies = sorted(latency for latency, _ in self._samples)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        if error_rate >= settings.SEARCH_FAILOVER_ERROR_RATE or p95 >= settings.SEARCH_FAILOVER_P95_SECONDS:
+            print(f"Elasticsearch unhealthy (error rate {error_rate:.0%}, p95 {p95:.2f}s), failing over to Postgres "
+                  f"for {settings.SEARCH_FAILOVER_COOLDOWN_SECONDS}s.")
+            self._failed_over_until = time.monotonic() + settings.SEARCH_FAILOVER_COOLDOWN_SECONDS
+            self._samples.clear()
+            self.failovers += 1
+
+    async def timed(self, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Runs an Elasticsearch search under SEARCH_ES_TIMEOUT_SECONDS and records how it went."""
+        started = time.monotonic()
+        try:
+            payload = await asyncio.wait_for(compute(), timeout=settings.SEARCH_ES_TIMEOUT_SECONDS)
+        except Exception:
+            self.record(time.monotonic() - started, ok=False)
+            raise
+        self.record(time.monotonic() - started, ok=True)
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        remaining: Optional[float] = self._failed_over_until - time.monotonic()
+        return {
+            "mode": settings.SEARCH_BACKEND,
+            "active": ELASTICSEARCH if self.use_elasticsearch() else POSTGRES,
+            "failed_over_for_seconds": round(remaining, 1) if remaining and remaining > 0 else None,
+            "failovers": self.failovers,
+            "window_samples": len(self._samples),
+            "window_errors": sum(1 for _, ok in self._samples if not ok),
+        }
+
+
+search_backend = SearchBackendSelector()
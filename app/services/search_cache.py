@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+GENERATION_KEY = "search_cache:generation"
+ENTRY_KEY_PREFIX = "search_cache:entry:"
+REFRESH_LOCK_PREFIX = "search_cache:refresh:"
+HITS_KEY = "search_cache:stats:hits"
+STALE_HITS_KEY = "search_cache:stats:stale_hits"
+MISSES_KEY = "search_cache:stats:misses"
+
+REFRESH_LOCK_TTL_SECONDS = 30
+
+# Deletes the refresh lock only if it still holds the caller's token, so a refresh that
+# outlived its lock TTL cannot release a lock another worker has since taken.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_background_refreshes: Set[asyncio.Task] = set()
+
+
+def make_search_cache_key(
+    query: str | None,
+    filters: Dict[str, Any] | None,
+    sort_by: str | None,
+    page: int,
+    page_size: int,
+    **options: Any
+) -> str:
+    """Builds a cache key from the normalized search parameters and any extra search options."""
+    normalized_filters = {}
+    for field, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(str(v) for v in value)
+        normalized_filters[field] = value
+
+    normalized = {
+        "query": " ".join(query.split()) if query else None,
+        "filters": normalized_filters,
+        "sort_by": sort_by or "relevance",
+        "page": page,
+        "page_size": page_size,
+        "options": options,
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{ENTRY_KEY_PREFIX}{digest}"
+
+
+async def _incr(key: str):
+    try:
+        await get_redis_client().incr(key)
+    except Exception as e:
+        print(f"Error updating search cache counter {key}: {e}")
+
+
+async def _store(key: str, generation: int, payload: Dict[str, Any]):
+    entry = {"generation": generation, "stored_at": time.time(), "payload": payload}
+    ttl = settings.SEARCH_CACHE_TTL_SECONDS + settings.SEARCH_CACHE_STALE_TTL_SECONDS
+    try:
+        await get_redis_client().set(key, json.dumps(entry, default=str), ex=ttl)
+    except Exception as e:
+        print(f"Error storing search cache entry {key}: {e}")
+
+
+async def _revalidate(key: str, generation: int, compute: Callable[[], Awaitable[Dict[str, Any]]]):
+    lock_key = REFRESH_LOCK_PREFIX + key[len(ENTRY_KEY_PREFIX):]
+    token = uuid.uuid4().hex
+    redis = get_redis_client()
+    try:
+        if not await redis.set(lock_key, token, nx=True, ex=REFRESH_LOCK_TTL_SECONDS):
+            return
+    except Exception as e:
+        print(f"Error taking search cache refresh lock {lock_key}: {e}")
+        return
+
+    try:
+        payload = await compute()
+        await _store(key, generation, payload)
+    except Exception as e:
+        print(f"Error revalidating search cache entry {key}: {e}")
+    finally:
+        try:
+            await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception:
+            pass
+
+
+def _schedule_revalidation(key: str, generation: int, compute: Callable[[], Awaitable[Dict[str, Any]]]):
+    task = asyncio.create_task(_revalidate(key, generation, compute))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def get_or_compute(key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Returns the cached payload for key, computing and storing it on a miss.
+    Entries older than the fresh TTL are served stale while a single background
+    refresh runs. Entries from an older generation are treated as misses.
+    Exceptions raised by compute are propagated and never cached.
+    """
+    if not settings.SEARCH_CACHE_ENABLED:
+        return await compute()
+
+    try:
+        generation, raw_entry = await get_redis_client().mget(GENERATION_KEY, key)
+    except Exception as e:
+        print(f"Search cache unavailable, bypassing it: {e}")
+        return await compute()
+
+    generation = int(generation or 0)
+    try:
+        entry = json.loads(raw_entry) if raw_entry else None
+    except ValueError as e:
+        print(f"Discarding corrupt search cache entry {key}: {e}")
+        entry = None
+
+    if entry and entry.get("generation") == generation:
+        age = time.time() - entry["stored_at"]
+        if age <= settings.SEARCH_CACHE_TTL_SECONDS:
+            await _incr(HITS_KEY)
+        else:
+            await _incr(STALE_HITS_KEY)
+            _schedule_revalidation(key, generation, compute)
+        return entry["payload"]
+
+    await _incr(MISSES_KEY)
+    payload = await compute()
+    await _store(key, generation, payload)
+    return payload
+
+
+async def invalidate_search_cache():
+    """Bumps the cache generation so every existing entry is treated as a miss."""
+    try:
+        await get_redis_client().incr(GENERATION_KEY)
+    except Exception as e:
+        print(f"Error invalidating search cache: {e}")
+
+
+async def get_search_cache_stats() -> Dict[str, Any]:
+    """Returns hit/miss counters and the current generation of the search cache."""
+    values = await get_redis_client().mget(HITS_KEY, STALE_HITS_KEY, MISSES_KEY, GENERATION_KEY)
+    hits, stale_hits, misses, generation = (int(v or 0) for v in values)
+    lookups = hits + stale_hits + misses
+    return {
+        "enabled": settings.SEARCH_CACHE_ENABLED,
+        "hits": hits,
+        "stale_hits": stale_hits,
+        "misses": misses,
+        "hit_ratio": round((hits + stale_hits) / lookups, 4) if lookups else 0.0,
+        "generation": generation,
+        "ttl_seconds": settings.SEARCH_CACHE_TTL_SECONDS,
+        "stale_ttl_seconds": settings.SEARCH_CACHE_STALE_TTL_SECONDS,
+    }
@@ -0,0 +1,40 @@
+from typing import Any, Dict, List
+
+# Field order of BookPublic; documents are mapped straight to this shape so the
+# search endpoints can skip building and re-validating pydantic models per hit.
+PUBLIC_BOOK_FIELDS = [
+    "title",
+    "year_published",
+    "summary",
+    "age_rating",
+    "language",
+    "book_size_pages",
+    "book_size_description",
+    "average_rating",
+    "rating_details",
+    "source_url",
+    "isbn_10",
+    "isbn_13",
+    "id",
+]
+
+# What search requests fetch from _source: the public fields plus the nested id/name pairs.
+PUBLIC_SOURCE_FIELDS = PUBLIC_BOOK_FIELDS + ["authors.id", "authors.name", "genres.id", "genres.name"]
+
+
+def _id_name_pairs(items: Any) -> List[Dict[str, Any]]:
+    if not isinstance(items, list):
+        return []
+    return [{"id": item.get("id"), "name": item.get("name")} for item in items if isinstance(item, dict)]
+
+
+def to_public_book(source: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps an Elasticsearch _source document to the BookPublic response shape."""
+    book = {field: source.get(field) for field in PUBLIC_BOOK_FIELDS}
+    book["authors"] = _id_name_pairs(source.get("authors"))
+    book["genres"] = _id_name_pairs(source.get("genres"))
+    return book
+
+
+def to_public_books(sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [to_public_book(source) for source in sources]
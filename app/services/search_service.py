@@ -1,112 +1,142 @@
 from elasticsearch import AsyncElasticsearch, NotFoundError
-from elasticsearch.helpers import async_bulk
 from app.core.config import settings
-from app.core.es import get_es_client
+from app.core.es import BOOKS_INDEX_VERSION, get_es_client, get_live_index_version
 from app.schemas.book import Book as BookSchema
 from app.models.book import Book as BookModel
-from typing import List, Dict, Any, Tuple
-
-def _prepare_book_for_es(book: BookModel) -> Dict[str, Any]:
-    """Converts a SQLAlchemy Book model to an Elasticsearch document dict."""
-    authors = [{"id": str(a.id), "name": a.name} for a in book.authors]
-    genres = [{"id": str(g.id), "name": g.name} for g in book.genres]
-
-    search_text_parts = [book.title or ""]
-    search_text_parts.extend(a["name"] for a in authors)
-    search_text_parts.extend(g["name"] for g in genres)
-    search_text_parts.append(book.summary or "")
-    search_text = " ".join(filter(None, search_text_parts))
-
-    title_sort = book.title.lower()
-    for article in ["the ", "a ", "an "]:
-        if title_sort.startswith(article):
-            title_sort = title_sort[len(article):]
-            break
-
-    doc = {
-        "id": str(book.id),
-        "title": book.title,
-        "title_sort": title_sort,
-        "authors": authors,
-        "year_published": book.year_published,
-        "genres": genres,
-        "summary": book.summary,
-        "age_rating": book.age_rating,
-        "language": book.language,
-        "book_size_pages": book.book_size_pages,
-        "average_rating": book.average_rating,
-        "isbn_13": book.isbn_13,
-        "search_text": search_text
-    }
-    return {k: v for k, v in doc.items() if v is not None}
+from app.services.index_writer import BulkIndexWriter
+from app.services.pg_search_service import search_books_in_pg
+from app.services.search_backend import search_backend
+from app.services.search_cache import get_or_compute, make_search_cache_key
+from app.services.search_serializer import PUBLIC_SOURCE_FIELDS
+from typing import List, Dict, Any, Tuple, Optional
+import base64
+import json
+
+CURSOR_START = "*"
+PIT_KEEP_ALIVE = "1m"
 
+LANDING_FACETS_CACHE_KEY = "search_cache:facets:landing"
+FACET_TERMS_SIZE = 50
+YEAR_HISTOGRAM_INTERVAL = 10
+RATING_FACET_RANGES = [
+    {"key": "4+", "from": 4},
+    {"key": "3+", "from": 3},
+    {"key": "2+", "from": 2},
+    {"key": "1+", "from": 1},
+]
+
+FACET_AGGREGATIONS: Dict[str, Any] = {
+    "genres": {
+        "nested": {"path": "genres"},
+        "aggs": {"names": {
+            "terms": {"field": "genres.name.keyword", "size": FACET_TERMS_SIZE},
+            "aggs": {"books": {"reverse_nested": {}}}
+        }}
+    },
+    "authors": {
+        "nested": {"path": "authors"},
+        "aggs": {"names": {
+            "terms": {"field": "authors.name.keyword", "size": FACET_TERMS_SIZE},
+            "aggs": {"books": {"reverse_nested": {}}}
+        }}
+    },
+    "language": {"terms": {"field": "language", "size": FACET_TERMS_SIZE}},
+    "age_rating": {"terms": {"field": "age_rating", "size": FACET_TERMS_SIZE}},
+    "year_published": {
+        "histogram": {"field": "year_published", "interval": YEAR_HISTOGRAM_INTERVAL, "min_doc_count": 1}
+    },
+    "average_rating": {"range": {"field": "average_rating", "ranges": RATING_FACET_RANGES}},
+}
 
 async def index_book(book: BookModel):
     """Indexes or updates a single book in Elasticsearch."""
-    client = get_es_client()
-    index_name = settings.ELASTICSEARCH_INDEX_NAME
-    doc_id = str(book.id)
-    document = _prepare_book_for_es(book)
-
     try:
-        await client.index(index=index_name, id=doc_id, document=document)
-        print(f"Indexed book {doc_id} ({book.title})")
+        async with BulkIndexWriter() as writer:
+            await writer.index_book(book)
     except Exception as e:
-        print(f"Error indexing book {doc_id}: {e}")
+        print(f"Error indexing book {book.id}: {e}")
 
 
 async def bulk_index_books(books: List[BookModel]):
     """Indexes a list of books using Elasticsearch bulk API."""
-    client = get_es_client()
-    index_name = settings.ELASTICSEARCH_INDEX_NAME
-
-    actions = [
-        {
-            "_op_type": "index",
-            "_index": index_name,
-            "_id": str(book.id),
-            "_source": _prepare_book_for_es(book)
-        }
-        for book in books
-    ]
-
-    if not actions:
+    if not books:
         return
 
     try:
-        success, failed = await async_bulk(client, actions, raise_on_error=False, raise_on_exception=False)
-        print(f"Bulk indexed {success} books.")
-        if failed:
-            print(f"Failed to index {len(failed)} books: {failed[:5]}...")
+        async with BulkIndexWriter(max_batch_size=500) as writer:
+            for book in books:
+                await writer.index_book(book)
+        print(f"Bulk indexed {writer.indexed} books.")
+        if writer.failed:
+            print(f"Failed to index {writer.failed} books.")
     except Exception as e:
         print(f"Error during bulk indexing: {e}")
 
 
 async def delete_book_from_index(book_id: str):
      """Deletes a book from the Elasticsearch index."""
-     client = get_es_client()
-     index_name = settings.ELASTICSEARCH_INDEX_NAME
      try:
-         await client.delete(index=index_name, id=book_id)
-         print(f"Deleted book {book_id} from index")
-     except NotFoundError:
-          print(f"Book {book_id} not found in index for deletion.")
+         async with BulkIndexWriter() as writer:
+             await writer.delete_book(book_id)
      except Exception as e:
          print(f"Error deleting book {book_id} from index: {e}")
 
 
-async def search_books_in_es(
-    query: str | None = None,
-    filters: Dict[str, Any] | None = None,
-    sort_by: str | None = None,
-    page: int = 1,
-    page_size: int = 20
-) -> Tuple[List[Dict[str, Any]], int]:
-    """Performs search and filtering in Elasticsearch."""
-    client = get_es_client()
-    index_name = settings.ELASTICSEARCH_INDEX_NAME
+# Filters match case- and accent-insensitively on the normalized keyword sub-fields.
+# Several values for one filter are OR-ed; different filters are AND-ed.
+NESTED_FILTER_FIELDS = {
+    "author": ("authors", "authors.name.normalized"),
+    "genre": ("genres", "genres.name.normalized"),
+}
+TERMS_FILTER_FIELDS = {
+    "language": "language.normalized",
+    "age_rating": "age_rating.normalized",
+}
+# Indices older than version 2 have no normalized sub-fields (and the legacy index not
+# even a name keyword), so they are filtered with phrase matches on the analyzed names
+# and exact terms on the plain keywords until scripts/reindex_es.py has run.
+LEGACY_NESTED_FILTER_FIELDS = {
+    "author": ("authors", "authors.name"),
+    "genre": ("genres", "genres.name"),
+}
+LEGACY_TERMS_FILTER_FIELDS = {
+    "language": "language",
+    "age_rating": "age_rating",
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or its point-in-time has expired."""
+
+
+def _filter_values(value: Any) -> List[str]:
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return sorted({str(v).strip() for v in values if v is not None and str(v).strip()})
+
+
+def _nested_filter(field: str, values: List[str], index_version: int) -> Dict[str, Any]:
+    if index_version >= BOOKS_INDEX_VERSION:
+        path, es_field = NESTED_FILTER_FIELDS[field]
+        return {"nested": {"path": path, "query": {"terms": {es_field: values}}}}
+    path, es_field = LEGACY_NESTED_FILTER_FIELDS[field]
+    return {"nested": {"path": path, "query": {"bool": {
+        "should": [{"match_phrase": {es_field: v}} for v in values],
+        "minimum_should_match": 1
+    }}}}
+
+
+def _terms_filter(field: str, values: List[str], index_version: int) -> Dict[str, Any]:
+    if index_version >= BOOKS_INDEX_VERSION:
+        return {"terms": {TERMS_FILTER_FIELDS[field]: values}}
+    return {"terms": {LEGACY_TERMS_FILTER_FIELDS[field]: sorted(set(values) | {v.lower() for v in values})}}
+
+
+def _build_es_query(
+    query: str | None,
+    filters: Dict[str, Any] | None,
+    index_version: int = BOOKS_INDEX_VERSION
+) -> Dict[str, Any]:
     es_query: Dict[str, Any] = {"bool": {"must": [], "filter": []}}
-    sort_criteria: List[Any] = []
 
     if query:
         es_query["bool"]["must"].append({
@@ -130,15 +160,24 @@ async def search_books_in_es(
                  es_query["bool"]["filter"].append({"range": {"year_published": {"lte": value}}})
             elif field == "min_rating" and isinstance(value, (int, float)):
                  es_query["bool"]["filter"].append({"range": {"average_rating": {"gte": value}}})
-            elif field in ["genre", "language", "author", "age_rating"]:
-                 es_field = "genres" if field == "genre" else \
-                            "authors" if field == "author" else \
-                            field
-                 es_query["bool"]["filter"].append({"term": {es_field: value}})
+            elif field in NESTED_FILTER_FIELDS:
+                 values = _filter_values(value)
+                 if values:
+                     es_query["bool"]["filter"].append(_nested_filter(field, values, index_version))
+            elif field in TERMS_FILTER_FIELDS:
+                 values = _filter_values(value)
+                 if values:
+                     es_query["bool"]["filter"].append(_terms_filter(field, values, index_version))
 
     if not es_query["bool"]["filter"]:
         del es_query["bool"]["filter"]
 
+    return es_query
+
+
+def _build_sort(sort_by: str | None) -> List[Any]:
+    """Builds the sort criteria, always ending with `id` as a stable tiebreaker."""
+    sort_criteria: List[Any] = []
 
     if sort_by and sort_by != "relevance":
         field_map = {
@@ -161,22 +200,262 @@ async def search_books_in_es(
             sort_criteria.append({es_sort_field: {"order": order, "missing": "_last"}})
 
     sort_criteria.append({"_score": {"order": "desc"}})
+    sort_criteria.append({"id": {"order": "asc"}})
+    return sort_criteria
 
+
+def _encode_cursor(pit_id: str, search_after: List[Any]) -> str:
+    raw = json.dumps({"pit": pit_id, "after": search_after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
     try:
-        response = await client.search(
-            index=index_name,
-            query=es_query,
-            sort=sort_criteria,
-            from_=(page - 1) * page_size,
-            size=page_size,
-            track_total_hits=True
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return data["pit"], data["after"]
+    except Exception:
+        raise InvalidCursorError("Malformed pagination cursor")
+
+
+def _parse_facets(aggregations: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Flattens the facet aggregations into {facet: [{"key": ..., "count": ...}]}."""
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+    for name in ("genres", "authors"):
+        buckets = aggregations.get(name, {}).get("names", {}).get("buckets", [])
+        facets[name] = [{"key": b["key"], "count": b["books"]["doc_count"]} for b in buckets]
+    for name in ("language", "age_rating", "average_rating"):
+        buckets = aggregations.get(name, {}).get("buckets", [])
+        facets[name] = [{"key": b["key"], "count": b["doc_count"]} for b in buckets]
+    buckets = aggregations.get("year_published", {}).get("buckets", [])
+    facets["year_published"] = [{"key": int(b["key"]), "count": b["doc_count"]} for b in buckets]
+    return facets
+
+
+async def _execute_search(
+    query: str | None,
+    filters: Dict[str, Any] | None,
+    sort_by: str | None,
+    page: int,
+    page_size: int,
+    exact_total: bool,
+    with_facets: bool = False
+) -> Dict[str, Any]:
+    """Runs the search against Elasticsearch. Raises on errors so they are never cached."""
+    client = get_es_client()
+    index_name = settings.ELASTICSEARCH_INDEX_NAME
+
+    response = await client.search(
+        index=index_name,
+        query=_build_es_query(query, filters, await get_live_index_version(client)),
+        sort=_build_sort(sort_by),
+        from_=(page - 1) * page_size,
+        size=page_size,
+        track_total_hits=exact_total,
+        aggs=FACET_AGGREGATIONS if with_facets else None,
+        source=PUBLIC_SOURCE_FIELDS
+    )
+
+    hits = response['hits']['hits']
+    payload = {
+        "results": [hit['_source'] for hit in hits],
+        "total_hits": response['hits']['total']['value'] if exact_total else None,
+    }
+    if with_facets:
+        payload["facets"] = _parse_facets(response.get("aggregations", {}))
+    return payload
+
+
+async def search_books_in_es(
+    query: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    sort_by: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    exact_total: bool = True
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Performs search and filtering in Elasticsearch, served through the search cache.
+    When Elasticsearch errors or the backend selector has failed over, the search runs
+    against Postgres full-text search instead (uncached, so recovery is immediate).
+    The total is None when exact_total is False.
+    """
+    if search_backend.use_elasticsearch():
+        cache_key = make_search_cache_key(query, filters, sort_by, page, page_size, exact_total=exact_total)
+
+        async def compute() -> Dict[str, Any]:
+            return await search_backend.timed(
+                lambda: _execute_search(query, filters, sort_by, page, page_size, exact_total)
+            )
+
+        try:
+            payload = await get_or_compute(cache_key, compute)
+            return payload["results"], payload["total_hits"]
+        except Exception as e:
+            print(f"Error searching Elasticsearch: {type(e).__name__} - {e}")
+
+    if search_backend.allow_fallback():
+        try:
+            return await search_books_in_pg(query, filters, sort_by, page, page_size, exact_total)
+        except Exception as e:
+            print(f"Error searching Postgres: {e}")
+    return [], 0 if exact_total else None
+
+
+async def search_books_with_facets(
+    query: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    sort_by: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    exact_total: bool = True
+) -> Tuple[List[Dict[str, Any]], Optional[int], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Like search_books_in_es, but also returns genre, author, language, age rating,
+    year and rating facets computed by the same Elasticsearch request.
+    Facets for the empty, unfiltered query are cached once for every page and sort order.
+    """
+    is_landing = not (query and query.strip()) and not any(v is not None for v in (filters or {}).values())
+
+    if not search_backend.use_elasticsearch():
+        results, total_hits = await search_books_in_es(query, filters, sort_by, page, page_size, exact_total)
+        return results, total_hits, {}
+
+    try:
+        if is_landing:
+            results, total_hits = await search_books_in_es(query, filters, sort_by, page, page_size, exact_total)
+
+            async def compute_landing_facets() -> Dict[str, Any]:
+                payload = await search_backend.timed(
+                    lambda: _execute_search(None, None, None, 1, 0, False, with_facets=True)
+                )
+                return payload["facets"]
+
+            facets = await get_or_compute(LANDING_FACETS_CACHE_KEY, compute_landing_facets)
+            return results, total_hits, facets
+
+        cache_key = make_search_cache_key(
+            query, filters, sort_by, page, page_size, exact_total=exact_total, with_facets=True
         )
 
-        hits = response['hits']['hits']
-        total_hits = response['hits']['total']['value']
-        results = [hit['_source'] for hit in hits]
-        return results, total_hits
+        async def compute() -> Dict[str, Any]:
+            return await search_backend.timed(
+                lambda: _execute_search(query, filters, sort_by, page, page_size, exact_total, with_facets=True)
+            )
+
+        payload = await get_or_compute(cache_key, compute)
+        return payload["results"], payload["total_hits"], payload["facets"]
 
+    except Exception as e:
+        print(f"Error searching Elasticsearch: {type(e).__name__} - {e}")
+        if not search_backend.allow_fallback():
+            return [], 0 if exact_total else None, {}
+        # Facets are an Elasticsearch feature; the Postgres fallback returns results only.
+        try:
+            results, total_hits = await search_books_in_pg(query, filters, sort_by, page, page_size, exact_total)
+            return results, total_hits, {}
+        except Exception as pg_e:
+            print(f"Error searching Postgres: {pg_e}")
+            return [], 0 if exact_total else None, {}
+
+
+SUGGEST_SOURCE_FIELDS = ["id", "title", "authors.id", "authors.name"]
+
+
+async def suggest_books(prefix: str, size: int = 5) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Returns title and author completions for a typed prefix from the completion
+    suggester fields, fetching only the ids and display strings from _source.
+    """
+    client = get_es_client()
+    index_name = settings.ELASTICSEARCH_INDEX_NAME
+    suggest = {
+        "titles": {
+            "prefix": prefix,
+            "completion": {"field": "title_suggest", "size": size, "skip_duplicates": True}
+        },
+        "authors": {
+            "prefix": prefix,
+            "completion": {"field": "author_suggest", "size": size, "skip_duplicates": True}
+        },
+    }
+
+    try:
+        response = await client.search(index=index_name, suggest=suggest, source=SUGGEST_SOURCE_FIELDS, size=0)
+    except Exception as e:
+        print(f"Error fetching suggestions from Elasticsearch: {e}")
+        return {"titles": [], "authors": []}
+
+    titles = [
+        {"id": option["_source"]["id"], "text": option["_source"]["title"]}
+        for option in response["suggest"]["titles"][0]["options"]
+    ]
+
+    authors = []
+    for option in response["suggest"]["authors"][0]["options"]:
+        matched_name = option["text"]
+        author = next((a for a in option["_source"].get("authors", []) if a.get("name") == matched_name), None)
+        if author:
+            authors.append({"id": author["id"], "text": matched_name})
+
+    return {"titles": titles, "authors": authors}
+
+
+async def search_books_by_cursor(
+    query: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    sort_by: str | None = None,
+    cursor: str = CURSOR_START,
+    page_size: int = 20,
+    exact_total: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+    """
+    Pages through search results with search_after over a point-in-time.
+    Pass CURSOR_START to open a new point-in-time; every following page is fetched
+    with the cursor returned by the previous call. The returned cursor is None once
+    the last page has been served. Raises InvalidCursorError for bad or expired cursors.
+    """
+    client = get_es_client()
+    index_name = settings.ELASTICSEARCH_INDEX_NAME
+
+    if cursor == CURSOR_START:
+        search_after = None
+        try:
+            pit = await client.open_point_in_time(index=index_name, keep_alive=PIT_KEEP_ALIVE)
+        except Exception as e:
+            print(f"Error opening point-in-time on Elasticsearch: {e}")
+            return [], None, None
+        pit_id = pit["id"]
+    else:
+        pit_id, search_after = _decode_cursor(cursor)
+
+    try:
+        response = await client.search(
+            pit={"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+            query=_build_es_query(query, filters, await get_live_index_version(client)),
+            sort=_build_sort(sort_by),
+            search_after=search_after,
+            size=page_size,
+            track_total_hits=exact_total,
+            source=PUBLIC_SOURCE_FIELDS
+        )
+    except NotFoundError:
+        raise InvalidCursorError("Pagination cursor has expired")
     except Exception as e:
         print(f"Error searching Elasticsearch: {e}")
-        return [], 0
\ No newline at end of file
+        return [], None, None
+
+    hits = response['hits']['hits']
+    total_hits = response['hits']['total']['value'] if exact_total else None
+    pit_id = response.get("pit_id", pit_id)
+
+    if len(hits) < page_size:
+        try:
+            await client.close_point_in_time(id=pit_id)
+        except Exception as e:
+            print(f"Error closing point-in-time: {e}")
+        next_cursor = None
+    else:
+        next_cursor = _encode_cursor(pit_id, hits[-1]["sort"])
+
+    return [hit['_source'] for hit in hits], total_hits, next_cursor
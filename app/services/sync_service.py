@@ -0,0 +1,178 @@
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from elasticsearch.helpers import async_streaming_bulk
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.es import get_es_client
+from app.core.redis import get_redis_client
+from app.models.book import Book as BookModel
+from app.services.search_cache import invalidate_search_cache
+from app.services.es_documents import prepare_book_for_es
+
+CHECKPOINT_KEY_PREFIX = "es_sync:checkpoint:"
+
+Checkpoint = Tuple[datetime, uuid.UUID]
+
+
+async def load_sync_checkpoint(index_name: str) -> Optional[Checkpoint]:
+    raw = await get_redis_client().get(CHECKPOINT_KEY_PREFIX + index_name)
+    if not raw:
+        return None
+    data = json.loads(raw)
+    return datetime.fromisoformat(data["updated_at"]), uuid.UUID(data["id"])
+
+
+async def save_sync_checkpoint(index_name: str, checkpoint: Checkpoint):
+    updated_at, book_id = checkpoint
+    value = json.dumps({"updated_at": updated_at.isoformat(), "id": str(book_id)})
+    await get_redis_client().set(CHECKPOINT_KEY_PREFIX + index_name, value)
+
+
+async def reset_sync_checkpoint(index_name: str):
+    await get_redis_client().delete(CHECKPOINT_KEY_PREFIX + index_name)
+
+
+async def stream_books(
+    db: AsyncSession,
+    after: Optional[Checkpoint] = None,
+    chunk_size: int = 500
+) -> AsyncIterator[BookModel]:
+    """
+    Streams books with their authors and genres in (updated_at, id) order through a
+    server-side cursor, loading relationships one chunk at a time.
+    The caller is expected to expunge processed books to keep the session small.
+    """
+    stmt = select(BookModel).options(
+        selectinload(BookModel.authors),
+        selectinload(BookModel.genres)
+    ).order_by(BookModel.updated_at, BookModel.id).execution_options(yield_per=chunk_size)
+    if after is not None:
+        stmt = stmt.where(tuple_(BookModel.updated_at, BookModel.id) > tuple_(*after))
+
+    result = await db.stream(stmt)
+    async for book in result.scalars():
+        yield book
+
+
+def _item_id(info: Dict[str, Any]) -> Optional[str]:
+    details = next(iter(info.values()), {}) if info else {}
+    return details.get("_id") if isinstance(details, dict) else None
+
+
+async def sync_books_to_es(
+    resume: bool = True,
+    chunk_size: int = 500,
+    bulk_chunk_size: int = 500,
+    max_chunk_bytes: int = 10 * 1024 * 1024,
+    checkpoint_every: int = 5000,
+    index_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Streams the whole books table into Elasticsearch with bounded memory.
+
+    Books are read `chunk_size` at a time from a server-side cursor and fed as a
+    generator into async_streaming_bulk, which keeps one bulk request of at most
+    `bulk_chunk_size` docs / `max_chunk_bytes` in flight. The (updated_at, id) of the
+    last book acknowledged in order is checkpointed in Redis every `checkpoint_every`
+    docs, so an interrupted sync resumes where it stopped. The checkpoint stops
+    advancing at the first failed document so a resume retries it.
+    """
+    client = get_es_client()
+    index_name = index_name or settings.ELASTICSEARCH_INDEX_NAME
+
+    checkpoint = await load_sync_checkpoint(index_name) if resume else None
+    if checkpoint:
+        print(f"Resuming sync into {index_name} after updated_at={checkpoint[0].isoformat()}, id={checkpoint[1]}")
+    else:
+        await reset_sync_checkpoint(index_name)
+        print(f"Starting full sync into {index_name}")
+
+    # Positions of docs handed to the bulk helper, in stream order, until they are acknowledged.
+    in_flight: Deque[Tuple[str, Checkpoint]] = deque()
+    acknowledged: Set[str] = set()
+
+    async def actions() -> AsyncIterator[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            streamed = 0
+            async for book in stream_books(db, after=checkpoint, chunk_size=chunk_size):
+                doc_id = str(book.id)
+                in_flight.append((doc_id, (book.updated_at, book.id)))
+                yield {
+                    "_op_type": "index",
+                    "_index": index_name,
+                    "_id": doc_id,
+                    "_source": prepare_book_for_es(book)
+                }
+                streamed += 1
+                if streamed % chunk_size == 0:
+                    db.expunge_all()
+
+    indexed = 0
+    failed = 0
+    safe_checkpoint = checkpoint
+    checkpoint_frozen = False
+    started = time.monotonic()
+    last_report = started
+
+    async for ok, info in async_streaming_bulk(
+        client,
+        actions(),
+        chunk_size=bulk_chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
+        max_retries=3,
+        initial_backoff=2,
+        raise_on_error=False,
+        raise_on_exception=False
+    ):
+        if ok:
+            indexed += 1
+        else:
+            failed += 1
+            checkpoint_frozen = True
+            if failed <= 5:
+                print(f"Failed to index document: {info}")
+
+        doc_id = _item_id(info)
+        if doc_id is not None:
+            acknowledged.add(doc_id)
+        while in_flight and in_flight[0][0] in acknowledged:
+            acked_id, position = in_flight.popleft()
+            acknowledged.discard(acked_id)
+            if not checkpoint_frozen:
+                safe_checkpoint = position
+
+        processed = indexed + failed
+        if processed % checkpoint_every == 0:
+            if safe_checkpoint and not checkpoint_frozen:
+                await save_sync_checkpoint(index_name, safe_checkpoint)
+            now = time.monotonic()
+            rate = checkpoint_every / (now - last_report) if now > last_report else 0.0
+            last_report = now
+            print(f"Synced {processed} docs ({rate:.0f} docs/s, {failed} failed)")
+
+    if safe_checkpoint and not checkpoint_frozen:
+        await save_sync_checkpoint(index_name, safe_checkpoint)
+    if indexed:
+        await invalidate_search_cache()
+
+    elapsed = time.monotonic() - started
+    throughput = indexed / elapsed if elapsed > 0 else 0.0
+    print(f"Sync finished: {indexed} indexed, {failed} failed in {elapsed:.1f}s ({throughput:.0f} docs/s).")
+    return {
+        "index": index_name,
+        "indexed": indexed,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 1),
+        "docs_per_second": round(throughput, 1),
+        "resumed": checkpoint is not None,
+    }
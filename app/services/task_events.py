@@ -0,0 +1,88 @@
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+EVENTS_KEY_PREFIX = "task_events:"
+PROGRESS = "progress"
+BOOKS = "books"
+DONE = "done"
+
+KEEPALIVE_SECONDS = 15
+
+# Numbers the event, appends it to the capped replay log and publishes it, atomically,
+# so a subscriber that replays the log and then listens sees every event exactly once.
+PUBLISH_EVENT_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+local event = cjson.encode({seq = seq, type = ARGV[1], data = cjson.decode(ARGV[2])})
+redis.call('RPUSH', KEYS[2], event)
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[3]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', KEYS[3], event)
+return seq
+"""
+
+
+def _keys(task_id: str) -> tuple[str, str, str]:
+    prefix = f"{EVENTS_KEY_PREFIX}{task_id}"
+    return f"{prefix}:seq", f"{prefix}:log", prefix
+
+
+async def publish_task_event(task_id: Optional[str], event_type: str, data: Dict[str, Any]):
+    """Publishes a progress event for a scrape task. Failures are logged and never break the task."""
+    if not task_id:
+        return
+    try:
+        await get_redis_client().eval(
+            PUBLISH_EVENT_SCRIPT, 3, *_keys(task_id),
+            event_type, json.dumps(data, default=str),
+            settings.TASK_EVENTS_REPLAY_SIZE, settings.TASK_EVENTS_TTL_SECONDS
+        )
+    except Exception as e:
+        print(f"Error publishing {event_type} event for task {task_id}: {e}")
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def stream_task_events(task_id: str, last_event_id: int = 0) -> AsyncIterator[str]:
+    """
+    Yields the task's events as server-sent-event frames, starting after `last_event_id`.
+    Subscribes before replaying the log so nothing published in between is lost, and
+    drops duplicates by sequence number. Ends after the 'done' event or the stream timeout.
+    """
+    redis = get_redis_client()
+    _, log_key, channel = _keys(task_id)
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(channel)
+    deadline = time.monotonic() + settings.TASK_EVENTS_STREAM_TIMEOUT_SECONDS
+    last_seq = last_event_id
+
+    try:
+        for raw in await redis.lrange(log_key, 0, -1):
+            event = json.loads(raw)
+            if event["seq"] > last_seq:
+                last_seq = event["seq"]
+                yield format_sse(event)
+                if event["type"] == DONE:
+                    return
+
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            event = json.loads(message["data"])
+            if event["seq"] <= last_seq:
+                continue
+            last_seq = event["seq"]
+            yield format_sse(event)
+            if event["type"] == DONE:
+                return
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.aclose()
@@ -0,0 +1,14 @@
+from typing import Any, Dict
+
+from app.core.async_runtime import run_coroutine
+from app.core.celery_app import celery_app
+from app.services.refresh_scheduler import schedule_refreshes
+
+
+@celery_app.task
+def schedule_refresh_batch() -> Dict[str, Any]:
+    """
+    Periodic (Celery beat) task that spreads the next interval's refresh scrapes
+    over the refresh queue within the hourly upstream call budget.
+    """
+    return run_coroutine(schedule_refreshes())
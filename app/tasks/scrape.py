@@ -1,22 +1,39 @@
 import time
-import random
 import asyncio
 import httpx
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from urllib.parse import urlencode
 import traceback
 
+from app.core.async_runtime import run_coroutine
 from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.core.db import AsyncSessionLocal
-from app.crud.crud_book import find_existing_book, create_book, update_book
-from app.schemas.book import BookCreate, BookUpdate
-from app.services.search_service import index_book
+from app.core.http import get_http_client
+from app.crud.crud_book import book_identity_key, bulk_upsert_books
+from app.schemas.book import BookCreate
+from app.services.backfill import load_completed_queries, mark_queries_completed
+from app.services.outbox_relay import tag_outbox_task, wait_for_task_rows
+from app.services.refresh_scheduler import CALLS_PER_QUERY, refund_budget
+from app.services.scrape_dispatch import claim_refresh_scrape, mark_scrape_finished, normalize_query
+from app.services.task_events import DONE, PROGRESS, publish_task_event
+from app.services.rate_limiter import get_rate_limiter
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.external_cache import (
+    cached_data,
+    get_cached_response,
+    is_fresh,
+    mark_revalidated,
+    revalidation_headers,
+    store_response,
+)
 
 DEFAULT_MAX_RESULTS_PER_CALL = 5
 SEARCH_SOURCES = ["openlib", "google"]
 SEARCH_FIELDS = ["author", "title"]
+INGEST_CHUNK_SIZE = 50
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 
 def parse_external_book(book_data: Dict[str, Any], authors_map: Dict[str, str], genres_map: Dict[str, str], book_author_rels: Dict[str, List[str]], book_genre_rels: Dict[str, List[str]]) -> Optional[BookCreate]:
     """
@@ -81,46 +98,275 @@ async def _fetch_from_external_api(
     source: str,
     params: Dict[str, Any]
 ) -> Optional[Dict[str, Any]]:
-    """Makes a single call to the external API and returns the 'data' part or None on error."""
+    """
+    Makes a single call to the external API and returns the 'data' part, an empty dict
+    for a valid response without results, or None on error. Fresh cached responses
+    (including cached empty results) are returned without an upstream call; stale ones
+    are revalidated with the stored ETag/Last-Modified when available.
+    Calls go through the source's circuit breaker, which fails fast while the upstream is
+    unhealthy (serving the stale cached response if there is one), picks the timeout from
+    observed latency and grants jittered retries for timeouts, transport errors and 5xx/429.
+    Waits for the source's shared rate limiter first, so calls can be issued concurrently.
+    """
     base_url = settings.EXTERNAL_SEARCH_API_BASE_URL
     if not base_url:
         return None
 
     encoded_params = urlencode({k: v for k, v in params.items() if v is not None})
     api_url = f"{base_url}/api/search/{source}?{encoded_params}"
-    print(f"--> Calling external API: {api_url}")
 
-    try:
-        response = await client.get(api_url)
-        response.raise_for_status()
-        raw_data = response.json()
-        print(f"<-- API call successful for: {api_url} (status: {response.status_code})")
-        if raw_data and "data" in raw_data:
-            return raw_data["data"]
-        else:
-            print(f"Warning: Invalid or empty data structure received from {api_url}")
+    cached = await get_cached_response(source, params)
+    if cached and is_fresh(cached):
+        print(f"--- Cache hit for: {api_url}")
+        return cached_data(cached)
+
+    breaker = get_circuit_breaker(source)
+    attempt = 0
+    while True:
+        try:
+            timeout = await breaker.acquire()
+        except CircuitOpenError as e:
+            print(f"Skipping API call to {api_url}: {e}")
+            return cached_data(cached) if cached else None
+
+        try:
+            await get_rate_limiter(source).acquire()
+            print(f"--> Calling external API: {api_url} (timeout {timeout:.1f}s)")
+            started = time.monotonic()
+            response = await client.get(api_url, headers=revalidation_headers(cached), timeout=timeout)
+            if response.status_code in RETRYABLE_STATUSES:
+                response.raise_for_status()
+            await breaker.record_success(time.monotonic() - started)
+
+            if response.status_code == 304 and cached:
+                print(f"<-- Not modified, reusing cached response for: {api_url}")
+                await mark_revalidated(source, params, cached)
+                return cached_data(cached)
+            response.raise_for_status()
+            raw_data = response.json()
+            print(f"<-- API call successful for: {api_url} (status: {response.status_code})")
+            if not isinstance(raw_data, dict) or "data" not in raw_data or not isinstance(raw_data["data"] or {}, dict):
+                # Malformed responses are errors and are never cached.
+                print(f"Warning: Invalid data structure received from {api_url}")
+                return None
+            data = raw_data["data"] or {}
+            await store_response(
+                source, params, data,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+            return data
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            print(f"Error: {type(e).__name__} calling {api_url}")
+            await breaker.record_failure()
+        except httpx.HTTPStatusError as e:
+            print(f"Error: HTTP error calling {api_url}: {e.response.status_code} - {e.request.url}")
+            if e.response.status_code not in RETRYABLE_STATUSES:
+                return None
+            await breaker.record_failure()
+        except (httpx.RequestError, json.JSONDecodeError) as e:
+            print(f"Error: Failed to call or parse response from {api_url}: {type(e).__name__} - {e}")
             return None
-    except httpx.TimeoutException:
-        print(f"Error: Timeout occurred calling {api_url}")
-        return None
-    except httpx.HTTPStatusError as e:
-        print(f"Error: HTTP error calling {api_url}: {e.response.status_code} - {e.request.url}")
-        return None
-    except (httpx.RequestError, json.JSONDecodeError) as e:
-        print(f"Error: Failed to call or parse response from {api_url}: {type(e).__name__} - {e}")
-        return None
-    except Exception as e:
-        print(f"Error: Unexpected error during API call to {api_url}: {type(e).__name__} - {e}")
-        return None
+        except Exception as e:
+            print(f"Error: Unexpected error during API call to {api_url}: {type(e).__name__} - {e}")
+            return None
+
+        if not await breaker.retry_after_failure(attempt):
+            return None
+        attempt += 1
+        print(f"Retrying {api_url} (attempt {attempt + 1})")
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=120)
-async def process_search_query(self, query: str):
+def process_search_query(self, query: str, refresh: bool = False):
     """
     Celery task to fetch book data from multiple external API sources (Google, OpenLib)
     searching by both author and title using the provided query.
     It aggregates results, saves/updates them in the database, and indexes in Elasticsearch.
     Ensures the return value is always pickleable, even on failure.
+    Runs on the worker process's shared event loop, so concurrent tasks share its clients.
+    Scheduled refreshes (refresh=True) take the dispatch guard only when they start.
+    """
+    return run_coroutine(_process_search_query(self.request.id, query, refresh=refresh))
+
+
+async def _process_search_query(task_id: str, query: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Scrapes the query, then releases the dispatch guard. Only runs in which at least one
+    upstream call succeeded mark it as fresh. A refresh that finds the query fresh or
+    already being scraped is skipped and gives its calls back to the refresh budget.
+    """
+    if refresh and query and query.strip() and not await claim_refresh_scrape(query, task_id):
+        print(f"Skipping refresh of '{query}': already fresh or being scraped.")
+        try:
+            await refund_budget(CALLS_PER_QUERY)
+        except Exception as e:
+            print(f"Error refunding refresh budget for query '{query}': {e}")
+        return {"query": query, "status": "skipped", "message": "Already fresh or in flight"}
+
+    result = await _scrape_query(query, task_id=task_id)
+    if result.get("processed_count"):
+        # The relay publishes the books events once it has indexed the task's books.
+        await wait_for_task_rows(task_id)
+    await publish_task_event(task_id, DONE, result)
+    if query and query.strip():
+        fresh = result["status"] in ("completed", "completed_no_results") and result.get("successful_api_calls", 0) > 0
+        await mark_scrape_finished(query, task_id, fresh=fresh)
+    return result
+
+
+async def _fetch_query(query: str) -> Dict[str, Any]:
+    """
+    Calls every source/field combination for the query concurrently and parses the
+    aggregated results into BookCreate schemas, unique by external book id.
+    """
+    calls: List[Tuple[str, str, Dict[str, Any]]] = []
+    for source in SEARCH_SOURCES:
+        for field in SEARCH_FIELDS:
+            params = {
+                "author": query if field == "author" else None,
+                "title": query if field == "title" else None,
+                "max_results": DEFAULT_MAX_RESULTS_PER_CALL,
+                "language": "en"
+            }
+
+            if not params.get("author") and not params.get("title"):
+                print(f"Skipping API call for source={source}, field={field}: Query resulted in empty params.")
+                continue
+            calls.append((source, field, params))
+
+    client = get_http_client()
+    responses = await asyncio.gather(
+        *(_fetch_from_external_api(client, source, params) for source, _, params in calls)
+    )
+
+    all_books_api: List[Dict[str, Any]] = []
+    all_authors_api: List[Dict[str, Any]] = []
+    all_genres_api: List[Dict[str, Any]] = []
+    all_book_author_rels_api: List[Dict[str, str]] = []
+    all_book_genre_rels_api: List[Dict[str, str]] = []
+    api_calls_made = 0
+    successful_api_calls = 0
+    api_errors_encountered = 0
+
+    for (source, field, _), api_data in zip(calls, responses):
+        api_calls_made += 1
+        if api_data is not None:
+            successful_api_calls += 1
+            all_books_api.extend(api_data.get("books", []))
+            all_authors_api.extend(api_data.get("authors", []))
+            all_genres_api.extend(api_data.get("genres", []))
+            relationships = api_data.get("relationships", {})
+            all_book_author_rels_api.extend(relationships.get("book_authors", []))
+            all_book_genre_rels_api.extend(relationships.get("book_genres", []))
+        else:
+            print(f"API call failed for source={source}, field={field}.")
+            api_errors_encountered += 1
+
+    print(f"Finished API calls for '{query}'. Made: {api_calls_made}, Successful: {successful_api_calls}, Errors: {api_errors_encountered}.")
+    print(f"Aggregated: {len(all_books_api)} books, {len(all_authors_api)} authors, {len(all_genres_api)} genres.")
+
+    authors_map = {a["id"]: a["name"] for a in all_authors_api if "id" in a and "name" in a}
+    genres_map = {g["id"]: g.get("original_name", g.get("name")) for g in all_genres_api if "id" in g and ("name" in g or "original_name" in g)}
+
+    book_author_rels: Dict[str, set[str]] = {}
+    for rel in all_book_author_rels_api:
+        book_id = rel.get("book_id")
+        author_id = rel.get("author_id")
+        if book_id and author_id:
+            book_author_rels.setdefault(book_id, set()).add(author_id)
+
+    book_genre_rels: Dict[str, set[str]] = {}
+    for rel in all_book_genre_rels_api:
+        book_id = rel.get("book_id")
+        genre_id = rel.get("genre_id")
+        if book_id and genre_id:
+            book_genre_rels.setdefault(book_id, set()).add(genre_id)
+
+    book_author_rels_list: Dict[str, List[str]] = {k: list(v) for k, v in book_author_rels.items()}
+    book_genre_rels_list: Dict[str, List[str]] = {k: list(v) for k, v in book_genre_rels.items()}
+
+    unique_books_api: Dict[str, Dict[str, Any]] = {}
+    for book in all_books_api:
+        book_id = book.get("id")
+        if book_id and book_id not in unique_books_api:
+            unique_books_api[book_id] = book
+
+    parsed_books: List[BookCreate] = []
+    failed_parsing_count = 0
+    for book_api_data in unique_books_api.values():
+        book_create_schema = parse_external_book(
+            book_api_data, authors_map, genres_map, book_author_rels_list, book_genre_rels_list
+        )
+        if book_create_schema:
+            parsed_books.append(book_create_schema)
+        else:
+            failed_parsing_count += 1
+
+    return {
+        "books": parsed_books,
+        "books_found": len(all_books_api),
+        "unique_books_fetched": len(unique_books_api),
+        "failed_parsing_count": failed_parsing_count,
+        "api_calls_made": api_calls_made,
+        "successful_api_calls": successful_api_calls,
+        "api_errors_encountered": api_errors_encountered,
+    }
+
+
+async def _ingest_books(
+    books: List[BookCreate],
+    label: str,
+    task_id: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Upserts books in committed chunks. Indexing is left to the search outbox relay,
+    which publishes the task's books events once it has indexed them. The identity keys
+    of books in rolled back chunks are returned under "failed_keys".
     """
+    processed_count = 0
+    created_count = 0
+    updated_count = 0
+    failed_processing_count = 0
+    failed_keys: Set[Tuple] = set()
+
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(books), INGEST_CHUNK_SIZE):
+            chunk = books[start:start + INGEST_CHUNK_SIZE]
+            try:
+                await tag_outbox_task(db, task_id)
+                written_books, created_ids = await bulk_upsert_books(db, chunk)
+                await db.commit()
+            except Exception as chunk_e:
+                failed_processing_count += len(chunk)
+                failed_keys.update(book_identity_key(book) for book in chunk)
+                print(f"Error upserting books {start}-{start + len(chunk)} for {label}: {type(chunk_e).__name__} - {chunk_e}")
+                traceback.print_exc()
+                await db.rollback()
+                continue
+
+            processed_count += len(written_books)
+            created_count += len(created_ids)
+            updated_count += len(written_books) - len(created_ids)
+            print(f"Committed chunk at {processed_count} processed books.")
+            await publish_task_event(task_id, PROGRESS, {
+                "stage": "ingesting",
+                "processed_count": processed_count,
+                "created_count": created_count,
+                "updated_count": updated_count,
+                "failed_processing_count": failed_processing_count,
+                "total": len(books),
+            })
+
+    return {
+        "processed_count": processed_count,
+        "created_count": created_count,
+        "updated_count": updated_count,
+        "failed_processing_count": failed_processing_count,
+        "failed_keys": failed_keys,
+    }
+
+
+async def _scrape_query(query: str, task_id: Optional[str] = None) -> Dict[str, Any]:
     if not query or not query.strip():
         print("Task skipped: Received empty query.")
         return {"query": query, "status": "skipped", "message": "Empty query"}
@@ -128,169 +374,64 @@ async def process_search_query(self, query: str):
     print(f"TASK STARTED for query: '{query}'")
     print(f"Sources: {SEARCH_SOURCES}, Fields: {SEARCH_FIELDS}")
 
-    processed_count = 0
-    created_count = 0
-    updated_count = 0
-    failed_processing_count = 0
-    unique_books_api_count = 0
-    api_calls_made = 0
-    successful_api_calls = 0
-    api_errors_encountered = 0
+    fetched: Dict[str, Any] = {}
+    ingested: Dict[str, int] = {}
 
     try:
-        base_url = settings.EXTERNAL_SEARCH_API_BASE_URL
-        if not base_url:
+        if not settings.EXTERNAL_SEARCH_API_BASE_URL:
             print("Error: EXTERNAL_SEARCH_API_BASE_URL is not configured. Aborting task.")
             return {"query": query, "status": "error", "message": "External API URL not configured"}
 
-        all_books_api: List[Dict[str, Any]] = []
-        all_authors_api: List[Dict[str, Any]] = []
-        all_genres_api: List[Dict[str, Any]] = []
-        all_book_author_rels_api: List[Dict[str, str]] = []
-        all_book_genre_rels_api: List[Dict[str, str]] = []
-        api_calls_made = 0
-        successful_api_calls = 0
-        api_errors_encountered = 0
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            for source in SEARCH_SOURCES:
-                for field in SEARCH_FIELDS:
-                    params = {
-                        "author": query if field == "author" else None,
-                        "title": query if field == "title" else None,
-                        "max_results": DEFAULT_MAX_RESULTS_PER_CALL,
-                        "language": "en"
-                    }
-
-                    if not params.get("author") and not params.get("title"):
-                        print(f"Skipping API call for source={source}, field={field}: Query resulted in empty params.")
-                        continue
-
-                    api_calls_made += 1
-                    api_data = await _fetch_from_external_api(client, source, params)
-
-                    if api_data:
-                        successful_api_calls += 1
-                        all_books_api.extend(api_data.get("books", []))
-                        all_authors_api.extend(api_data.get("authors", []))
-                        all_genres_api.extend(api_data.get("genres", []))
-                        relationships = api_data.get("relationships", {})
-                        all_book_author_rels_api.extend(relationships.get("book_authors", []))
-                        all_book_genre_rels_api.extend(relationships.get("book_genres", []))
-                    else:
-                        print(f"API call failed or returned no data for source={source}, field={field}.")
-                        api_errors_encountered += 1
-
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
-
-        print(f"Finished API calls. Made: {api_calls_made}, Successful: {successful_api_calls}, Errors: {api_errors_encountered}.")
-        print(f"Aggregated: {len(all_books_api)} books, {len(all_authors_api)} authors, {len(all_genres_api)} genres.")
-
-        if not all_books_api:
+        fetched = await _fetch_query(query)
+        await publish_task_event(task_id, PROGRESS, {
+            "stage": "fetched",
+            "api_calls_made": fetched["api_calls_made"],
+            "successful_api_calls": fetched["successful_api_calls"],
+            "api_errors_encountered": fetched["api_errors_encountered"],
+            "books_found": fetched["books_found"],
+        })
+
+        if fetched["api_calls_made"] and not fetched["successful_api_calls"]:
+            # Nothing was fetched, so the run must not mark the query as fresh.
+            print(f"Every external API call failed for query '{query}'.")
+            return {
+                "query": query,
+                "status": "failed",
+                "error_type": "ExternalAPIUnavailable",
+                "error_message": "Every external API call failed or was short-circuited",
+                "api_calls_made": int(fetched["api_calls_made"]),
+                "successful_api_calls": 0,
+                "api_errors_encountered": int(fetched["api_errors_encountered"]),
+            }
+
+        if not fetched["books_found"]:
             print(f"No books found in total for query '{query}' from external APIs.")
             return {
                 "query": query,
                 "status": "completed_no_results",
                 "message": "No books found from APIs",
-                "api_calls_made": int(api_calls_made),
-                "successful_api_calls": int(successful_api_calls),
-                "api_errors_encountered": int(api_errors_encountered),
+                "api_calls_made": int(fetched["api_calls_made"]),
+                "successful_api_calls": int(fetched["successful_api_calls"]),
+                "api_errors_encountered": int(fetched["api_errors_encountered"]),
             }
 
-        authors_map = {a["id"]: a["name"] for a in all_authors_api if "id" in a and "name" in a}
-        genres_map = {g["id"]: g.get("original_name", g.get("name")) for g in all_genres_api if "id" in g and ("name" in g or "original_name" in g)}
-
-        book_author_rels: Dict[str, set[str]] = {}
-        for rel in all_book_author_rels_api:
-            book_id = rel.get("book_id")
-            author_id = rel.get("author_id")
-            if book_id and author_id:
-                book_author_rels.setdefault(book_id, set()).add(author_id)
-
-        book_genre_rels: Dict[str, set[str]] = {}
-        for rel in all_book_genre_rels_api:
-            book_id = rel.get("book_id")
-            genre_id = rel.get("genre_id")
-            if book_id and genre_id:
-                book_genre_rels.setdefault(book_id, set()).add(genre_id)
-
-        book_author_rels_list: Dict[str, List[str]] = {k: list(v) for k, v in book_author_rels.items()}
-        book_genre_rels_list: Dict[str, List[str]] = {k: list(v) for k, v in book_genre_rels.items()}
-
-        unique_books_api: Dict[str, Dict[str, Any]] = {}
-        for book in all_books_api:
-            book_id = book.get("id")
-            if book_id:
-                if book_id not in unique_books_api:
-                     unique_books_api[book_id] = book
-        unique_books_api_count = len(unique_books_api)
-        print(f"Processing {unique_books_api_count} unique books (by ID) after aggregation.")
-
-
-        processed_count = 0
-        created_count = 0
-        updated_count = 0
-        failed_processing_count = 0
-        async with AsyncSessionLocal() as db:
-            for book_api_data in unique_books_api.values():
-                book_create_schema = parse_external_book(
-                    book_api_data, authors_map, genres_map, book_author_rels_list, book_genre_rels_list
-                )
-
-                if not book_create_schema:
-                    failed_processing_count += 1
-                    continue
-
-                try:
-                    existing_book = await find_existing_book(db, book_create_schema)
-
-                    if existing_book:
-                        update_data = BookUpdate(
-                            **book_create_schema.model_dump(exclude_unset=True, exclude={'author_names', 'genre_names'})
-                        )
-                        updated_book = await update_book(db, existing_book, update_data)
-                        await index_book(updated_book)
-                        updated_count += 1
-                    else:
-                        new_book = await create_book(db, book_create_schema)
-                        await index_book(new_book)
-                        created_count += 1
-
-                    processed_count += 1
-                    if processed_count > 0 and processed_count % 10 == 0:
-                        try:
-                            await db.commit()
-                            print(f"Committed batch at {processed_count} processed books.")
-                        except Exception as commit_e:
-                            print(f"ERROR during batch commit at {processed_count}: {type(commit_e).__name__} - {commit_e}")
-                            await db.rollback()
-
-                except Exception as book_process_e:
-                    failed_processing_count += 1
-                    print(f"Error processing book '{book_create_schema.title}' (ID: {book_api_data.get('id')}): {type(book_process_e).__name__} - {book_process_e}")
-                    await db.rollback()
-
-            try:
-                await db.commit()
-                print("Committed final batch.")
-            except Exception as final_commit_e:
-                 print(f"ERROR during final commit for query '{query}': {type(final_commit_e).__name__} - {final_commit_e}")
-                 traceback.print_exc()
-                 await db.rollback()
+        print(f"Processing {fetched['unique_books_fetched']} unique books (by ID) after aggregation.")
+        ingested = await _ingest_books(fetched["books"], label=f"query '{query}'", task_id=task_id)
+        failed_processing_count = ingested["failed_processing_count"] + fetched["failed_parsing_count"]
 
         print(f"TASK FINISHED SUCCESSFULLY for query: '{query}'.")
-        print(f"Results => Processed: {processed_count}, Created: {created_count}, Updated: {updated_count}, Failed (processing): {failed_processing_count} (out of {unique_books_api_count} unique books fetched).")
+        print(f"Results => Processed: {ingested['processed_count']}, Created: {ingested['created_count']}, Updated: {ingested['updated_count']}, Failed (processing): {failed_processing_count} (out of {fetched['unique_books_fetched']} unique books fetched).")
         return {
             "query": str(query),
             "status": "completed",
-            "processed_count": int(processed_count),
-            "created_count": int(created_count),
-            "updated_count": int(updated_count),
+            "processed_count": int(ingested["processed_count"]),
+            "created_count": int(ingested["created_count"]),
+            "updated_count": int(ingested["updated_count"]),
             "failed_processing_count": int(failed_processing_count),
-            "unique_books_fetched": int(unique_books_api_count),
-            "api_calls_made": int(api_calls_made),
-            "successful_api_calls": int(successful_api_calls),
-            "api_errors_encountered": int(api_errors_encountered),
+            "unique_books_fetched": int(fetched["unique_books_fetched"]),
+            "api_calls_made": int(fetched["api_calls_made"]),
+            "successful_api_calls": int(fetched["successful_api_calls"]),
+            "api_errors_encountered": int(fetched["api_errors_encountered"]),
         }
 
     except Exception as overall_task_e:
@@ -304,10 +445,80 @@ async def process_search_query(self, query: str):
             "status": "failed",
             "error_type": error_type,
             "error_message": "Task failed due to an internal error. Check worker logs for details.",
-            "processed_count_before_failure": int(processed_count),
-            "failed_processing_count": int(failed_processing_count),
-            "unique_books_fetched": int(unique_books_api_count),
-            "api_calls_made": int(api_calls_made),
-            "successful_api_calls": int(successful_api_calls),
-            "api_errors_encountered": int(api_errors_encountered),
-        }
\ No newline at end of file
+            "processed_count_before_failure": int(ingested.get("processed_count", 0)),
+            "failed_processing_count": int(ingested.get("failed_processing_count", 0) + fetched.get("failed_parsing_count", 0)),
+            "unique_books_fetched": int(fetched.get("unique_books_fetched", 0)),
+            "api_calls_made": int(fetched.get("api_calls_made", 0)),
+            "successful_api_calls": int(fetched.get("successful_api_calls", 0)),
+            "api_errors_encountered": int(fetched.get("api_errors_encountered", 0)),
+        }
+
+
+@celery_app.task(bind=True)
+def process_search_queries(self, queries: List[str], run_id: str, concurrency: int = 4):
+    """
+    Celery task that backfills a batch of queries on the backfill queue.
+    Queries are fetched `concurrency` at a time over the shared clients; the books of each
+    window of queries are deduplicated across queries before a single ingest. Finished
+    queries are checkpointed under run_id, so re-running a crashed batch skips them.
+    """
+    return run_coroutine(scrape_query_batch(queries, run_id, concurrency))
+
+
+async def scrape_query_batch(queries: List[str], run_id: str, concurrency: int = 4) -> Dict[str, Any]:
+    if not settings.EXTERNAL_SEARCH_API_BASE_URL:
+        print("Error: EXTERNAL_SEARCH_API_BASE_URL is not configured. Aborting batch.")
+        return {"run_id": run_id, "status": "error", "message": "External API URL not configured"}
+
+    done = await load_completed_queries(run_id)
+    unique_pending: Dict[str, str] = {}
+    for query in queries:
+        if query and query.strip() and normalize_query(query) not in done:
+            unique_pending.setdefault(normalize_query(query), query)
+    pending = list(unique_pending.values())
+    print(f"BATCH STARTED (run {run_id}): {len(pending)} queries pending, {len(queries) - len(pending)} already done or empty.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {"queries_completed": 0, "queries_failed": 0, "books_fetched": 0, "duplicates_skipped": 0,
+              "processed_count": 0, "created_count": 0, "updated_count": 0, "failed_processing_count": 0}
+
+    async def fetch(query: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await _fetch_query(query)
+            except Exception as e:
+                print(f"Fetching query '{query}' failed: {type(e).__name__} - {e}")
+                return None
+
+    window_size = max(1, concurrency * 2)
+    for start in range(0, len(pending), window_size):
+        window = pending[start:start + window_size]
+        results = await asyncio.gather(*(fetch(query) for query in window))
+
+        books: Dict[Tuple, BookCreate] = {}
+        fetched_queries: Dict[str, Set[Tuple]] = {}
+        for query, fetched in zip(window, results):
+            # A query none of whose calls succeeded fetched nothing and must be retried.
+            if fetched is None or not fetched["successful_api_calls"]:
+                totals["queries_failed"] += 1
+                continue
+            totals["books_fetched"] += len(fetched["books"])
+            totals["failed_processing_count"] += fetched["failed_parsing_count"]
+            fetched_queries[query] = {book_identity_key(book) for book in fetched["books"]}
+            for book in fetched["books"]:
+                books.setdefault(book_identity_key(book), book)
+        totals["duplicates_skipped"] += sum(len(r["books"]) for r in results if r) - len(books)
+
+        ingested = await _ingest_books(list(books.values()), label=f"backfill run {run_id}")
+        for key in ("processed_count", "created_count", "updated_count", "failed_processing_count"):
+            totals[key] += ingested[key]
+        # Only queries whose books were all committed are checkpointed.
+        completed = [query for query, keys in fetched_queries.items() if not keys & ingested["failed_keys"]]
+        totals["queries_failed"] += len(fetched_queries) - len(completed)
+        totals["queries_completed"] += len(completed)
+        counters = {key: value for key, value in ingested.items() if key != "failed_keys"}
+        await mark_queries_completed(run_id, completed, counters)
+        print(f"Batch {run_id}: {start + len(window)}/{len(pending)} queries done, {totals['processed_count']} books written.")
+
+    print(f"BATCH FINISHED (run {run_id}): {totals}")
+    return {"run_id": run_id, "status": "completed", **totals}
@@ -0,0 +1,61 @@
+import re
+from typing import Optional, Tuple
+
+_NON_ISBN_CHARS = re.compile(r"[^0-9X]")
+
+
+def _clean(raw: Optional[str]) -> str:
+    return _NON_ISBN_CHARS.sub("", (raw or "").upper())
+
+
+def _isbn10_check_digit(first9: str) -> str:
+    remainder = (11 - sum((10 - i) * int(d) for i, d in enumerate(first9)) % 11) % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    return str((10 - sum((3 if i % 2 else 1) * int(d) for i, d in enumerate(first12)) % 10) % 10)
+
+
+def normalize_isbn10(raw: Optional[str]) -> Optional[str]:
+    """Strips hyphens and spaces; returns the ISBN-10 if its check digit is valid."""
+    isbn = _clean(raw)
+    if len(isbn) != 10 or not isbn[:9].isdigit() or isbn[9] != _isbn10_check_digit(isbn[:9]):
+        return None
+    return isbn
+
+
+def normalize_isbn13(raw: Optional[str]) -> Optional[str]:
+    """Strips hyphens and spaces; returns the ISBN-13 if its check digit is valid."""
+    isbn = _clean(raw)
+    if len(isbn) != 13 or not isbn.isdigit() or isbn[12] != _isbn13_check_digit(isbn[:12]):
+        return None
+    return isbn
+
+
+def isbn10_to_isbn13(isbn10: str) -> str:
+    first12 = "978" + isbn10[:9]
+    return first12 + _isbn13_check_digit(first12)
+
+
+def isbn13_to_isbn10(isbn13: str) -> Optional[str]:
+    """Only 978-prefixed ISBN-13s have an ISBN-10 form."""
+    if not isbn13.startswith("978"):
+        return None
+    first9 = isbn13[3:12]
+    return first9 + _isbn10_check_digit(first9)
+
+
+def normalize_isbns(isbn_10: Optional[str], isbn_13: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Normalizes an (isbn_10, isbn_13) pair and fills in whichever is missing from the other.
+    Either value may arrive in the wrong slot (a 10-digit isbn_13 or vice versa). A slot
+    that can be neither validated nor derived keeps its original value.
+    """
+    isbn10 = normalize_isbn10(isbn_10) or normalize_isbn10(isbn_13)
+    isbn13 = normalize_isbn13(isbn_13) or normalize_isbn13(isbn_10)
+    if isbn13 is None and isbn10 is not None:
+        isbn13 = isbn10_to_isbn13(isbn10)
+    if isbn10 is None and isbn13 is not None:
+        isbn10 = isbn13_to_isbn10(isbn13)
+    return isbn10 or isbn_10, isbn13 or isbn_13
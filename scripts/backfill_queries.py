@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import hashlib
+
+from app.core.async_runtime import run_coroutine, shutdown_runtime
+from app.services.backfill import enqueue_backfill, get_backfill_progress
+from app.tasks.scrape import scrape_query_batch
+
+
+def read_queries(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def main(path: str, run_id: str | None, batch_size: int, concurrency: int, local: bool, status: bool):
+    queries = read_queries(path)
+    # The default run id is derived from the file, so re-running the same file resumes it.
+    run_id = run_id or hashlib.sha1("\n".join(queries).encode()).hexdigest()[:12]
+
+    try:
+        if status:
+            print(run_coroutine(get_backfill_progress(run_id)))
+        elif local:
+            print(f"Backfilling {len(queries)} queries in-process (run {run_id})...")
+            print(run_coroutine(scrape_query_batch(queries, run_id, concurrency)))
+        else:
+            task_ids = enqueue_backfill(queries, run_id, batch_size=batch_size, concurrency=concurrency)
+            print(f"Enqueued {len(task_ids)} batch tasks for {len(queries)} queries on the backfill queue (run {run_id}).")
+    finally:
+        shutdown_runtime()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape external sources for every query in a file.")
+    parser.add_argument('file', help='Text file with one query per line; blank lines and # comments are ignored.')
+    parser.add_argument('--run-id', help='Checkpoint namespace; defaults to a hash of the query list so reruns resume.')
+    parser.add_argument('--batch-size', type=int, default=100, help='Queries per backfill task.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Queries fetched concurrently within a task.')
+    parser.add_argument('--local', action='store_true', help='Run in this process instead of enqueueing tasks.')
+    parser.add_argument('--status', action='store_true', help='Print the progress recorded for the run and exit.')
+    args = parser.parse_args()
+
+    main(args.file, args.run_id, args.batch_size, args.concurrency, args.local, args.status)
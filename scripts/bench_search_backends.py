@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import asyncio
+import time
+
+from app.core.db import engine
+from app.core.es import close_es_client
+from app.core.redis import close_redis_client
+from app.services.pg_search_service import search_books_in_pg
+from app.services.search_service import _execute_search
+
+DEFAULT_QUERIES = ["history", "dragon", "love story", "science fiction", "war and peace", "mystery murder"]
+SORTS = [None, "rating_desc", "year_asc", "title_asc"]
+
+
+async def time_backend(name: str, search, queries: list[str], repeat: int, page_size: int) -> None:
+    latencies = []
+    hits = 0
+    for _ in range(repeat):
+        for query in queries:
+            for sort_by in SORTS:
+                started = time.perf_counter()
+                results, _ = await search(query, sort_by, page_size)
+                latencies.append(time.perf_counter() - started)
+                hits += len(results)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{name:14} {len(latencies):5} searches  p50 {p50 * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+          f"max {latencies[-1] * 1000:7.1f} ms  avg hits {hits / len(latencies):.1f}")
+
+
+async def es_search(query: str, sort_by: str | None, page_size: int):
+    payload = await _execute_search(query, None, sort_by, 1, page_size, exact_total=True)
+    return payload["results"], payload["total_hits"]
+
+
+async def pg_search(query: str, sort_by: str | None, page_size: int):
+    return await search_books_in_pg(query, None, sort_by, 1, page_size, exact_total=True)
+
+
+async def main(queries: list[str], repeat: int, page_size: int):
+    try:
+        # Bypasses the search cache on purpose, so both engines do the full work every time.
+        await time_backend("elasticsearch", es_search, queries, repeat, page_size)
+        await time_backend("postgres", pg_search, queries, repeat, page_size)
+    finally:
+        await close_es_client()
+        await close_redis_client()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare Elasticsearch and Postgres full-text search latency.")
+    parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES, help='Queries to run against both backends.')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the query and sort combinations.')
+    parser.add_argument('--page-size', type=int, default=20, help='Results per search.')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.queries, args.repeat, args.page_size))
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import json
+import random
+import timeit
+import uuid
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from faker import Faker
+
+from app.schemas.author import AuthorPublic
+from app.schemas.book import BookPublic, BookSearchPage
+from app.schemas.genre import GenrePublic
+from app.services.search_serializer import to_public_books
+
+fake = Faker()
+
+
+def make_hits(count: int) -> list[dict]:
+    """Builds search hits shaped like the _source documents returned by Elasticsearch."""
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": fake.catch_phrase(),
+            "year_published": random.randint(1950, 2025),
+            "summary": fake.paragraph(nb_sentences=5),
+            "age_rating": random.choice(["All", "13+", "18+"]),
+            "language": "English",
+            "book_size_pages": random.randint(150, 1200),
+            "average_rating": round(random.uniform(2.5, 5.0), 1),
+            "isbn_13": f"978{random.randint(1000000000, 9999999999)}",
+            "authors": [{"id": str(uuid.uuid4()), "name": fake.name()} for _ in range(random.randint(1, 3))],
+            "genres": [{"id": str(uuid.uuid4()), "name": fake.word()} for _ in range(random.randint(1, 4))],
+        }
+        for _ in range(count)
+    ]
+
+
+def pydantic_path(hits: list[dict]) -> bytes:
+    """The previous path: pydantic objects per hit, re-validated against response_model, then JSON-encoded."""
+    public_results = [
+        BookPublic(
+            **{k: v for k, v in hit.items() if k not in ['authors', 'genres']},
+            authors=[AuthorPublic(**a) for a in hit.get("authors", [])],
+            genres=[GenrePublic(**g) for g in hit.get("genres", [])]
+        )
+        for hit in hits
+    ]
+    page = BookSearchPage(results=public_results, total_hits=len(hits), page=1, page_size=len(hits))
+    validated = BookSearchPage.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(hits: list[dict]) -> bytes:
+    return orjson.dumps({
+        "results": to_public_books(hits),
+        "total_hits": len(hits),
+        "page": 1,
+        "page_size": len(hits),
+        "next_cursor": None,
+        "facets": None,
+    })
+
+
+def main(page_size: int, repeat: int):
+    hits = make_hits(page_size)
+    assert orjson.loads(fast_path(hits))["results"] == json.loads(pydantic_path(hits))["results"]
+
+    old = min(timeit.repeat(lambda: pydantic_path(hits), number=repeat, repeat=5)) / repeat
+    new = min(timeit.repeat(lambda: fast_path(hits), number=repeat, repeat=5)) / repeat
+    print(f"Page size {page_size}:")
+    print(f"  pydantic + response_model: {old * 1e6:9.1f} us/request")
+    print(f"  direct mapping + orjson:   {new * 1e6:9.1f} us/request")
+    print(f"  CPU saved per request:     {(old - new) * 1e6:9.1f} us ({old / new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark search response serialization paths.")
+    parser.add_argument('--page-size', type=int, default=100, help='Number of hits per simulated response.')
+    parser.add_argument('--repeat', type=int, default=200, help='Serializations per timing run.')
+    args = parser.parse_args()
+
+    main(page_size=args.page_size, repeat=args.repeat)
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import asyncio
+
+from app.core.db import engine
+from app.core.es import close_es_client
+from app.core.redis import close_redis_client
+from app.services.dedupe_service import dedupe_books
+
+
+async def main(chunk_size: int, dry_run: bool):
+    try:
+        await dedupe_books(chunk_size=chunk_size, dry_run=dry_run)
+    finally:
+        await close_es_client()
+        await close_redis_client()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Merge duplicate books found by ISBN or similar title and shared author.")
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Books scanned per query.')
+    parser.add_argument('--dry-run', action='store_true', help='Only report the duplicate groups.')
+    args = parser.parse_args()
+
+    asyncio.run(main(chunk_size=args.chunk_size, dry_run=args.dry_run))
@@ -14,10 +14,10 @@ from app.models.book import Book
 from app.models.author import Author
 from app.models.genre import Genre
 from app.crud.crud_book import create_book
-from app.crud.crud_author import get_or_create_author
-from app.crud.crud_genre import get_or_create_genre
+from app.crud.crud_author import get_or_create_author_ids
+from app.crud.crud_genre import get_or_create_genre_ids
 from app.schemas.book import BookCreate
-from app.services.search_service import bulk_index_books
+from app.services.outbox_relay import run_outbox_relay
 
 fake = Faker()
 
@@ -27,35 +27,19 @@ engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 async def generate_authors(db: AsyncSession, count: int) -> list[Author]:
-    authors = []
     print(f"Generating {count} authors...")
-    for _ in range(count):
-        name = fake.name()
-        result = await db.execute(select(Author).where(Author.name == name))
-        existing = result.scalars().first()
-        if not existing:
-            author = Author(name=name)
-            db.add(author)
-            authors.append(author)
-    await db.flush()
-    print(f"Generated {len(authors)} unique authors.")
+    names = {fake.name() for _ in range(count)}
+    await get_or_create_author_ids(db, names)
+    print(f"Ensured {len(names)} unique authors exist.")
     all_authors_result = await db.execute(select(Author))
     return all_authors_result.scalars().all()
 
 
 async def generate_genres(db: AsyncSession, genres_list: list[str]) -> list[Genre]:
-    genres = []
     print(f"Generating/Fetching {len(genres_list)} genres...")
-    for name in genres_list:
-        result = await db.execute(select(Genre).where(Genre.name == name))
-        existing = result.scalars().first()
-        if not existing:
-            genre = Genre(name=name)
-            db.add(genre)
-            genres.append(genre)
-        else:
-            genres.append(existing)
-    await db.flush()
+    genre_ids = await get_or_create_genre_ids(db, genres_list)
+    result = await db.execute(select(Genre).where(Genre.id.in_(genre_ids.values())))
+    genres = result.scalars().all()
     print(f"Ensured {len(genres)} genres exist.")
     return genres
 
@@ -121,8 +105,8 @@ async def main(num_authors: int = 50, num_books: int = 500):
     print("\nDatabase population complete.")
 
     if created_books:
-        print(f"\nStarting Elasticsearch indexing for {len(created_books)} books...")
-        await bulk_index_books(created_books)
+        print(f"\nRelaying the search outbox for {len(created_books)} books...")
+        await run_outbox_relay(once=True)
         print("Elasticsearch indexing complete.")
     else:
         print("\nNo books were created, skipping Elasticsearch indexing.")
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import asyncio
+
+from app.core.db import engine
+from app.core.es import close_es_client
+from app.core.redis import close_redis_client
+from app.services.outbox_relay import requeue_dead_letters, run_outbox_relay
+
+
+async def main(batch_size: int, poll_interval: float, once: bool, requeue: bool):
+    try:
+        if requeue:
+            await requeue_dead_letters()
+        await run_outbox_relay(batch_size=batch_size, poll_interval=poll_interval, once=once)
+    finally:
+        await close_es_client()
+        await close_redis_client()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.core.config import settings
+    parser = argparse.ArgumentParser(description="Relay the search outbox from Postgres to Elasticsearch.")
+    parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_RELAY_BATCH_SIZE, help='Outbox rows claimed per batch.')
+    parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX_RELAY_POLL_SECONDS, help='Seconds to wait when the outbox is drained.')
+    parser.add_argument('--once', action='store_true', help='Exit once the outbox is empty.')
+    parser.add_argument('--requeue-dead-letters', action='store_true', help='Move dead-lettered books back into the outbox first.')
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        batch_size=args.batch_size, poll_interval=args.poll_interval, once=args.once,
+        requeue=args.requeue_dead_letters
+    ))
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import asyncio
+
+from app.core.es import close_es_client
+from app.core.redis import close_redis_client
+from app.services.reindex_service import reindex_books
+
+
+async def main(slices: int, chunk_size: int, delete_old: bool):
+    try:
+        await reindex_books(slices=slices, chunk_size=chunk_size, delete_old=delete_old)
+    finally:
+        await close_es_client()
+        await close_redis_client()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild the books index from Postgres and swap the alias with zero downtime.")
+    parser.add_argument('--slices', type=int, default=4, help='Number of primary-key ranges loaded in parallel.')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Books fetched and bulk indexed per request.')
+    parser.add_argument('--delete-old', action='store_true', help='Delete the previous index after the alias swap.')
+    args = parser.parse_args()
+
+    asyncio.run(main(slices=args.slices, chunk_size=args.chunk_size, delete_old=args.delete_old))
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import asyncio
+
+from app.core.es import close_es_client
+from app.core.redis import close_redis_client
+from app.services.sync_service import sync_books_to_es
+
+
+async def main(full: bool, chunk_size: int, bulk_chunk_size: int, checkpoint_every: int):
+    try:
+        await sync_books_to_es(
+            resume=not full,
+            chunk_size=chunk_size,
+            bulk_chunk_size=bulk_chunk_size,
+            checkpoint_every=checkpoint_every
+        )
+    finally:
+        await close_es_client()
+        await close_redis_client()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Stream all books from Postgres into Elasticsearch.")
+    parser.add_argument('--full', action='store_true', help='Ignore the saved checkpoint and sync every book.')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Books fetched per server-side cursor round trip.')
+    parser.add_argument('--bulk-chunk-size', type=int, default=500, help='Documents per bulk request.')
+    parser.add_argument('--checkpoint-every', type=int, default=5000, help='Documents between checkpoints and progress reports.')
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        full=args.full,
+        chunk_size=args.chunk_size,
+        bulk_chunk_size=args.bulk_chunk_size,
+        checkpoint_every=args.checkpoint_every
+    ))